@@ -0,0 +1,40 @@
+"""Shared fixtures.  State files go to a throwaway app data folder."""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Before ytcore is imported: APP_DATA_DIR must never be the user's real one
+os.environ.pop("LOCALAPPDATA", None)
+os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="ytdownload-tests-")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ytcore import (  # noqa: E402
+    DownloadArchive, DownloadJob, DownloadManager, HashIndex, JobJournal,
+    MetadataCache, MetricsRecorder,
+)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    m = DownloadManager(
+        max_workers=1,
+        cache=MetadataCache(tmp_path / "cache"),
+        journal=JobJournal(tmp_path / "journal.json"),
+        archive=DownloadArchive(tmp_path / "archive.jsonl"),
+        metrics=MetricsRecorder(tmp_path / "metrics"),
+        hashes=HashIndex(tmp_path / "hashes.jsonl"),
+    )
+    yield m
+    m.shutdown()
+
+
+@pytest.fixture
+def job(tmp_path):
+    return DownloadJob(
+        url="https://www.youtube.com/watch?v=dQw4w9WgXcQ", format_id="137",
+        height=1080, output_dir=str(tmp_path / "out"),
+    )
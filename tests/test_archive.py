@@ -0,0 +1,44 @@
+"""DownloadArchive: an append-only log that survives a restart."""
+
+from ytcore import DownloadArchive, DownloadJob
+
+URL = "https://youtu.be/dQw4w9WgXcQ"
+
+
+def _finished(tmp_path, name=b"video"):
+    path = tmp_path / "v.mp4"
+    path.write_bytes(name)
+    job = DownloadJob(URL, "137", 1080, str(tmp_path), title="Video")
+    job.final_path = str(path)
+    return job
+
+
+def test_archive_round_trip(tmp_path):
+    log = tmp_path / "archive.jsonl"
+    DownloadArchive(log).add(_finished(tmp_path))
+
+    archive = DownloadArchive(log)                  # a fresh process
+    record = archive.verified("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    assert record["path"] == str(tmp_path / "v.mp4")
+    archive.forget(URL)
+    assert URL not in DownloadArchive(log)
+
+
+def test_archive_drops_records_whose_file_changed(tmp_path):
+    log = tmp_path / "archive.jsonl"
+    job = _finished(tmp_path)
+    DownloadArchive(log).add(job)
+    with open(job.final_path, "ab") as fh:
+        fh.write(b"!")
+    assert DownloadArchive(log).verified(URL) is None
+    assert len(DownloadArchive(log)) == 0
+
+
+def test_archive_compacts_superseded_lines(tmp_path):
+    log = tmp_path / "archive.jsonl"
+    archive = DownloadArchive(log)
+    job = _finished(tmp_path)
+    for _ in range(40):
+        archive.add(job)
+    assert len(DownloadArchive(log)) == 1
+    assert len(log.read_text().splitlines()) == 1
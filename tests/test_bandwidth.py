@@ -0,0 +1,97 @@
+"""BandwidthScheduler: weighted fair shares of the global cap."""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import ytcore
+from ytcore import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, BandwidthScheduler,
+)
+
+MB = 1_000_000
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ytcore.time, "monotonic", clock)
+    return clock
+
+
+def _job(job_id, priority=PRIORITY_NORMAL, rate_limit=0):
+    return SimpleNamespace(id=job_id, priority=priority, rate_limit=rate_limit,
+                           _cancel=threading.Event())
+
+
+def test_shares_follow_priority_weights(clock):
+    bw = BandwidthScheduler(7 * MB)
+    for job_id, priority in enumerate((PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BACKGROUND)):
+        bw.register(_job(job_id, priority))
+    assert [bw.allocation(i) for i in range(3)] == pytest.approx([4 * MB, 2 * MB, 1 * MB])
+
+
+def test_job_cap_leaves_the_rest_to_others(clock):
+    bw = BandwidthScheduler(6 * MB)
+    bw.register(_job(1, rate_limit=1 * MB))
+    bw.register(_job(2))
+    assert bw.allocation(1) == pytest.approx(1 * MB)
+    assert bw.allocation(2) == pytest.approx(5 * MB)
+
+
+def test_unused_share_is_redistributed(clock):
+    bw = BandwidthScheduler(4 * MB)
+    slow, fast = _job(1), _job(2)
+    bw.register(slow)
+    bw.register(fast)
+    assert bw.allocation(1) == pytest.approx(2 * MB)
+
+    # Over one second the fast job hits its cap, the slow source uses a
+    # tenth of its share without ever waiting
+    fast._cancel.set()                      # don't really sleep when it is throttled
+    bw.consume(fast, 2 * MB)
+    clock.now += ytcore._REBALANCE_INTERVAL
+    bw.consume(slow, 200_000)
+    assert bw.allocation(1) == pytest.approx(300_000)        # 1.5 x what it used
+    assert bw.allocation(2) == pytest.approx(4 * MB - 300_000)
+
+
+def test_set_rate_limit_none_means_unlimited(clock):
+    bw = BandwidthScheduler(2 * MB)
+    bw.register(_job(1))
+    bw.register(_job(2, rate_limit=MB))
+    assert bw.limited
+
+    bw.set_rate_limit(None)
+    assert bw.rate_limit == 0
+    assert bw.allocation(1) == 0            # unlimited
+    assert bw.allocation(2) == MB           # its own cap still holds
+    bw.release(_job(2))
+    assert not bw.limited
+
+
+def test_register_release_churn(clock):
+    bw   = BandwidthScheduler(6 * MB)
+    jobs = [_job(i) for i in range(6)]
+    for job in jobs:
+        bw.register(job)
+    assert sum(bw.allocation(j.id) for j in jobs) == pytest.approx(6 * MB)
+
+    for job in jobs[:5]:
+        bw.release(job)
+        bw.release(job)                     # releasing twice is harmless
+    assert bw.allocation(jobs[5].id) == pytest.approx(6 * MB)
+    assert bw.allocation(jobs[0].id) == 0
+
+    bw.register(jobs[0])
+    assert bw.allocation(jobs[0].id) == pytest.approx(3 * MB)
+    bw.consume(jobs[1], 1000)               # a released job is not throttled
@@ -0,0 +1,80 @@
+"""MetadataCache: memory and disk tiers, TTL and stale stream URLs."""
+
+import time
+
+import pytest
+
+from ytcore import FormatRecord, MetadataCache
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def _info(expire):
+    return {
+        "id": "dQw4w9WgXcQ", "title": "Video", "duration": 212,
+        "formats": [{"format_id": "137", "vcodec": "avc1", "acodec": "none",
+                     "url": f"https://cdn.example/v?expire={int(expire)}&sig=x"}],
+    }
+
+
+@pytest.fixture
+def formats():
+    return [FormatRecord("1080p", "137", 1080, 30, "mp4", "avc1")]
+
+
+def test_memory_hit_keeps_fresh_info(tmp_path, formats):
+    cache = MetadataCache(tmp_path)
+    cache.put(URL, formats, _info(time.time() + 3600))
+    cached, info = cache.get("https://youtu.be/dQw4w9WgXcQ")     # same video key
+    assert [f.format_id for f in cached] == ["137"]
+    assert info["formats"][0]["format_id"] == "137"
+    assert cache.fresh_info(URL) is not None
+    assert cache.stats == {"hits": 1, "disk_hits": 0, "misses": 0, "entries": 1}
+
+
+def test_disk_tier_serves_a_new_instance(tmp_path, formats):
+    MetadataCache(tmp_path).put(URL, formats, _info(time.time() + 3600))
+    cache = MetadataCache(tmp_path)
+    cached, info = cache.get(URL)
+    assert [f.to_dict() for f in cached] == [f.to_dict() for f in formats]
+    assert info == {"id": "dQw4w9WgXcQ", "title": "Video", "duration": 212,
+                    "thumbnail": None, "webpage_url": None}      # summary only
+    assert cache.fresh_info(URL) is None        # stream URLs are never persisted
+    assert cache.disk_hits == 1
+    cache.get(URL)
+    assert cache.disk_hits == 1                 # promoted to the memory tier
+
+
+def test_expired_stream_urls_fall_back_to_summary(tmp_path, formats):
+    cache = MetadataCache(tmp_path)
+    cache.put(URL, formats, _info(time.time() + 60))     # inside the expiry margin
+    assert cache.fresh_info(URL) is None
+    cached, info = cache.get(URL)
+    assert cached and "formats" not in info and info["title"] == "Video"
+
+
+def test_entries_expire_after_ttl(tmp_path, formats, monkeypatch):
+    cache = MetadataCache(tmp_path, ttl=60)
+    cache.put(URL, formats, _info(time.time() + 3600))
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert cache.get(URL) is None
+    assert MetadataCache(tmp_path, ttl=60).get(URL) is None     # disk tier too
+    assert cache.misses == 1
+
+
+def test_memory_tier_is_bounded(tmp_path, formats):
+    cache = MetadataCache(tmp_path, capacity=2)
+    for video in "abc":
+        cache.put(f"https://www.youtube.com/watch?v={video}", formats, _info(time.time() + 3600))
+    assert cache.stats["entries"] == 2
+    assert cache.get("https://www.youtube.com/watch?v=a") is not None     # from disk
+    assert cache.disk_hits == 1
+
+
+def test_invalidate_drops_both_tiers(tmp_path, formats):
+    cache = MetadataCache(tmp_path)
+    cache.put(URL, formats, _info(time.time() + 3600))
+    cache.invalidate(URL)
+    assert cache.get(URL) is None
+    assert list(tmp_path.iterdir()) == []
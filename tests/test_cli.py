@@ -0,0 +1,50 @@
+"""ytcli: argument parsing and failure accounting."""
+
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import ytcli
+from ytcli import EXIT_FAILED, BatchRunner, _Emitter, _parse_rate
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("text, rate", [
+    ("1000000", 1000000), ("800K", 800 * 1024), ("5M", 5 * 1024 ** 2), ("1.5g", 1.5 * 1024 ** 3),
+])
+def test_parse_rate(text, rate):
+    assert _parse_rate(text) == rate
+
+
+def test_parse_rate_rejects_garbage():
+    with pytest.raises(Exception, match="invalid rate"):
+        _parse_rate("fast")
+
+
+def test_argument_parsing_does_not_import_yt_dlp():
+    code = (
+        "import sys, ytcli; ytcli._build_parser().parse_args(['URL', '-r', '5M']);"
+        "print('yt_dlp' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    assert out.stdout.strip() == "False", out.stderr
+
+
+def test_crashed_resolution_counts_as_failure(tmp_path, monkeypatch):
+    def _crash(self, url, preset):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(BatchRunner, "_queue_url", _crash)
+    args   = ytcli._build_parser().parse_args(["URL", "-o", str(tmp_path), "--progress-interval", "0.01"])
+    stream = io.StringIO()
+    runner = BatchRunner(args, _Emitter(stream))
+    assert runner.run([("https://example.com/v", None)]) == EXIT_FAILED
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert any(e["event"] == "error" and "boom" in e["message"] for e in events)
+    assert events[-1]["event"] == "summary" and events[-1]["failed"] == 1
@@ -0,0 +1,155 @@
+"""Stopping the daemon keeps unfinished downloads resumable."""
+
+import io
+import os
+import threading
+import time
+
+import pytest
+
+import ytcore
+import ytdaemon
+from ytcore import JOB_DONE, JOB_RUNNING, DownloadManager, JobJournal
+from ytcli import _Emitter
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def _wait(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    monkeypatch.setattr(ytcore, "APP_DATA_DIR", tmp_path / "state")
+    return tmp_path
+
+
+def test_stop_then_resume(state, monkeypatch):
+    out     = state / "out"
+    started = threading.Event()
+
+    def _interrupted_stage(job, spec, emit):
+        os.makedirs(spec["work_dir"], exist_ok=True)
+        part = os.path.join(spec["work_dir"], "video.mp4.part")
+        with open(part, "wb") as fh:
+            fh.write(b"x" * 1000)
+        emit("file", part)
+        started.set()
+        while not job.cancelled:
+            time.sleep(0.01)
+        raise ytcore.yt_dlp.utils.DownloadError("Cancelled by user.")
+
+    def _resumed_stage(job, spec, emit):
+        part  = os.path.join(spec["work_dir"], "video.mp4.part")
+        final = os.path.join(spec["work_dir"], "video.mp4")
+        with open(part, "ab") as fh:
+            fh.write(b"y" * 1000)
+        os.replace(part, final)
+        return {"final_path": final, "inputs": []}
+
+    args = ytdaemon._build_parser().parse_args(["-o", str(out), "--port", "0"])
+    monkeypatch.setattr(DownloadManager, "_download_stage", staticmethod(_interrupted_stage))
+    first = ytdaemon.Daemon(args, _Emitter(io.StringIO()))
+    first.enqueue(URL, ytcore.QUALITY_PRESETS["best"])
+    assert started.wait(10)
+    first.manager.stop()
+
+    part = out / "video.mp4.part"
+    assert part.exists() and part.stat().st_size == 1000
+    [entry] = JobJournal().interrupted()
+    assert entry["state"] == "running"
+    assert str(part) in entry["files"]
+
+    # Restart with --resume: the job continues from its partial file
+    args = ytdaemon._build_parser().parse_args(["-o", str(out), "--port", "0", "--resume"])
+    monkeypatch.setattr(DownloadManager, "_download_stage", staticmethod(_resumed_stage))
+    second = ytdaemon.Daemon(args, _Emitter(io.StringIO()))
+    second.resume()
+    [job] = second.manager.jobs()
+    _wait(lambda: job.finished)
+    assert job.state == JOB_DONE
+    assert (out / "video.mp4").read_bytes() == b"x" * 1000 + b"y" * 1000
+    assert JobJournal().interrupted() == []
+    second.manager.shutdown()
+
+
+@pytest.fixture
+def blocking_stage(monkeypatch):
+    """A download stage that writes a partial file and waits to be cancelled."""
+    def _stage(job, spec, emit):
+        part = f"{spec['work_dir']}/v.mp4.part"
+        with open(part, "wb") as fh:
+            fh.write(b"partial")
+        emit("file", part)
+        while not job.cancelled:
+            time.sleep(0.01)
+        raise ytcore.yt_dlp.utils.DownloadError("Cancelled by user.")
+    monkeypatch.setattr(DownloadManager, "_download_stage", staticmethod(_stage))
+
+
+def _start(manager, job):
+    os.makedirs(job.output_dir)
+    manager.submit(job)
+    deadline = time.monotonic() + 10
+    while not job.files:
+        assert time.monotonic() < deadline, "the job never started"
+        time.sleep(0.01)
+    return os.path.join(job.output_dir, "v.mp4.part")
+
+
+def test_stop_keeps_jobs_resumable(manager, job, blocking_stage, tmp_path):
+    part = _start(manager, job)
+    assert manager.stop() == [job]
+    assert os.path.exists(part)
+    [entry] = JobJournal(tmp_path / "journal.json").interrupted()     # as the next run sees it
+    assert entry["uid"] == job.uid
+    assert entry["state"] == JOB_RUNNING
+    assert part in entry["files"]
+
+
+def test_shutdown_cancels_and_cleans_up(manager, job, blocking_stage):
+    part = _start(manager, job)
+    manager.shutdown()
+    deadline = time.monotonic() + 10
+    while not job.finished:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert not os.path.exists(part)
+    assert manager.journal.interrupted() == []
+
+
+@pytest.mark.parametrize("force, queued", [(False, ["b"]), (True, ["a", "b"])])
+def test_force_requeues_archived_playlist_entries(state, monkeypatch, force, queued):
+    entries = [{"url": f"https://www.youtube.com/watch?v={v}", "title": v, "index": i, "playlist": "P"}
+               for i, v in enumerate("ab")]
+
+    def _stage(job, spec, emit):
+        final = os.path.join(spec["work_dir"], f"{job.title}.mp4")
+        with open(final, "wb") as fh:
+            fh.write(b"video")
+        return {"final_path": final, "inputs": []}
+
+    monkeypatch.setattr(DownloadManager, "iter_playlist", lambda self, url: iter(entries))
+    monkeypatch.setattr(DownloadManager, "_download_stage", staticmethod(_stage))
+    args   = ytdaemon._build_parser().parse_args(["-o", str(state / "out"), "--port", "0"])
+    events = io.StringIO()
+    daemon = ytdaemon.Daemon(args, _Emitter(events))
+
+    archived = state / "a.mp4"
+    archived.write_bytes(b"kept")
+    done = ytcore.DownloadJob(entries[0]["url"], "137", 1080, str(state))
+    done.final_path = str(archived)
+    daemon.manager.archive.add(done)
+
+    result = daemon.enqueue("https://www.youtube.com/playlist?list=PL123",
+                            ytcore.QUALITY_PRESETS["best"], force=force)
+    assert result["playlist"]
+    [listing] = daemon._playlists
+    _wait(lambda: listing["state"] == "done")
+    assert sorted(job.title for job in daemon.manager.jobs()) == queued
+    assert ('"skipped"' in events.getvalue()) is not force
+    daemon.manager.shutdown()
@@ -0,0 +1,33 @@
+"""GUI handlers that can run without a display."""
+
+from types import SimpleNamespace
+
+import pytest
+
+ytdownload = pytest.importorskip("ytdownload")
+
+LINK = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def _window():
+    started = []
+    window  = SimpleNamespace(
+        _url_entry=SimpleNamespace(get=lambda: ""),
+        _fetching=None,
+        _clip_seen=None,
+        clipboard_get=lambda: LINK,
+        _start_fetch=lambda url, shown: started.append((url, shown)),
+    )
+    return window, started
+
+
+def test_clipboard_prefetch_ignores_child_focus_changes():
+    window, started = _window()
+    ytdownload.App._on_focus_in(window, SimpleNamespace(widget=object()))
+    assert started == []
+
+
+def test_clipboard_prefetch_when_the_window_is_activated():
+    window, started = _window()
+    ytdownload.App._on_focus_in(window, SimpleNamespace(widget=window))
+    assert started == [(LINK, False)]
@@ -0,0 +1,143 @@
+"""Inline content hashing (faststart relocation, ranged transfers) and the HashIndex."""
+
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+
+import pytest
+
+import ytcore
+from ytcore import HashIndex, _faststart, _inline_hash, _mp4_atoms
+
+
+def _atom(kind, payload):
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _stco(offsets):
+    return _atom(b"stco", struct.pack(f">II{len(offsets)}I", 0, len(offsets), *offsets))
+
+
+def _mp4(media):
+    """ftyp, free, mdat, moov -- the layout ffmpeg writes without +faststart."""
+    head  = _atom(b"ftyp", b"isom\0\0\2\0isomiso2") + _atom(b"free", b"")
+    mdat  = _atom(b"mdat", media)
+    first = len(head) + 8
+    moov  = _atom(b"moov", _atom(b"trak", _atom(b"mdia", _atom(b"minf", _atom(
+        b"stbl", _stco([first, first + len(media) // 2]),
+    )))))
+    return head + mdat + moov, first
+
+
+def _chunk_offsets(data):
+    moov = next((o, s) for k, o, s, _ in _mp4_atoms(data, 0, len(data)) if k == b"moov")
+    stco = data.index(b"stco", moov[0])
+    count = struct.unpack_from(">I", data, stco + 8)[0]
+    return list(struct.unpack_from(f">{count}I", data, stco + 12))
+
+
+@pytest.mark.parametrize("block", [7, 1024 * 1024])
+def test_faststart_moves_moov_and_hashes_the_result(tmp_path, monkeypatch, block):
+    monkeypatch.setattr(ytcore, "_HASH_BLOCK", block)
+    media = bytes(range(256)) * 40
+    data, first = _mp4(media)
+    path = tmp_path / "v.temp.mp4"
+    path.write_bytes(data)
+
+    digest = hashlib.sha256()
+    assert _faststart(str(path), digest, lambda: False)
+    out = path.read_bytes()
+    assert [k for k, *_ in _mp4_atoms(out, 0, len(out))] == [b"ftyp", b"moov", b"free", b"mdat"]
+    assert digest.hexdigest() == hashlib.sha256(out).hexdigest()
+    offsets = _chunk_offsets(out)
+    assert out[offsets[0]:offsets[0] + 16] == media[:16]
+    assert out[offsets[1]:offsets[1] + 16] == media[len(media) // 2:][:16]
+
+
+def test_faststart_leaves_other_layouts_alone(tmp_path):
+    data, _ = _mp4(b"x" * 100)
+    path = tmp_path / "v.mp4"
+    path.write_bytes(data + _atom(b"udta", b""))     # moov is not last
+    assert not _faststart(str(path), hashlib.sha256(), lambda: False)
+    assert path.read_bytes() == data + _atom(b"udta", b"")
+
+
+def test_faststart_upgrades_overflowing_stco_to_co64(tmp_path):
+    data, first = _mp4(b"x" * 100)
+    high = 0xFFFFFFFF - 10          # pushed past 32 bits by the moov shift
+    data = data.replace(struct.pack(">2I", first, first + 50), struct.pack(">2I", first, high))
+    path = tmp_path / "v.mp4"
+    path.write_bytes(data)
+
+    digest = hashlib.sha256()
+    assert _faststart(str(path), digest, lambda: False)
+    out = path.read_bytes()
+    assert digest.hexdigest() == hashlib.sha256(out).hexdigest()
+    atoms = {k: (o, s) for k, o, s, _ in _mp4_atoms(out, 0, len(out))}
+    moov_at, moov_size = atoms[b"moov"]
+    assert moov_size == 8 * 5 + 8 + 8 + 2 * 8       # five containers + co64 with two entries
+    for kind in (b"trak", b"mdia", b"minf", b"stbl"):   # enclosing sizes were updated
+        pos = out.index(kind, moov_at) - 4
+        assert list(_mp4_atoms(out, pos, moov_at + moov_size))[0][2] == moov_at + moov_size - pos
+    co64 = out.index(b"co64", moov_at)
+    assert b"stco" not in out[moov_at:moov_at + moov_size]
+    offsets = list(struct.unpack_from(">I2Q", out, co64 + 8))
+    assert offsets == [2, first + moov_size, high + moov_size]
+    assert out[offsets[1]:offsets[1] + 4] == b"xxxx"
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="needs ffmpeg")
+def test_faststart_matches_ffmpeg(tmp_path):
+    def _encode(name, *flags):
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=1:size=64x64:rate=10",
+             "-c:v", "mpeg4", *flags, str(tmp_path / name)],
+            check=True,
+        )
+    _encode("ours.mp4")
+    _encode("ffmpeg.mp4", "-movflags", "+faststart")
+    digest = hashlib.sha256()
+    assert _faststart(str(tmp_path / "ours.mp4"), digest, lambda: False)
+    ours = (tmp_path / "ours.mp4").read_bytes()
+    assert ours == (tmp_path / "ffmpeg.mp4").read_bytes()
+    assert digest.hexdigest() == hashlib.sha256(ours).hexdigest()
+
+
+def test_inline_hash_ignores_a_rewritten_file(tmp_path, job):
+    path = tmp_path / "v.mp4"
+    path.write_bytes(b"stream")
+    st = path.stat()
+    job.hashed[str(path)] = ("abc", st.st_size, st.st_mtime_ns)
+    assert _inline_hash(job, str(path)) == "abc"
+    path.write_bytes(b"fixed up")
+    assert _inline_hash(job, str(path)) is None
+
+
+def test_hash_index_links_a_duplicate_across_folders(tmp_path):
+    log = tmp_path / "hashes.jsonl"
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    first, second = tmp_path / "a" / "v.mp4", tmp_path / "b" / "v.mp4"
+    first.write_bytes(b"same bytes")
+    second.write_bytes(b"same bytes")
+    HashIndex(log).add("f" * 64, str(first))
+
+    index = HashIndex(log)                          # a fresh process
+    assert index.link_duplicate("f" * 64, str(second)) == str(first)
+    assert os.path.samefile(first, second)
+    assert index.twin("f" * 64, str(second)) is None    # already the same file
+
+
+def test_hash_index_forgets_an_edited_file(tmp_path):
+    log = tmp_path / "hashes.jsonl"
+    first, second = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    first.write_bytes(b"same bytes")
+    second.write_bytes(b"same bytes")
+    index = HashIndex(log)
+    index.add("f" * 64, str(first))
+    first.write_bytes(b"edited!!!!")
+    assert index.link_duplicate("f" * 64, str(second)) is None
+    assert not os.path.samefile(first, second)
+    assert HashIndex(log).twin("f" * 64, str(second)) is None
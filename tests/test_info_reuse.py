@@ -0,0 +1,69 @@
+"""A fetched info dict is reused by the download only while it is fresh."""
+
+import time
+
+import pytest
+
+import ytcore
+from ytcore import DownloadManager, _info_is_fresh
+
+
+def _info(url=None, epoch=None):
+    fmt  = {"format_id": "137", "url": url or "https://cdn.example/v.mp4"}
+    info = {"id": "abc", "formats": [fmt]}
+    if epoch is not None:
+        info["epoch"] = epoch
+    return info
+
+
+@pytest.mark.parametrize("url, fresh", [
+    (f"https://cdn.example/v?expire={int(time.time()) + 3600}&sig=x", True),
+    (f"https://cdn.example/v?sig=x&expire={int(time.time()) + 60}", False),    # within the margin
+    (f"https://cdn.example/v?expire={int(time.time()) - 1}", False),
+    (f"https://manifest.example/api/expire/{int(time.time()) + 3600}/id/x", True),
+])
+def test_freshness_from_url_expiry(url, fresh):
+    assert _info_is_fresh(_info(url)) is fresh
+
+
+def test_earliest_expiry_wins():
+    info = _info(f"https://cdn.example/v?expire={int(time.time()) + 3600}")
+    info["formats"].append({"format_id": "140",
+                            "url": f"https://cdn.example/a?expire={int(time.time()) - 10}"})
+    assert not _info_is_fresh(info)
+
+
+def test_epoch_fallback_without_expiry():
+    assert _info_is_fresh(_info(epoch=time.time() - 60))
+    assert not _info_is_fresh(_info(epoch=time.time() - ytcore._INFO_MAX_AGE - 1))
+    assert not _info_is_fresh(_info())                      # no way to tell
+    assert not _info_is_fresh({"id": "abc", "formats": []})
+    assert not _info_is_fresh(None)
+
+
+class _FakeYDL:
+    def __init__(self):
+        self.calls = []
+
+    def process_ie_result(self, info, download):
+        self.calls.append("process")
+        return info
+
+    def extract_info(self, url, download):
+        self.calls.append("extract")
+        return _info(epoch=time.time())
+
+
+def test_fresh_info_is_reused_without_extracting(job):
+    job.info = _info(epoch=time.time())
+    ydl = _FakeYDL()
+    info, reused = DownloadManager._resolve_info(ydl, job)
+    assert reused and ydl.calls == ["process"]
+    assert info is not job.info         # processed from a copy
+
+
+def test_stale_info_is_extracted_again(job):
+    job.info = _info(f"https://cdn.example/v?expire={int(time.time()) - 1}")
+    ydl = _FakeYDL()
+    _, reused = DownloadManager._resolve_info(ydl, job)
+    assert not reused and ydl.calls == ["extract"]
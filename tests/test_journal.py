@@ -0,0 +1,34 @@
+"""JobJournal: interrupted jobs survive a restart."""
+
+from ytcore import JOB_DONE, JOB_RUNNING, DownloadJob, JobJournal
+
+URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+def test_journal_round_trip(tmp_path):
+    path = tmp_path / "journal.json"
+    job = DownloadJob(URL, "137", 1080, str(tmp_path), title="Video")
+    job.state = JOB_RUNNING
+    job.files.add(str(tmp_path / "v.f137.mp4"))
+    JobJournal(path).record(job)
+
+    [entry] = JobJournal(path).interrupted()
+    assert entry["uid"] == job.uid
+    assert entry["files"] == [str(tmp_path / "v.f137.mp4")]
+
+    job.state = JOB_DONE
+    JobJournal(path).record(job)
+    assert JobJournal(path).interrupted() == []
+
+
+def test_abandon_deletes_partial_files(manager, tmp_path):
+    part = tmp_path / "v.f137.mp4.part"
+    part.write_bytes(b"partial")
+    job = DownloadJob(URL, "137", 1080, str(tmp_path))
+    job.state = JOB_RUNNING
+    job.files.add(str(tmp_path / "v.f137.mp4"))
+    manager.journal.record(job)
+
+    assert manager.abandon_interrupted() == 1
+    assert not part.exists()
+    assert manager.journal.interrupted() == []
@@ -0,0 +1,57 @@
+"""Merge stage bookkeeping."""
+
+import os
+
+import pytest
+
+import ytcore
+from ytcore import (
+    JOB_DONE, MERGE_COPY, MERGE_TRANSCODE, _merge_args, _merge_temp_path, _owned_leftovers,
+)
+
+VIDEO = {"format_id": "137", "ext": "mp4", "vcodec": "avc1.640028", "acodec": "none"}
+AUDIO = {"format_id": "140", "ext": "m4a", "vcodec": "none", "acodec": "mp4a.40.2"}
+OPUS  = {"format_id": "251", "ext": "webm", "vcodec": "none", "acodec": "opus"}
+
+
+@pytest.mark.parametrize("audio, mode", [
+    (AUDIO, MERGE_COPY),
+    ({**AUDIO, "acodec": "mp3"}, MERGE_COPY),
+    ({**AUDIO, "acodec": None}, MERGE_COPY),        # unknown codec in an .m4a: trust the container
+    (OPUS, MERGE_TRANSCODE),
+    ({**OPUS, "acodec": None}, MERGE_TRANSCODE),
+])
+def test_merge_args_copy_or_transcode(audio, mode):
+    got, args = _merge_args([VIDEO, audio])
+    assert got == mode
+    assert args[:2] == ["-c:v", "copy"]
+    assert args[2:4] == (["-c:a", "copy"] if mode == MERGE_COPY else ["-c:a", "aac"])
+
+
+def test_merge_temp_is_journaled_before_ffmpeg_starts(manager, job, monkeypatch):
+    out = job.output_dir
+    os.makedirs(out)
+    job.work_dir = out
+    inputs = []
+    for fmt in (VIDEO, AUDIO):
+        path = os.path.join(out, f"v.f{fmt['format_id']}.{fmt['ext']}")
+        open(path, "wb").close()
+        inputs.append((fmt, path))
+    output = os.path.join(out, "v.mp4")
+    seen   = {}
+
+    def _fake_merge(job, inputs, output, codec_args, threads, digest=None):
+        seen["files"] = manager.journal.entry(job.uid)["files"]
+        with open(output, "wb") as fh:
+            fh.write(b"merged")
+
+    monkeypatch.setattr(ytcore, "_run_ffmpeg_merge", _fake_merge)
+    manager._merge_job(job, inputs, output)
+    assert _merge_temp_path(output) in seen["files"]
+    assert job.state == JOB_DONE
+
+
+def test_leftover_merge_temp_is_a_temp(tmp_path):
+    temp = _merge_temp_path(str(tmp_path / "v.mp4"))
+    open(temp, "wb").close()
+    assert _owned_leftovers({temp}, temps_only=True) == [temp]
@@ -0,0 +1,52 @@
+"""Metrics are best effort: an unwritable metrics folder never fails work."""
+
+import os
+import threading
+import time
+
+import pytest
+
+import ytcore
+from ytcore import JOB_DONE, DownloadManager
+
+INFO = {"extractor_key": "Youtube", "title": "Video"}
+
+
+@pytest.fixture
+def unwritable_metrics(manager):
+    """Put a file where the metrics folder goes (unwritable, even as root)."""
+    manager.metrics.directory.write_text("in the way")
+    return manager.metrics
+
+
+def test_extraction_survives_unwritable_metrics(manager, unwritable_metrics, monkeypatch):
+    monkeypatch.setattr(ytcore, "_extract_formats", lambda url: ([], INFO))
+    done, result = threading.Event(), []
+
+    def _success(formats, info):
+        result.append(info)
+        done.set()
+
+    manager.fetch_formats("https://www.youtube.com/watch?v=abc", _success,
+                          lambda msg: done.set(), use_cache=False)
+    assert done.wait(10)
+    assert result == [INFO]
+    assert not unwritable_metrics.prom.exists()
+
+
+def test_job_survives_unwritable_metrics(manager, job, unwritable_metrics, monkeypatch):
+    def _stage(job, spec, emit):
+        final = os.path.join(spec["work_dir"], "v.mp4")
+        with open(final, "wb") as fh:
+            fh.write(b"video")
+        return {"final_path": final, "inputs": []}
+
+    monkeypatch.setattr(DownloadManager, "_download_stage", staticmethod(_stage))
+    os.makedirs(job.output_dir)
+    manager.submit(job)
+    deadline = time.monotonic() + 10
+    while not job.finished:
+        assert time.monotonic() < deadline, "the job never finished"
+        time.sleep(0.01)
+    assert job.state == JOB_DONE, job.label
+    assert not unwritable_metrics.jsonl.exists()
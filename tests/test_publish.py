@@ -0,0 +1,55 @@
+"""Publishing from the scratch folder never overwrites a file in output_dir."""
+
+import os
+import time
+
+import pytest
+
+from ytcore import JOB_DONE, DownloadJob, DownloadManager, _claim_path
+
+
+def test_claim_path_numbers_taken_names(tmp_path):
+    target = tmp_path / "Video.mp4"
+    assert _claim_path(str(target)) == str(target)
+    assert _claim_path(str(target)) == str(tmp_path / "Video (1).mp4")
+    assert _claim_path(str(target)) == str(tmp_path / "Video (2).mp4")
+    assert target.read_bytes() == b""       # placeholders until a file is moved over them
+
+
+@pytest.fixture
+def scratch_manager(manager, tmp_path, monkeypatch):
+    def _stage(job, spec, emit):
+        os.makedirs(spec["work_dir"], exist_ok=True)
+        final = os.path.join(spec["work_dir"], "Video.mp4")
+        with open(final, "wb") as fh:
+            fh.write(job.title.encode())
+        return {"final_path": final, "inputs": []}
+
+    monkeypatch.setattr(DownloadManager, "_download_stage", staticmethod(_stage))
+    manager.set_scratch_dir(str(tmp_path / "scratch"))
+    return manager
+
+
+def _run(manager, out, title):
+    job = DownloadJob("https://www.youtube.com/watch?v=dQw4w9WgXcQ", "137", 1080, str(out),
+                      title=title)
+    manager.submit(job)
+    deadline = time.monotonic() + 10
+    while not job.finished:
+        assert time.monotonic() < deadline, "the job never finished"
+        time.sleep(0.01)
+    assert job.state == JOB_DONE, job.label
+    return job
+
+
+def test_publish_keeps_an_existing_file(scratch_manager, tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "Video.mp4").write_bytes(b"mine")
+
+    first  = _run(scratch_manager, out, "first")
+    second = _run(scratch_manager, out, "second")
+    assert (out / "Video.mp4").read_bytes() == b"mine"
+    assert first.final_path == str(out / "Video (1).mp4")
+    assert second.final_path == str(out / "Video (2).mp4")
+    assert (out / "Video (2).mp4").read_bytes() == b"second"
@@ -0,0 +1,67 @@
+"""RangedDownload chunk retries follow the transfer RetryPolicy."""
+
+import hashlib
+import io
+
+import pytest
+
+from ytcore import RangedDownload, RetryPolicy, _RangeError
+
+DATA = bytes(range(256)) * 64
+
+
+class _Response(io.BytesIO):
+    status = 206
+
+
+def _flaky(failures):
+    """A _request() stand-in that fails `failures` times, then serves DATA."""
+    calls = []
+
+    def _request(start, end):
+        calls.append((start, end))
+        if len(calls) <= failures:
+            raise ConnectionResetError("reset by peer")
+        return _Response(DATA[start:end + 1])
+    return _request, calls
+
+
+def _ranged(tmp_path, failures, attempts):
+    ranged = RangedDownload(
+        "http://example.invalid/v.mp4", str(tmp_path / "v.mp4"), connections=1,
+        retry=RetryPolicy(attempts=attempts, base=0.001, cap=0.001),
+    )
+    ranged._request, calls = _flaky(failures)
+    return ranged, calls
+
+
+def test_chunk_retried_up_to_the_policy(tmp_path):
+    ranged, calls = _ranged(tmp_path, failures=4, attempts=4)
+    ranged.run(len(DATA))
+    assert (tmp_path / "v.mp4").read_bytes() == DATA
+    assert ranged.retries == 4
+    assert len(calls) == 5
+
+
+def test_chunk_gives_up_after_the_policy(tmp_path):
+    ranged, calls = _ranged(tmp_path, failures=10, attempts=2)
+    with pytest.raises(_RangeError, match="reset by peer"):
+        ranged.run(len(DATA))
+    assert len(calls) == 3
+
+
+def test_chunks_are_hashed_in_file_order(tmp_path):
+    data   = bytes(range(256)) * (4 * 1024 * 3)         # 3 MiB: six 512 KiB chunks
+    ranged = RangedDownload("http://example.invalid/v.mp4", str(tmp_path / "v.mp4"), connections=3)
+    ranged._request = lambda start, end: _Response(data[start:end + 1])
+    ranged.run(len(data))
+    assert ranged.sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_out_of_order_chunks_wait_for_their_turn(tmp_path):
+    ranged = RangedDownload("http://example.invalid/v.mp4", str(tmp_path / "v.mp4"))
+    ranged.total, ranged.chunk = 6, 2
+    for index, part in ((2, b"ef"), (0, b"ab"), (1, b"cd")):
+        ranged._hash_chunk(index, [part])
+    assert ranged._digest.hexdigest() == hashlib.sha256(b"abcdef").hexdigest()
+    assert ranged._held == {}
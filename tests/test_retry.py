@@ -0,0 +1,94 @@
+"""Retry accounting, RetryPolicy and the per-host circuit breaker."""
+
+import pytest
+
+import ytcore
+from ytcore import (
+    RETRY_THROTTLED, RETRY_TRANSIENT, CircuitBreaker, RetryPolicy, _host_label, _retry_reason,
+)
+
+
+def test_ranged_retries_do_not_open_the_breaker(manager, job):
+    host = _host_label(job.url)
+    for _ in range(5):
+        manager._on_stage_event(job, {}, "retry", False, 2, False)
+    assert manager.breaker.remaining(host) == 0
+    assert manager.breaker.open_hosts() == {}
+    assert job.metrics.total_retries == 10
+
+
+def test_throttled_retries_open_the_breaker(manager, job, monkeypatch):
+    monkeypatch.setattr(manager, "_await_host", lambda job, host: True)
+    for _ in range(3):
+        manager._on_stage_event(job, {}, "retry", True, 1, True)
+    assert manager.breaker.remaining(_host_label(job.url)) > 0
+
+
+# -- RetryPolicy ----------------------------------------------------------------
+def test_retry_delay_doubles_within_jitter_and_cap():
+    policy = RetryPolicy(attempts=5, base=2.0, cap=10.0)
+    for retry, ceiling in ((1, 2.0), (2, 4.0), (3, 8.0), (4, 10.0), (9, 10.0)):
+        for _ in range(50):
+            assert ceiling / 2 <= policy.delay(retry) <= ceiling
+
+
+def test_ytdlp_sleep_function_counts_from_zero():
+    policy = RetryPolicy(base=1.0, cap=100.0)
+    assert 0.5 <= policy.sleep_function(0) <= 1.0
+    assert 2.0 <= policy.sleep_function(2) <= 4.0
+
+
+@pytest.mark.parametrize("exc, reason", [
+    (Exception("HTTP Error 429: Too Many Requests"), RETRY_THROTTLED),
+    (Exception("Sign in to confirm you're not a bot"), RETRY_THROTTLED),
+    (Exception("HTTP Error 503: Service Unavailable"), RETRY_TRANSIENT),
+    (ConnectionResetError("reset"), RETRY_TRANSIENT),
+    (Exception("Cancelled by user."), None),
+    (Exception("Video unavailable"), None),
+])
+def test_retry_reason(exc, reason):
+    assert _retry_reason(exc) == reason
+
+
+# -- CircuitBreaker ----------------------------------------------------------------
+def test_breaker_opens_at_the_threshold():
+    breaker = CircuitBreaker(threshold=3, window=60, cooldown=30)
+    assert breaker.record_throttle("h") == 0
+    assert breaker.record_throttle("h") == 0
+    assert breaker.record_throttle("h") == 30
+    assert 29 < breaker.remaining("h") <= 30
+    assert breaker.record_throttle("h") == 0            # already open
+    assert breaker.remaining("other") == 0
+
+
+def test_breaker_errors_outside_the_window_do_not_count(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ytcore.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, window=10, cooldown=5)
+    breaker.record_throttle("h")
+    now[0] += 11
+    assert breaker.record_throttle("h") == 0
+
+
+def test_breaker_half_open_reopens_for_longer_until_a_success(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ytcore.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, window=60, cooldown=5, max_cooldown=15)
+    breaker.record_throttle("h")
+    assert breaker.record_throttle("h") == 5
+    now[0] += 6
+    assert breaker.record_throttle("h") == 10           # one error re-opens it, doubled
+    now[0] += 11
+    assert breaker.record_throttle("h") == 15           # capped
+    now[0] += 16
+    breaker.record_success("h")
+    assert breaker.record_throttle("h") == 0            # closed for good
+
+
+def test_breaker_wait_returns_false_when_cancelled():
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.record_throttle("h")
+    waits = []
+    assert breaker.wait("h", lambda: True, waits.append) is False
+    assert len(waits) == 1
+    assert CircuitBreaker().wait("h", lambda: False, waits.append) is True
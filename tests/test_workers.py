@@ -0,0 +1,91 @@
+"""WorkerProcessPool: a hung worker is killed on cancel and replaced."""
+
+import http.server
+import os
+import socket
+import threading
+
+import pytest
+
+from ytcore import _TASK_CANCELLED, WorkerProcessPool, _WorkerError
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "killpg"), reason="POSIX process groups")
+
+
+@pytest.fixture
+def tarpit():
+    """A server that accepts connections and never answers."""
+    server   = socket.create_server(("127.0.0.1", 0))
+    accepted = threading.Event()
+    held     = []
+
+    def _serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            held.append(conn)
+            accepted.set()
+
+    threading.Thread(target=_serve, daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}/video.mp4", accepted
+    server.close()
+    for conn in held:
+        conn.close()
+
+
+@pytest.fixture
+def media_server():
+    """Serves a few bytes of 'video/mp4' at any path."""
+    class _Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", "4")
+            self.end_headers()
+            self.wfile.write(b"\0\0\0\0")
+
+        do_HEAD = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/video.mp4"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerProcessPool(keep=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_cancel_kills_hung_worker_and_pool_recovers(pool, tarpit, media_server):
+    url, accepted = tarpit
+    workers = []
+    acquire = pool._acquire
+
+    def _tracked():
+        workers.append(acquire())
+        return workers[-1]
+
+    pool._acquire = _tracked
+    with pytest.raises(_WorkerError) as err:
+        pool.run(("extract", url), cancelled=accepted.is_set)
+    assert err.value.kind == _TASK_CANCELLED
+
+    [hung] = workers
+    assert not hung.alive
+    with pytest.raises(ProcessLookupError):
+        os.killpg(hung.process.pid, 0)      # its whole process group is gone
+    assert pool._busy == set() and pool._idle == []
+
+    _, info = pool.run(("extract", media_server))
+    assert info["extractor_key"] == "Generic"
+    assert len(workers) == 2 and workers[1].process.pid != hung.process.pid
+    assert pool._idle == [workers[1]]       # kept warm for the next task
@@ -0,0 +1,66 @@
+"""YoutubeDLPool: instances are reused per profile and dropped when poisoned."""
+
+import pytest
+
+import ytcore
+from ytcore import YoutubeDLPool
+
+
+@pytest.fixture
+def pool():
+    return YoutubeDLPool(keep=2)
+
+
+def test_lease_returns_instance_to_its_profile(pool):
+    with pool.lease("extract") as first:
+        pass
+    with pool.lease("download") as other:
+        assert other is not first
+        assert not other.params.get("skip_download")
+    with pool.lease("extract") as again:
+        assert again is first
+
+
+def test_lease_options_do_not_outlive_the_lease(pool):
+    hook = lambda d: None   # noqa: E731
+    with pool.lease("download", {"format": "137+140", "outtmpl": "x.%(ext)s",
+                                 "progress_hooks": [hook]}) as ydl:
+        assert ydl.params["format"] == "137+140"
+        assert ydl.params["outtmpl"]["default"] == "x.%(ext)s"
+        assert ydl.format_selector is not None
+    [pooled] = pool._idle["download"]
+    assert "format" not in ydl.params
+    assert ydl.params["outtmpl"]["default"] != "x.%(ext)s"
+    assert ydl.format_selector is None
+    assert pooled.hooks == []
+
+
+def test_poisoned_instance_is_discarded(pool, monkeypatch):
+    closed = []
+    monkeypatch.setattr(ytcore._PooledYDL, "close", lambda self: closed.append(self))
+    with pytest.raises(RuntimeError):
+        with pool.lease("extract") as poisoned:
+            raise RuntimeError("cancelled mid-download")
+    assert [p.ydl for p in closed] == [poisoned]
+    assert pool._idle.get("extract", []) == []
+    with pool.lease("extract") as fresh:
+        assert fresh is not poisoned
+
+
+def test_surplus_instances_are_closed(pool, monkeypatch):
+    closed = []
+    monkeypatch.setattr(ytcore._PooledYDL, "close", lambda self: closed.append(self))
+    leases = [pool.lease("extract") for _ in range(3)]
+    ydls   = [lease.__enter__() for lease in leases]
+    for lease in leases:
+        lease.__exit__(None, None, None)
+    assert len(pool._idle["extract"]) == 2
+    assert [p.ydl for p in closed] == [ydls[2]]
+
+
+def test_warm_survives_a_failing_constructor(pool, monkeypatch):
+    def _broken(self, profile):
+        raise KeyError("stderr")    # e.g. sys.stderr swapped mid-construction
+    monkeypatch.setattr(ytcore._PooledYDL, "__init__", _broken)
+    pool.warm()
+    assert not any(pool._idle.values())
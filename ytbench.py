@@ -0,0 +1,581 @@
+"""
+YT-DLP Downloader  —  offline benchmark
+========================================
+Measures the download engine end to end without internet access: a local
+HTTP server stands in for a video site and serves synthetic media of known
+size, and yt-dlp's generic extractor drives DownloadManager.fetch_formats()
+and download() against it exactly as the GUI does.
+
+Usage:
+    python ytbench.py                               # progressive, DASH, HLS at -j 1,2,4
+    python ytbench.py -j 1,4,8 --scenarios progressive --bandwidth 2M
+    python ytbench.py --latency 80 --link 10M --json bench.json
+
+Scenarios:
+    progressive  one muxed MP4 file (ranged / multi-connection path)
+    dash         separate video + audio DASH streams (fragments + merge)
+    hls          one muxed HLS media playlist (fragments, no merge)
+
+Media is generated once with FFmpeg (noise video, so the bitrate and thus
+the size are predictable) into --media-dir.  Without FFmpeg only the
+progressive scenario runs, on random bytes served as video/mp4.
+
+The server runs in its own process and shapes traffic: --latency delays
+every response, --bandwidth caps each connection and --link caps all of
+them together.  Every concurrency level runs in a fresh process with its
+own cache, journal and archive, so peak RSS is that level's own.
+
+Reported per level: extraction time, time to first byte, wall time and
+throughput of the downloads, merge time and peak RSS.  Exit code 1 when a
+download failed, so CI can run this as a smoke test.
+"""
+
+# == Standard library =========================================================
+import argparse
+import http.server
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# == Third-party ==============================================================
+import yt_dlp
+
+# == Local ====================================================================
+from ytcore import (
+    JOB_DONE, DownloadArchive, DownloadManager, HashIndex, JobJournal, MetadataCache,
+    MetricsRecorder, _choose_format, _filesize_str, _ytdlp_version, ffmpeg_path,
+)
+
+
+SCENARIOS = ("progressive", "dash", "hls")
+
+# Entry point of each scenario, relative to the media root
+_ENTRY = {
+    "progressive": "progressive/video.mp4",
+    "dash":        "dash/manifest.mpd",
+    "hls":         "hls/index.m3u8",
+}
+
+_CONTENT_TYPES = {
+    ".mp4":  "video/mp4",
+    ".m4s":  "video/iso.segment",
+    ".mpd":  "application/dash+xml",
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts":   "video/mp2t",
+}
+
+_SEND_BLOCK    = 64 * 1024      # bytes per write (and per shaping step)
+_LEVEL_TIMEOUT = 900            # seconds before a level counts as hung
+
+# "video@3.mp4" is served as "video.mp4": every download of a level gets
+# its own URL and output name while they all share one file on disk
+_ALIAS_RE = re.compile(r"@\d+(?=\.[^./]+$)")
+
+
+# =============================================================================
+#  Synthetic media
+# =============================================================================
+def _parse_rate(text: str) -> float:
+    """'4M' / '800K' / '1000000' -> units per second."""
+    rate = yt_dlp.utils.parse_bytes(text)
+    if rate is None:
+        raise argparse.ArgumentTypeError(f"invalid rate: {text!r}")
+    return float(rate)
+
+
+def generate_media(root: Path, duration: int, bitrate: float) -> List[str]:
+    """
+    Create the scenario files under `root` (once) and return the scenarios
+    that are available.  `bitrate` is the video bitrate in bits/s.
+    """
+    ffmpeg   = ffmpeg_path()
+    stamp    = root / "media.json"
+    settings = {"duration": duration, "bitrate": bitrate, "ffmpeg": bool(ffmpeg)}
+    try:
+        if json.loads(stamp.read_text(encoding="utf-8")) == settings:
+            return [s for s in SCENARIOS if (root / _ENTRY[s]).exists()]
+    except (OSError, ValueError):
+        pass
+
+    shutil.rmtree(root, ignore_errors=True)
+    for scenario in SCENARIOS:
+        (root / scenario).mkdir(parents=True, exist_ok=True)
+    source = root / _ENTRY["progressive"]
+
+    if not ffmpeg:
+        # Random bytes: fine for a direct download, unusable for merging
+        block = os.urandom(1024 * 1024)
+        size  = int(duration * bitrate / 8)
+        with open(source, "wb") as fh:
+            for _ in range(size // len(block)):
+                fh.write(block)
+            fh.write(block[: size % len(block)])
+        stamp.write_text(json.dumps(settings), encoding="utf-8")
+        return ["progressive"]
+
+    def _ffmpeg(*args: str) -> None:
+        subprocess.run([ffmpeg, "-v", "error", "-y", *args], check=True)
+
+    # Noise barely compresses, so the encoder hits the requested bitrate
+    rate = str(int(bitrate))
+    _ffmpeg(
+        "-f", "lavfi", "-i", "color=c=gray:s=640x360:r=25,noise=alls=60:allf=t",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100",
+        "-t", str(duration), "-map", "0:v", "-map", "1:a",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "50",
+        "-b:v", rate, "-maxrate", rate, "-bufsize", rate,
+        "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", str(source),
+    )
+    _ffmpeg(
+        "-i", str(source), "-map", "0:v", "-map", "0:a", "-c", "copy",
+        "-f", "dash", "-seg_duration", "2", str(root / _ENTRY["dash"]),
+    )
+    _ffmpeg(
+        "-i", str(source), "-c", "copy", "-f", "hls", "-hls_time", "2",
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", str(root / "hls" / "seg%03d.ts"), str(root / _ENTRY["hls"]),
+    )
+    stamp.write_text(json.dumps(settings), encoding="utf-8")
+    return list(SCENARIOS)
+
+
+def _media_size(root: Path, scenario: str) -> int:
+    return sum(p.stat().st_size for p in (root / scenario).iterdir() if p.is_file())
+
+
+# =============================================================================
+#  Media server
+# =============================================================================
+class _Pacer:
+    """Hands out send slots at `rate` bytes/s; one shared pacer shapes the whole link."""
+
+    def __init__(self, rate: float) -> None:
+        self._rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, nbytes: int) -> float:
+        """Book `nbytes` and return the monotonic time they are due."""
+        with self._lock:
+            self._next = max(self._next, time.monotonic()) + nbytes / self._rate
+            return self._next
+
+
+class MediaServer(http.server.ThreadingHTTPServer):
+    """
+    Static file server with Range support and traffic shaping: `latency`
+    seconds before each response, `bandwidth` bytes/s per connection and
+    `link` bytes/s for all connections together (0 = unlimited).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, root: Path, latency: float = 0, bandwidth: float = 0,
+                 link: float = 0, port: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), _MediaHandler)
+        self.root      = root.resolve()
+        self.latency   = latency
+        self.bandwidth = bandwidth
+        self.link      = _Pacer(link) if link else None
+
+    def handle_error(self, request, client_address) -> None:
+        # Clients drop connections on purpose (probes, cancelled ranges)
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _MediaHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MediaServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self._serve(body=False)
+
+    def do_GET(self) -> None:
+        self._serve(body=True)
+
+    def _serve(self, body: bool) -> None:
+        rel  = _ALIAS_RE.sub("", self.path.split("?", 1)[0].lstrip("/"))
+        path = (self.server.root / rel).resolve()
+        if self.server.root not in path.parents or not path.is_file():
+            self.send_error(404)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        size       = path.stat().st_size
+        start, end = 0, size - 1
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start, end = int(match.group(1)), min(int(match.group(2) or end), end)
+            if start > end:
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", _CONTENT_TYPES.get(path.suffix, "application/octet-stream"))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if not body:
+            return
+
+        pacers = [p for p in (self.server.link,) if p]
+        if self.server.bandwidth:
+            pacers.append(_Pacer(self.server.bandwidth))
+        with open(path, "rb") as fh:
+            fh.seek(start)
+            left = end - start + 1
+            while left > 0:
+                data = fh.read(min(_SEND_BLOCK, left))
+                due  = max(p.reserve(len(data)) for p in pacers) if pacers else 0
+                time.sleep(max(0.0, due - time.monotonic()))
+                try:
+                    self.wfile.write(data)
+                except OSError:
+                    return      # client hung up (e.g. the extractor's probe)
+                left -= len(data)
+
+
+def _serve(args: argparse.Namespace) -> int:
+    """--serve: run the media server and print its port as the first line."""
+    server = MediaServer(
+        Path(args.serve), args.latency / 1000, args.bandwidth, args.link, args.port,
+    )
+    print(server.server_address[1], flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+# =============================================================================
+#  One benchmark level (runs in its own process)
+# =============================================================================
+def _peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, if the OS reports it."""
+    try:
+        import resource
+    except ImportError:
+        return _peak_rss_windows()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024    # Linux reports KiB
+
+
+def _peak_rss_windows() -> Optional[int]:
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters    = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process     = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+    except (AttributeError, OSError):
+        return None
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return round(sum(values) / len(values), 3) if values else None
+
+
+def run_level(spec: dict) -> dict:
+    """
+    Fetch and download `videos` aliases of one scenario with `concurrency`
+    workers; returns the level's measurements.  Extraction is capped at
+    `concurrency` at a time and each video is queued as soon as its
+    formats arrive, like a user pasting URLs into the GUI.
+    """
+    work = Path(tempfile.mkdtemp(prefix="level-", dir=spec["work"]))
+    out  = work / "out"
+    out.mkdir()
+    manager = DownloadManager(
+        max_workers=spec["concurrency"],
+        cache=MetadataCache(work / "cache"),
+        journal=JobJournal(work / "journal.json"),
+        archive=DownloadArchive(work / "archive.jsonl"),
+        hashes=HashIndex(work / "hashes.jsonl"),
+        dedupe=False,       # the aliases are byte-identical; measure real writes
+        connections=spec["connections"],
+        metrics=MetricsRecorder(work / "metrics"),
+        isolated=spec["isolated"],
+    )
+    base, ext = os.path.splitext(spec["url"])
+    urls      = [f"{base}@{n}{ext}" for n in range(spec["videos"])]
+    slots     = threading.Semaphore(spec["concurrency"])
+    lock      = threading.Lock()
+    finished  = threading.Event()
+    extract:  List[float] = []
+    errors:   List[str]   = []
+    jobs:     list        = []
+    pending   = [len(urls)]
+
+    def _settle() -> None:
+        with lock:
+            pending[0] -= 1
+            if pending[0] == 0:
+                finished.set()
+
+    def _failed(msg: str) -> None:
+        errors.append(msg.strip().splitlines()[-1] if msg.strip() else "failed")
+        _settle()
+
+    def _fetched(url: str, started: float, formats: list, info: dict) -> None:
+        extract.append(time.monotonic() - started)
+        slots.release()
+        format_id, height, _ = _choose_format(formats)
+        job = manager.download(
+            url, format_id, height, str(out),
+            on_progress=lambda pct, label: None,
+            on_status=lambda msg, color=None: None,
+            on_done=_settle,
+            on_error=_failed,
+            title=info.get("title", ""),
+        )
+        with lock:
+            jobs.append(job)
+
+    def _fetch_error(msg: str) -> None:
+        slots.release()
+        _failed(msg)
+
+    started = time.monotonic()
+    for url in urls:
+        slots.acquire()
+        t0 = time.monotonic()
+        manager.fetch_formats(
+            url,
+            on_success=lambda formats, info, u=url, t=t0: _fetched(u, t, formats, info),
+            on_error=_fetch_error,
+            use_cache=False,
+        )
+    finished.wait(_LEVEL_TIMEOUT)
+    wall = time.monotonic() - started
+
+    done    = [job for job in jobs if job.state == JOB_DONE]
+    total   = sum(job.metrics.bytes for job in done)
+    ttfb    = [job.metrics.ttfb_seconds for job in done if job.metrics.ttfb_seconds is not None]
+    merges  = [job.merge_seconds for job in done if job.merge_seconds is not None]
+    retries = sum(job.metrics.fragment_retries + job.metrics.http_retries for job in jobs)
+    if not finished.is_set():
+        errors.append(f"timed out after {_LEVEL_TIMEOUT}s")
+        manager.shutdown()
+    shutil.rmtree(work, ignore_errors=True)
+    return {
+        "scenario":        spec["scenario"],
+        "concurrency":     spec["concurrency"],
+        "videos":          len(urls),
+        "done":            len(done),
+        "errors":          errors,
+        "extract_seconds": _mean(extract),
+        "ttfb_seconds":    _mean(ttfb),
+        "wall_seconds":    round(wall, 3),
+        "bytes":           total,
+        "throughput_bps":  round(total / wall, 1) if wall else None,
+        "merge_seconds":   _mean(merges),
+        "retries":         retries,
+        "peak_rss_bytes":  _peak_rss(),
+    }
+
+
+def _level(args: argparse.Namespace) -> int:
+    """--level: run one level from a JSON spec and print the result as JSON."""
+    print(json.dumps(run_level(json.loads(args.level))), flush=True)
+    return 0
+
+
+# =============================================================================
+#  Suite
+# =============================================================================
+def _start_server(args: argparse.Namespace, media: Path) -> tuple:
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", str(media),
+         "--latency", str(args.latency), "--bandwidth", str(args.bandwidth),
+         "--link", str(args.link)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    port = proc.stdout.readline().strip()
+    if not port.isdigit():
+        proc.kill()
+        raise RuntimeError("media server did not start")
+    return proc, f"http://127.0.0.1:{port}"
+
+
+def _run_isolated(spec: dict) -> dict:
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--level", json.dumps(spec)],
+        capture_output=True, text=True, timeout=_LEVEL_TIMEOUT + 60,
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        tail = proc.stderr.strip().splitlines()[-1:] or [f"exit code {proc.returncode}"]
+        return {"scenario": spec["scenario"], "concurrency": spec["concurrency"],
+                "videos": spec["videos"], "done": 0, "errors": tail}
+    return json.loads(lines[-1])
+
+
+def _fmt(value: Optional[float], unit: str = "s") -> str:
+    return "-" if value is None else f"{value:.2f}{unit}"
+
+
+def _print_table(results: List[dict], stream=sys.stdout) -> None:
+    header = f"{'scenario':<12} {'conc':>4} {'ok':>5} {'extract':>8} {'ttfb':>7} " \
+             f"{'wall':>8} {'throughput':>12} {'merge':>7} {'retries':>7} {'peak RSS':>10}"
+    print(header, file=stream)
+    print("-" * len(header), file=stream)
+    for r in results:
+        speed = r.get("throughput_bps")
+        rss   = r.get("peak_rss_bytes")
+        print(
+            f"{r['scenario']:<12} {r['concurrency']:>4} {r['done']:>2}/{r['videos']:<2} "
+            f"{_fmt(r.get('extract_seconds')):>8} {_fmt(r.get('ttfb_seconds')):>7} "
+            f"{_fmt(r.get('wall_seconds')):>8} "
+            f"{(_filesize_str(speed) + '/s') if speed else '-':>12} "
+            f"{_fmt(r.get('merge_seconds')):>7} {r.get('retries', 0):>7} "
+            f"{_filesize_str(rss) if rss else '-':>10}",
+            file=stream,
+        )
+        for err in r.get("errors", [])[:3]:
+            print(f"    ! {err}", file=stream)
+
+
+def run_suite(args: argparse.Namespace) -> int:
+    media = Path(args.media_dir) if args.media_dir else Path(tempfile.gettempdir()) / "ytbench-media"
+    print(f"Preparing media in {media} ...", file=sys.stderr)
+    available = generate_media(media, args.duration, args.bitrate)
+    scenarios = [s for s in args.scenarios if s in available]
+    for skipped in sorted(set(args.scenarios) - set(available)):
+        print(f"Skipping {skipped}: needs FFmpeg to build the media.", file=sys.stderr)
+
+    server, base = _start_server(args, media)
+    work    = tempfile.mkdtemp(prefix="ytbench-")
+    results = []
+    try:
+        for scenario in scenarios:
+            size = _media_size(media, scenario)
+            for concurrency in args.concurrency:
+                print(f"{scenario} x{args.videos} ({_filesize_str(size)} each), "
+                      f"concurrency {concurrency} ...", file=sys.stderr)
+                results.append(_run_isolated({
+                    "scenario":    scenario,
+                    "url":         f"{base}/{_ENTRY[scenario]}",
+                    "videos":      args.videos,
+                    "concurrency": concurrency,
+                    "connections": args.connections,
+                    "isolated":    args.isolated,
+                    "work":        work,
+                }))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(work, ignore_errors=True)
+
+    _print_table(results)
+    if args.json:
+        report = {
+            "settings": {
+                "duration": args.duration, "bitrate": args.bitrate, "videos": args.videos,
+                "latency_ms": args.latency, "bandwidth": args.bandwidth, "link": args.link,
+                "connections": args.connections, "isolated": args.isolated,
+            },
+            "ytdlp_version": _ytdlp_version(),
+            "results": results,
+        }
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0 if all(r["done"] == r["videos"] for r in results) else 1
+
+
+# =============================================================================
+#  Entry point
+# =============================================================================
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ytbench",
+        description="Offline benchmark of the download engine against a local media server.",
+    )
+    parser.add_argument(
+        "-j", "--concurrency", default=[1, 2, 4],
+        type=lambda text: [int(n) for n in text.split(",") if n.strip()],
+        help="comma-separated worker counts to measure (default: 1,2,4)",
+    )
+    parser.add_argument(
+        "--scenarios", default=list(SCENARIOS),
+        type=lambda text: [s.strip() for s in text.split(",") if s.strip()],
+        help="comma-separated subset of: " + ", ".join(SCENARIOS),
+    )
+    parser.add_argument("--videos", type=int, default=4, help="downloads per level (default: 4)")
+    parser.add_argument(
+        "-c", "--connections", type=int, default=0, metavar="N",
+        help="connections per download, 0 adapts to throughput (default: 0)",
+    )
+    parser.add_argument(
+        "--isolated", action="store_true",
+        help="run yt-dlp in the engine's worker processes instead of threads",
+    )
+    parser.add_argument("--duration", type=int, default=20, help="media length in seconds (default: 20)")
+    parser.add_argument(
+        "--bitrate", type=_parse_rate, default=4 * 1024 ** 2, metavar="BITS",
+        help="video bitrate in bits/s, e.g. 4M (default: 4M, about 10 MB per file)",
+    )
+    parser.add_argument("--latency", type=float, default=20, metavar="MS",
+                        help="delay before every response (default: 20)")
+    parser.add_argument(
+        "--bandwidth", type=_parse_rate, default=2 * 1024 ** 2, metavar="RATE",
+        help="bytes/s per connection, 0 = unlimited (default: 2M)",
+    )
+    parser.add_argument(
+        "--link", type=_parse_rate, default=0, metavar="RATE",
+        help="bytes/s for all connections together, 0 = unlimited (default: 0)",
+    )
+    parser.add_argument("--media-dir", metavar="DIR", help="where generated media is kept between runs")
+    parser.add_argument("--json", metavar="FILE", help="also write the results as JSON")
+    # Internal: the server and each level run in their own processes
+    parser.add_argument("--serve", metavar="DIR", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--level", metavar="SPEC", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = _build_parser()
+    args   = parser.parse_args(argv)
+    if args.serve:
+        return _serve(args)
+    if args.level:
+        return _level(args)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    if not args.concurrency or min(args.concurrency) < 1:
+        parser.error("--concurrency needs positive worker counts")
+    return run_suite(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+"""
+YT-DLP Downloader  —  headless CLI / batch mode
+================================================
+Runs the same DownloadManager, format list and selector tiers as the GUI,
+without importing tkinter / customtkinter.  Works over SSH, from cron and
+on machines with no display.
+
+Usage:
+    python ytcli.py URL [URL ...] [-o DIR] [-j N] [--max-height 1080] [--max-fps 30]
+    python ytcli.py URL [URL ...] --preset 1080p-h264
+    python ytcli.py -a urls.txt
+    cat urls.txt | python ytcli.py -a -
+    python ytcli.py --resume
+
+Batch files hold one URL per line; blank lines and lines starting with
+'#' or ';' are ignored.  A line may name a quality preset after the URL
+("URL 720p") that overrides --preset for it.  Playlist and channel URLs
+are expanded lazily: entries are resolved one at a time and queued as
+workers free up.
+With a preset (--list-presets shows them) a video is queued straight from
+its URL and extracted only once, by its download, instead of listing its
+formats first.
+Before a download writes anything, its projected size is checked against
+the free space of every folder involved; a job that cannot fit fails with
+a clear error, one that only lacks space other jobs reserved waits.
+--scratch-dir keeps streams, fragments and merging off a slow output
+volume; each finished file is then moved (or copied and renamed) into -o.
+--isolated runs yt-dlp in separate worker processes, so Ctrl+C stops
+running extractions and downloads at once.
+--resume re-queues downloads a previous run (GUI or CLI) left unfinished;
+they continue from their partial files.  Videos already in the download
+archive (shared with the GUI) are skipped before any network traffic as
+long as their file is still on disk; --force downloads them again.
+Each finished file gets a '<file>.manifest.json' sidecar with its SHA-256,
+formats and sizes; a file identical to one already downloaded (into any
+folder on the same volume) is hardlinked to it, unless --no-hardlinks.
+Transient failures are retried with exponential backoff; a site that
+starts throttling (HTTP 429) pauses every job headed to it for a while.
+Per-job timings (extraction, time to first byte, throughput, retries,
+merge) are appended to <metrics dir>/jobs.jsonl and summed into
+ytdownload.prom for node_exporter's textfile collector.
+
+Output is one JSON object per line on stdout, e.g.
+    {"event": "progress", "ts": 1700000000.0, "job": 3, "url": "...", "pct": 42, "label": "..."}
+Events: queued, resumed, skipped, expanded, status, progress, done, error,
+interrupted, summary.
+
+Exit codes:
+    0    every URL downloaded (or was already in the archive)
+    1    at least one URL failed
+    2    usage error (bad arguments, no URLs, unreadable batch file)
+    130  interrupted (Ctrl+C); running jobs are cancelled
+"""
+
+# == Standard library =========================================================
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Tuple
+
+# == Local ====================================================================
+from ytcore import (
+    CONNECTIONS_AUTO, DEFAULT_WORKERS, JOB_DONE, MAX_CONNECTIONS, MAX_WORKERS, QUALITY_PRESETS,
+    DownloadJob, DownloadManager, FetchError, MetricsRecorder, ProgressChannel, QualityPreset,
+    _choose_format, _is_playlist_url, warm_imports, yt_dlp,
+)
+
+
+EXIT_OK          = 0
+EXIT_FAILED      = 1
+EXIT_USAGE       = 2
+EXIT_INTERRUPTED = 130
+
+
+# =============================================================================
+#  Output
+# =============================================================================
+class _Emitter:
+    """Thread-safe JSON-lines writer (one event per line, flushed)."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self._stream = stream
+        self._lock   = threading.Lock()
+
+    def emit(self, event: str, **fields) -> None:
+        line = json.dumps({"event": event, "ts": round(time.time(), 3), **fields})
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+
+# =============================================================================
+#  Input
+# =============================================================================
+def _read_batch(path: str) -> List[str]:
+    """Read URLs from a batch file, or from stdin when path is '-'."""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
+    return [
+        line.strip() for line in lines
+        if line.strip() and not line.lstrip().startswith(("#", ";"))
+    ]
+
+
+def _split_presets(
+    lines: List[str], default: Optional[str],
+) -> List[Tuple[str, Optional[QualityPreset]]]:
+    """
+    'URL [PRESET]' lines -> (url, preset); lines without a preset get
+    `default`.  Raises ValueError naming the first unknown preset.
+    """
+    pairs = []
+    for line in lines:
+        url, _, name = line.strip().partition(" ")
+        name = name.strip() or default
+        if name is not None and name not in QUALITY_PRESETS:
+            raise ValueError(f"unknown preset {name!r} (see --list-presets)")
+        pairs.append((url, QUALITY_PRESETS[name] if name else None))
+    return pairs
+
+
+_RATE_RE = re.compile(r"^(\d+(?:\.\d+)?)([kMGTPEZY]?)$", re.IGNORECASE)
+
+
+def _parse_rate(text: str) -> float:
+    """
+    '5M' / '800K' / '1000000' -> bytes per second (same syntax as yt-dlp's
+    parse_bytes, without importing yt-dlp before the arguments are parsed).
+    """
+    match = _RATE_RE.match(text.strip())
+    if match is None:
+        raise argparse.ArgumentTypeError(f"invalid rate: {text!r}")
+    number, unit = match.groups()
+    return float(number) * 1024 ** "BKMGTPEZY".index(unit.upper() or "B")
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ytcli",
+        description="Headless batch downloader (same engine as the GUI).",
+    )
+    parser.add_argument("urls", nargs="*", metavar="URL", help="video URLs to download")
+    parser.add_argument(
+        "-a", "--batch-file", metavar="FILE",
+        help="read URLs from FILE, one per line ('-' for stdin)",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default=str(Path.home() / "Downloads"),
+        help="destination folder (default: ~/Downloads)",
+    )
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=DEFAULT_WORKERS,
+        help=f"parallel downloads, 1-{MAX_WORKERS} (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "-c", "--connections", type=int, default=CONNECTIONS_AUTO, metavar="N",
+        help=f"connections per download, 1-{MAX_CONNECTIONS}; 0 adapts to throughput (default: 0)",
+    )
+    parser.add_argument(
+        "-r", "--limit-rate", type=_parse_rate, default=0, metavar="RATE",
+        help="total bandwidth cap shared by all downloads, e.g. 5M or 800K bytes/s",
+    )
+    parser.add_argument(
+        "--job-limit-rate", type=_parse_rate, default=0, metavar="RATE",
+        help="bandwidth cap for each single download, e.g. 2M",
+    )
+    parser.add_argument("--max-height", type=int, help="highest video height to pick, e.g. 1080")
+    parser.add_argument("--max-fps", type=int, help="highest frame rate to pick, e.g. 30")
+    parser.add_argument(
+        "-p", "--preset", choices=list(QUALITY_PRESETS), metavar="NAME",
+        help="quality preset; queues each video without listing its formats first",
+    )
+    parser.add_argument("--list-presets", action="store_true", help="show the quality presets and exit")
+    parser.add_argument(
+        "--progress-interval", type=float, default=1.0, metavar="SECONDS",
+        help="seconds between progress events per job (default: 1.0)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="ignore the format cache")
+    parser.add_argument(
+        "--force", action="store_true",
+        help="download videos even if the archive says they were downloaded before",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="also re-queue downloads left unfinished by an earlier run",
+    )
+    parser.add_argument(
+        "--scratch-dir", metavar="DIR",
+        help="download and merge on this (fast, local) folder, then move into --output-dir",
+    )
+    parser.add_argument(
+        "--no-hardlinks", action="store_true",
+        help="store duplicate files again instead of hardlinking them to an existing copy",
+    )
+    parser.add_argument(
+        "--isolated", action="store_true",
+        help="run yt-dlp in worker processes (hard cancellation, no GIL contention)",
+    )
+    parser.add_argument(
+        "--metrics-dir", metavar="DIR",
+        help="write jobs.jsonl and ytdownload.prom here (default: the app data folder)",
+    )
+    return parser
+
+
+# =============================================================================
+#  Batch runner
+# =============================================================================
+class BatchRunner:
+    """
+    Resolve each URL to a format under the quality policy, queue it on a
+    DownloadManager and report everything through an _Emitter.
+    """
+
+    def __init__(self, args: argparse.Namespace, emitter: _Emitter) -> None:
+        self._args     = args
+        self._emit     = emitter.emit
+        self._manager  = DownloadManager(
+            max_workers=args.concurrency, connections=args.connections,
+            rate_limit=args.limit_rate,
+            metrics=MetricsRecorder(Path(args.metrics_dir)) if args.metrics_dir else None,
+            isolated=args.isolated, scratch_dir=args.scratch_dir,
+            dedupe=not args.no_hardlinks,
+        )
+        self._progress = ProgressChannel()
+        self._urls:    Dict[int, str] = {}
+        self._errors   = 0          # URLs / entries that never became a job
+        self._skipped  = 0          # URLs / entries already in the archive
+        self._lock     = threading.Lock()
+
+    def _bind_job(self, job: DownloadJob) -> None:
+        """Route a job's callbacks to the progress channel / emitter."""
+        jid, url = job.id, job.url
+        job.on_progress = lambda p, l: self._progress.publish(jid, p, l)
+        job.on_status   = lambda m, c=None: self._emit("status", job=jid, url=url, message=m)
+        job.on_done     = lambda: self._on_done(job)
+        job.on_error    = lambda m: self._emit("error", job=jid, url=url, message=m)
+        self._urls[jid] = url
+
+    def _on_done(self, job: DownloadJob) -> None:
+        self._progress.discard(job.id)      # no stale "progress" after "done"
+        self._emit(
+            "done", job=job.id, url=job.url, output_dir=job.output_dir, path=job.final_path,
+            merge_mode=job.merge_mode, merge_seconds=job.merge_seconds, sha256=job.sha256,
+        )
+
+    def _error(self, url: str, message: str) -> None:
+        with self._lock:
+            self._errors += 1
+        self._emit("error", url=url, message=message)
+
+    def _skip(self, url: str, record: dict) -> None:
+        with self._lock:
+            self._skipped += 1
+        self._emit("skipped", url=url, path=record.get("path"), reason="already downloaded")
+
+    def _resolve(self, url: str, preset: Optional[QualityPreset]) -> None:
+        """Resolve one URL on the pool; any crash counts as a failed URL."""
+        try:
+            self._queue_url(url, preset)
+        except Exception as exc:
+            self._error(url, f"Unexpected error: {exc}")
+
+    def _queue_url(self, url: str, preset: Optional[QualityPreset]) -> None:
+        """
+        Extract formats for one URL (or every playlist entry) and queue jobs.
+        With a preset, jobs are queued straight away and extracted by their
+        download instead.
+        """
+        args = self._args
+        bind = self._bind_queued if preset is None else (
+            lambda job: self._bind_queued(job, preset.name)
+        )
+        if _is_playlist_url(url):
+            try:
+                count = self._manager.queue_playlist(
+                    url, args.output_dir,
+                    bind=bind,
+                    on_error=lambda msg: self._error(url, msg),
+                    max_height=args.max_height, max_fps=args.max_fps,
+                    use_cache=not args.no_cache,
+                    skip_archived=not args.force,
+                    on_skip=lambda entry, record: self._skip(entry["url"], record),
+                    preset=preset,
+                )
+                self._emit("expanded", url=url, entries=count)
+            except (FetchError, yt_dlp.utils.DownloadError) as exc:
+                self._error(url, str(exc))
+            return
+
+        record = None if args.force else self._manager.archive.verified(url)
+        if record is not None:
+            self._skip(url, record)
+            return
+
+        if preset is not None:
+            self._manager.download_preset(
+                url, preset, args.output_dir, bind=bind, use_cache=not args.no_cache,
+            )
+            return
+
+        try:
+            formats, info = self._manager.extract_formats(url, use_cache=not args.no_cache)
+        except (FetchError, yt_dlp.utils.DownloadError) as exc:
+            self._error(url, str(exc))
+            return
+
+        format_id, height, label = _choose_format(formats, args.max_height, args.max_fps)
+        job = DownloadJob(
+            url, format_id, height, args.output_dir,
+            title=info.get("title", ""), rate_limit=args.job_limit_rate,
+        )
+        self._bind_job(job)
+        self._manager.submit(job)
+        self._emit("queued", job=job.id, url=url, title=job.title, format=label)
+
+    def _bind_queued(self, job: DownloadJob, preset: Optional[str] = None) -> None:
+        """bind() hook for playlist entries and preset jobs: attach callbacks, announce."""
+        job.rate_limit = self._args.job_limit_rate
+        self._bind_job(job)
+        self._emit("queued", job=job.id, url=job.url, title=job.title, format=preset or job.format_id)
+
+    def _flush_progress(self) -> None:
+        for job_id, (pct, label) in self._progress.drain().items():
+            self._emit("progress", job=job_id, url=self._urls.get(job_id), pct=pct, label=label)
+
+    def _bind_resumed(self, job: DownloadJob) -> None:
+        self._bind_job(job)
+        self._emit("resumed", job=job.id, url=job.url, title=job.title, format=job.format_id)
+
+    def run(self, urls: List[Tuple[str, Optional[QualityPreset]]]) -> int:
+        if self._args.resume:
+            self._manager.resume_interrupted(bind=self._bind_resumed)
+        warm_imports()      # pre-builds the download-side YoutubeDL while URLs resolve
+        pool = ThreadPoolExecutor(max_workers=self._args.concurrency)
+        futures = [pool.submit(self._resolve, url, preset) for url, preset in urls]
+        try:
+            while True:
+                time.sleep(self._args.progress_interval)
+                self._flush_progress()
+                if all(f.done() for f in futures) and not self._manager.active_jobs():
+                    break
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._emit("interrupted")
+            return EXIT_INTERRUPTED
+        pool.shutdown()
+
+        self._flush_progress()
+        jobs   = self._manager.jobs()
+        done   = sum(1 for job in jobs if job.state == JOB_DONE)
+        failed = len(jobs) - done + self._errors
+        self._emit(
+            "summary", total=done + failed + self._skipped,
+            done=done, failed=failed, skipped=self._skipped,
+        )
+        return EXIT_OK if failed == 0 else EXIT_FAILED
+
+
+# =============================================================================
+#  Entry point
+# =============================================================================
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = _build_parser()
+    args   = parser.parse_args(argv)
+
+    if args.list_presets:
+        for preset in QUALITY_PRESETS.values():
+            print(f"{preset.name:<12} {preset.label}")
+        return EXIT_OK
+
+    lines = list(args.urls)
+    if args.batch_file:
+        try:
+            lines.extend(_read_batch(args.batch_file))
+        except OSError as exc:
+            parser.error(f"cannot read batch file: {exc}")
+    try:
+        urls = _split_presets(lines, args.preset)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if not urls and not args.resume:
+        parser.error("no URLs given (pass them as arguments, with -a FILE or --resume)")
+    if not 1 <= args.concurrency <= MAX_WORKERS:
+        parser.error(f"--concurrency must be between 1 and {MAX_WORKERS}")
+    if not 0 <= args.connections <= MAX_CONNECTIONS:
+        parser.error(f"--connections must be between 0 and {MAX_CONNECTIONS}")
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    return BatchRunner(args, _Emitter(sys.stdout)).run(urls)
+
+
+if __name__ == "__main__":
+    # --isolated workers are spawned processes; a frozen build must route them here
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    sys.exit(main())
@@ -0,0 +1,4385 @@
+"""
+YT-DLP Downloader core  —  engine shared by the GUI and the CLI
+================================================================
+Everything that talks to yt-dlp lives here: FFmpeg detection, format
+helpers, the metadata cache, download jobs and the DownloadManager
+worker pool.
+
+This module must NOT import tkinter / customtkinter, so headless entry
+points (ytcli.py) start fast and run on machines without a display.
+Heavy third-party modules (yt_dlp, Pillow, requests) are imported on
+first use, and FFmpeg detection runs in the background, so importing
+this module costs only a few milliseconds.
+"""
+
+# == Standard library =========================================================
+import contextlib
+import errno
+import glob
+import hashlib
+import importlib
+import importlib.util
+import itertools
+import json
+import os
+import queue
+import random
+import re
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# == Third-party (imported lazily) ===========================================
+class _LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+    yt_dlp loads its whole extractor registry on import, which would
+    otherwise hold up the GUI's first paint by a few hundred ms.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name   = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+yt_dlp   = _LazyModule("yt_dlp")
+Image    = _LazyModule("PIL.Image")      # optional: thumbnail previews only
+requests = _LazyModule("requests")       # optional: thumbnail previews only
+
+# stdlib HTTP is only needed once a ranged transfer starts (~25 ms to import)
+http_client    = _LazyModule("http.client")
+urllib_request = _LazyModule("urllib.request")
+THUMBNAILS_AVAILABLE = all(importlib.util.find_spec(n) for n in ("PIL", "requests"))
+
+
+def warm_imports(
+    on_done:  Optional[Callable[[], None]] = None,
+    on_warm:  Optional[Callable[[], None]] = None,
+) -> None:
+    """
+    Import yt_dlp (and the thumbnail modules) on a background thread, call
+    on_done(), then pre-build the pooled YoutubeDL instances (see
+    YoutubeDLPool.warm) and call on_warm().
+    """
+    def _warm() -> None:
+        try:
+            yt_dlp.YoutubeDL
+            if THUMBNAILS_AVAILABLE:
+                Image.open
+                requests.Session
+        finally:
+            if on_done is not None:
+                on_done()
+        try:
+            _ydl_pool.warm()
+        finally:
+            if on_warm is not None:
+                on_warm()
+    threading.Thread(target=_warm, name="warm-imports", daemon=True).start()
+
+
+# =============================================================================
+#  Shared constants
+# =============================================================================
+# Status colours travel with on_status(msg, color) callbacks; headless
+# front-ends simply ignore them.
+ACCENT     = "#3B82F6"
+SUCCESS    = "#22C55E"
+ERROR      = "#EF4444"
+WARNING    = "#F59E0B"
+
+
+def _app_data_dir() -> Path:
+    """Per-user folder for caches and state (created lazily on first write)."""
+    base = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or str(Path.home() / ".cache")
+    )
+    return Path(base) / "ytdownload"
+
+
+APP_DATA_DIR = _app_data_dir()
+
+
+# =============================================================================
+#  FFmpeg detection
+# =============================================================================
+_FFMPEG_CANDIDATES: List[str] = [
+    str(Path(sys.executable).parent / "ffmpeg.exe"),  # next to python.exe
+    str(Path(__file__).parent       / "ffmpeg.exe"),  # next to this script (easiest)
+    r"C:\ffmpeg\bin\ffmpeg.exe",
+    r"C:\Program Files\ffmpeg\bin\ffmpeg.exe",
+    r"C:\Program Files (x86)\ffmpeg\bin\ffmpeg.exe",
+    str(Path.home() / "ffmpeg"           / "bin" / "ffmpeg.exe"),
+    str(Path.home() / "Downloads/ffmpeg" / "bin" / "ffmpeg.exe"),
+]
+
+
+_FFMPEG_CACHE = APP_DATA_DIR / "ffmpeg.json"
+
+
+def _find_ffmpeg() -> Optional[str]:
+    """
+    Return the absolute path to ffmpeg, or None if not found.
+    Search order: system PATH first, then common Windows directories.
+    """
+    found = shutil.which("ffmpeg")   # returns full path or None
+    if found:
+        return found
+    for candidate in _FFMPEG_CANDIDATES:
+        if Path(candidate).exists():
+            return candidate
+    return None
+
+
+def _cached_ffmpeg() -> Optional[str]:
+    """Path found by an earlier run, if that file is still there."""
+    try:
+        with open(_FFMPEG_CACHE, "r", encoding="utf-8") as fh:
+            path = json.load(fh).get("path")
+    except (OSError, ValueError, AttributeError):
+        return None
+    return path if path and os.path.isfile(path) else None
+
+
+def _remember_ffmpeg(path: str) -> None:
+    try:
+        APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+        with open(_FFMPEG_CACHE, "w", encoding="utf-8") as fh:
+            json.dump({"path": path}, fh)
+    except OSError:
+        pass
+
+
+class _FFmpegLocator:
+    """
+    Resolves the FFmpeg path once per process on a background thread.
+    The path found is remembered between runs and re-checked with a single
+    isfile(); a miss is never cached, so installing FFmpeg later is noticed.
+    """
+
+    def __init__(self) -> None:
+        self._lock    = threading.Lock()
+        self._ready   = threading.Event()
+        self._started = False
+        self._path:   Optional[str] = None
+
+    def start(self) -> None:
+        """Begin detection in the background (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._detect, name="ffmpeg-detect", daemon=True).start()
+
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def path(self) -> Optional[str]:
+        """The FFmpeg executable, waiting for detection if it is still running."""
+        self.start()
+        self._ready.wait()
+        return self._path
+
+    def _detect(self) -> None:
+        path = _cached_ffmpeg()
+        if path is None:
+            path = _find_ffmpeg()
+            if path:
+                _remember_ffmpeg(path)
+        self._path = path
+        self._ready.set()
+
+
+_ffmpeg = _FFmpegLocator()
+detect_ffmpeg = _ffmpeg.start     # call early; the GUI polls ffmpeg_ready()
+ffmpeg_ready  = _ffmpeg.ready
+ffmpeg_path   = _ffmpeg.path      # blocking accessor for download / merge code
+
+
+# =============================================================================
+#  Startup timing
+# =============================================================================
+class StartupTimer:
+    """
+    Milestones in ms since `origin` (a time.perf_counter() value taken as
+    early as possible by the entry point), for catching startup regressions.
+    """
+
+    def __init__(self, origin: Optional[float] = None) -> None:
+        self._origin = origin if origin is not None else time.perf_counter()
+        self._marks: Dict[str, float] = {}
+        self._lock   = threading.Lock()
+
+    def mark(self, name: str) -> None:
+        with self._lock:
+            self._marks.setdefault(name, round((time.perf_counter() - self._origin) * 1000, 1))
+
+    def has(self, *names: str) -> bool:
+        with self._lock:
+            return all(n in self._marks for n in names)
+
+    def report(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(sorted(self._marks.items(), key=lambda kv: kv[1]))
+
+
+# =============================================================================
+#  Format helpers
+# =============================================================================
+def _filesize_str(size_bytes: Optional[float]) -> str:
+    """Convert bytes to a human-readable string."""
+    if size_bytes is None:
+        return "~"
+    for unit in ("B", "KB", "MB", "GB"):
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.1f} TB"
+
+
+def _build_format_label(fmt: dict) -> Optional[str]:
+    """
+    Return a display label for one yt-dlp format entry.
+    Returns None for audio-only streams (they are skipped in the dropdown).
+    """
+    vcodec = fmt.get("vcodec") or "none"
+    if vcodec == "none":
+        return None                          # skip audio-only streams
+
+    res     = fmt.get("resolution") or f"{fmt.get('width','?')}x{fmt.get('height','?')}"
+    ext     = fmt.get("ext", "?")
+    fps     = fmt.get("fps") or ""
+    size    = _filesize_str(fmt.get("filesize") or fmt.get("filesize_approx"))
+    fps_str = f"  {fps}fps" if fps else ""
+
+    return f"{res}{fps_str}  |  {ext.upper()}  |  {vcodec}  |  ~{size}"
+
+
+class FormatRecord:
+    """
+    One entry of the format dropdown.  Only what the UI and the format
+    choice need; the raw yt-dlp format dict is not kept.
+    """
+
+    __slots__ = ("label", "format_id", "height", "fps", "ext", "vcodec")
+
+    def __init__(
+        self,
+        label:     str,
+        format_id: str,
+        height:    int = 0,
+        fps:       float = 0,
+        ext:       str = "",
+        vcodec:    str = "",
+    ) -> None:
+        self.label     = label
+        self.format_id = format_id
+        self.height    = height
+        self.fps       = fps
+        self.ext       = ext
+        self.vcodec    = vcodec
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FormatRecord":
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+
+
+def _collect_formats(info: dict) -> List[FormatRecord]:
+    """
+    Reduce an extract_info() result to the dropdown list: one video format
+    per (height, fps), best first.
+    """
+    formats: List[FormatRecord] = []
+    seen: set = set()
+
+    for fmt in info.get("formats", []):
+        label = _build_format_label(fmt)
+        if label is None:
+            continue
+        # Deduplicate by (height, fps)
+        key = (fmt.get("height"), fmt.get("fps"))
+        if key in seen:
+            continue
+        seen.add(key)
+        formats.append(FormatRecord(
+            label, fmt["format_id"],
+            height = fmt.get("height") or 0,
+            fps    = fmt.get("fps")    or 0,
+            ext    = fmt.get("ext", ""),
+            vcodec = fmt.get("vcodec", ""),
+        ))
+
+    formats.sort(key=lambda f: (f.height, f.fps), reverse=True)
+    return formats
+
+
+# Info-dict keys format selection and downloading never read.  Subtitle and
+# caption tables alone run to thousands of entries on YouTube.
+_BULKY_INFO_KEYS = ("thumbnails", "subtitles", "automatic_captions", "heatmap", "description")
+
+
+def _slim_info(info: dict) -> dict:
+    """
+    Shallow copy of an info dict fit to keep for re-use by a download:
+    bulky keys dropped, storyboard pseudo-formats (no video, no audio)
+    removed.  The summary fields (title, thumbnail, ...) stay.
+    """
+    slim = {key: value for key, value in info.items() if key not in _BULKY_INFO_KEYS}
+    if "formats" in info:
+        slim["formats"] = [
+            fmt for fmt in info["formats"]
+            if (fmt.get("vcodec") or "") != "none" or (fmt.get("acodec") or "") != "none"
+        ]
+    return slim
+
+
+def _build_format_selector(format_id: str, height: int) -> str:
+    """
+    Build the tiered yt-dlp format selector for one chosen video format.
+
+    Tiers (first match wins):
+      1. <id>+bestaudio[ext=m4a]   -- video + AAC audio  (ideal for MP4)
+      2. <id>+bestaudio[ext=webm]  -- video + Opus audio
+      3. <id>+bestaudio            -- video + any best audio
+      4. best[height<=N][ext=mp4]  -- fallback: pre-muxed MP4
+      5. best[height<=N]           -- last resort: any muxed stream
+
+    The height filters use `<=?` so streams of unknown height (direct file
+    links, bare HLS media playlists) still qualify for the fallbacks.
+
+    `format_id` may also be several video selectors joined by "/" (see
+    QualityPreset.video_selector); each one gets tiers 1-3 in turn.
+    """
+    h     = height or 9999
+    tiers = []
+    for video in format_id.split("/"):
+        tiers += [
+            f"{video}+bestaudio[ext=m4a]",
+            f"{video}+bestaudio[ext=webm]",
+            f"{video}+bestaudio",
+        ]
+    tiers += [f"best[height<=?{h}][ext=mp4]", f"best[height<=?{h}]"]
+    return "/".join(tiers)
+
+
+# =============================================================================
+#  Merge strategy
+# =============================================================================
+MERGE_COPY      = "copy"        # audio stream-copied into the MP4
+MERGE_TRANSCODE = "transcode"   # audio re-encoded to AAC 192k
+
+# Audio codecs an MP4 container carries natively (matched by prefix)
+_MP4_AUDIO_CODECS = ("mp4a", "aac", "mp3", "ac-3", "ec-3", "alac")
+
+
+def _is_mp4_audio(fmt: dict) -> bool:
+    acodec = (fmt.get("acodec") or "").lower()
+    if acodec and acodec != "none":
+        return acodec.startswith(_MP4_AUDIO_CODECS)
+    return fmt.get("ext") in ("m4a", "mp4")     # codec unknown: trust the container
+
+
+def _merge_args(requested_formats: List[Dict]) -> Tuple[str, List[str]]:
+    """
+    Choose the merge path for the formats yt-dlp actually selected.
+    Video is always stream-copied; audio is copied when every selected audio
+    stream is already MP4-compatible (e.g. tier 1, bestaudio[ext=m4a]) and
+    re-encoded to AAC 192k otherwise (e.g. Opus from tier 2).
+    """
+    audio = [f for f in requested_formats if (f.get("acodec") or "none") != "none"
+             or (f.get("vcodec") or "none") == "none"]
+    if audio and all(_is_mp4_audio(f) for f in audio):
+        return MERGE_COPY, ["-c:v", "copy", "-c:a", "copy"]
+    return MERGE_TRANSCODE, ["-c:v", "copy", "-c:a", "aac", "-b:a", "192k"]
+
+
+# Format fields the merge stage reads; fragment lists and headers stay behind
+_MERGE_FIELDS = ("format_id", "ext", "vcodec", "acodec", "protocol")
+
+
+def _merge_fields(fmt: dict) -> dict:
+    return {key: fmt.get(key) for key in _MERGE_FIELDS}
+
+
+MERGE_WORKERS = os.cpu_count() or 2      # concurrent merges (one per core)
+
+
+def _ffmpeg_thread_budget(merge_workers: int) -> int:
+    """ffmpeg -threads per merge so concurrent merges never exceed the core count."""
+    return max(1, (os.cpu_count() or 1) // max(1, merge_workers))
+
+
+def _merge_temp_path(output: str) -> str:
+    """Where ffmpeg writes `output` until the merge succeeds."""
+    return os.path.splitext(output)[0] + ".temp.mp4"
+
+
+def _run_ffmpeg_merge(
+    job:        "DownloadJob",
+    inputs:     List[Tuple[dict, str]],
+    output:     str,
+    codec_args: List[str],
+    threads:    int,
+    digest=None,
+) -> bool:
+    """
+    Mux downloaded streams into `output` with ffmpeg (blocking).
+    Writes to a .temp file first and renames on success; polls the job's
+    cancel token and kills ffmpeg if it is set.
+
+    The moov atom is moved to the front by _faststart rather than by
+    ffmpeg's +faststart, so the final bytes pass through `digest`
+    (hashlib) as they are written.  Returns True if they did.
+    """
+    ffmpeg = ffmpeg_path()
+    if not ffmpeg:
+        raise yt_dlp.utils.DownloadError("FFmpeg not found - cannot merge video + audio.")
+
+    temp = _merge_temp_path(output)
+    cmd  = [ffmpeg, "-y", "-nostdin", "-loglevel", "error"]
+    for _, path in inputs:
+        cmd += ["-threads", str(threads), "-i", path]
+    for i, (fmt, _) in enumerate(inputs):
+        if (fmt.get("vcodec") or "none") != "none":
+            cmd += ["-map", f"{i}:v:0"]
+        if (fmt.get("acodec") or "none") != "none" or (fmt.get("vcodec") or "none") == "none":
+            cmd += ["-map", f"{i}:a:0"]
+    cmd += codec_args
+    # HLS audio is ADTS-framed AAC; MP4 needs the bitstream filter when copying
+    if "-c:a" in codec_args and codec_args[codec_args.index("-c:a") + 1] == "copy" and any(
+        (fmt.get("protocol") or "").startswith("m3u8") for fmt, _ in inputs
+    ):
+        cmd += ["-bsf:a", "aac_adtstoasc"]
+    cmd += ["-threads", str(threads), temp]
+
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),   # no console flash on Windows
+    )
+    while True:
+        try:
+            _, err = proc.communicate(timeout=0.25)
+            break
+        except subprocess.TimeoutExpired:
+            if job.cancelled:
+                proc.kill()
+                proc.communicate()
+                _remove_quietly(temp)
+                raise yt_dlp.utils.DownloadError("Cancelled by user.")
+
+    if proc.returncode != 0:
+        _remove_quietly(temp)
+        tail = err.decode("utf-8", "replace").strip().splitlines()[-5:]
+        raise yt_dlp.utils.DownloadError("ffmpeg exited with code "
+                                         f"{proc.returncode}:\n" + "\n".join(tail))
+    try:
+        hashed = _faststart(temp, digest or hashlib.sha256(), lambda: job.cancelled)
+    except BaseException:
+        _remove_quietly(temp)
+        raise
+    os.replace(temp, output)
+    return hashed and digest is not None
+
+
+_MP4_CONTAINERS = (b"moov", b"trak", b"mdia", b"minf", b"stbl")
+
+
+def _atom_header(buf, pos: int, end: int) -> Tuple[bytes, int, int]:
+    """(type, size, header size) of the MP4 atom at buf[pos:] inside a parent ending at `end`."""
+    size, kind = struct.unpack_from(">I4s", buf, pos)
+    header = 8
+    if size == 1:
+        size, header = struct.unpack_from(">Q", buf, pos + 8)[0], 16
+    elif size == 0:
+        size = end - pos        # runs to the end
+    if size < header or pos + size > end:
+        raise ValueError(f"bad {kind!r} atom at {pos}")
+    return kind, size, header
+
+
+def _mp4_atoms(buf, start: int, end: int) -> Iterator[Tuple[bytes, int, int, int]]:
+    """(type, offset, size, header size) of each atom in buf[start:end]."""
+    pos = start
+    while pos + 8 <= end:
+        kind, size, header = _atom_header(buf, pos, end)
+        yield kind, pos, size, header
+        pos += size
+
+
+def _pack_atom(kind: bytes, body: bytes, header: int = 8) -> bytes:
+    if header == 16 or 8 + len(body) > 0xFFFFFFFF:
+        return struct.pack(">I4sQ", 1, kind, 16 + len(body)) + body
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+
+def _shifted_atoms(buf: bytes, start: int, end: int, delta: int) -> bytes:
+    """
+    buf[start:end] with `delta` added to every stco / co64 chunk offset.
+    An stco table whose offsets no longer fit 32 bits becomes a co64 one,
+    as ffmpeg does, so enclosing atoms may grow.
+    """
+    out = []
+    for kind, pos, size, header in _mp4_atoms(buf, start, end):
+        if kind in _MP4_CONTAINERS:
+            body = _shifted_atoms(buf, pos + header, pos + size, delta)
+        elif kind in (b"stco", b"co64"):
+            table   = pos + header + 8      # after version/flags and entry count
+            count   = struct.unpack_from(">I", buf, table - 4)[0]
+            code    = "I" if kind == b"stco" else "Q"
+            offsets = [o + delta for o in struct.unpack_from(f">{count}{code}", buf, table)]
+            rest    = table + count * struct.calcsize(">" + code)
+            if code == "I" and offsets and max(offsets) > 0xFFFFFFFF:
+                kind, code = b"co64", "Q"
+            body = (
+                buf[pos + header:table]
+                + struct.pack(f">{count}{code}", *offsets)
+                + buf[rest:pos + size]
+            )
+        else:
+            out.append(buf[pos:pos + size])
+            continue
+        out.append(_pack_atom(kind, body, header))
+    return b"".join(out)
+
+
+def _relocated_moov(moov: bytes) -> bytes:
+    """
+    moov rewritten to sit in front of the media data it describes: every
+    chunk offset grows by the size of the new moov itself.  Upgrading an
+    stco table to co64 makes moov bigger, so repeat until its size settles.
+    """
+    _, size, header = _atom_header(moov, 0, len(moov))
+    moved = len(moov)
+    while True:
+        new = _pack_atom(b"moov", _shifted_atoms(moov, header, size, moved), header)
+        if len(new) == moved:
+            return new
+        moved = len(new)
+
+
+def _faststart(path: str, digest, cancelled: Callable[[], bool]) -> bool:
+    """
+    Move a trailing moov atom in front of the media data, in place, the
+    way ffmpeg's +faststart does: the data is shifted forward block by
+    block, and every byte written also goes to `digest`, so the file is
+    hashed without a read of its own.
+
+    Returns False, leaving the file untouched, if it is not laid out as
+    ffmpeg writes it (moov last, after mdat) or moov cannot be parsed; the
+    file is then valid but not hashed.
+    """
+    with open(path, "r+b") as fh:
+        end = os.fstat(fh.fileno()).st_size
+        top = []
+        pos = 0
+        while pos + 8 <= end:       # top-level atoms: read headers only
+            fh.seek(pos)
+            try:
+                kind, size, _ = _atom_header(fh.read(16), 0, end - pos)
+            except (ValueError, struct.error):
+                return False
+            top.append((kind, pos, size))
+            pos += size
+        if pos != end:
+            return False
+        kinds = [kind for kind, _, _ in top]
+        if kinds.count(b"moov") != 1 or kinds[-1] != b"moov" or b"mdat" not in kinds:
+            return False
+        _, moov_at, moov_size = top[-1]
+        # Right after ftyp, where ffmpeg puts it: the output is byte-identical
+        insert_at = top[0][2] if kinds[0] == b"ftyp" else top[kinds.index(b"mdat")][1]
+
+        fh.seek(moov_at)
+        try:
+            moov = _relocated_moov(fh.read(moov_size))
+        except (ValueError, struct.error):
+            return False
+
+        fh.seek(0)
+        digest.update(fh.read(insert_at))   # ftyp: a few dozen bytes
+        # Invariant: `pending` holds the bytes due at write_pos onwards, of
+        # which everything before read_pos has been read from the file already
+        pending  = moov         # may be larger than before (co64 tables)
+        read_pos = write_pos = insert_at
+        while read_pos < moov_at:
+            if cancelled():
+                raise yt_dlp.utils.DownloadError("Cancelled by user.")
+            fh.seek(read_pos)
+            block = fh.read(min(_HASH_BLOCK, moov_at - read_pos))
+            if not block:
+                break
+            read_pos += len(block)
+            pending  += block
+            ready, pending = pending[:read_pos - write_pos], pending[read_pos - write_pos:]
+            fh.seek(write_pos)
+            fh.write(ready)
+            digest.update(ready)
+            write_pos += len(ready)
+        fh.seek(write_pos)
+        fh.write(pending)
+        digest.update(pending)
+    return True
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _pick_format(
+    formats:    List[FormatRecord],
+    max_height: Optional[int] = None,
+    max_fps:    Optional[int] = None,
+) -> Optional[FormatRecord]:
+    """
+    Best entry of a _collect_formats() list within the height / fps caps,
+    or None if every format exceeds them.
+    """
+    for fmt in formats:     # already sorted best first
+        if max_height and fmt.height > max_height:
+            continue
+        if max_fps and fmt.fps > max_fps:
+            continue
+        return fmt
+    return None
+
+
+def _choose_format(
+    formats:    List[FormatRecord],
+    max_height: Optional[int] = None,
+    max_fps:    Optional[int] = None,
+) -> Tuple[str, int, str]:
+    """
+    Resolve a quality policy to (format_id, height, label) for a DownloadJob.
+    If no listed format fits the caps, fall back to a bestvideo[...] selector
+    and let yt-dlp pick within them.
+    """
+    fmt = _pick_format(formats, max_height, max_fps)
+    if fmt is not None:
+        return fmt.format_id, fmt.height, fmt.label
+    caps = QualityPreset("caps", max_height=max_height, max_fps=max_fps)
+    return caps.video_selector(), max_height or 0, "best available"
+
+
+# YouTube video IDs are 11 chars of [A-Za-z0-9_-]; covers watch, youtu.be,
+# shorts, embed, live and music URLs.
+_YT_ID_RE = re.compile(
+    r"(?:youtube(?:-nocookie)?\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)"
+    r"|youtu\.be/)([A-Za-z0-9_-]{11})"
+)
+
+
+# Playlist / channel pages (only when the URL does not name a single video)
+_YT_LIST_RE = re.compile(
+    r"youtube\.com/(?:playlist\?|channel/|c/|user/|@[^/?#]+)|[?&]list="
+)
+
+
+def _is_playlist_url(url: str) -> bool:
+    """
+    Cheap, offline check for playlist / channel URLs.
+    A URL that names a specific video (watch?v=...&list=...) counts as a video.
+    """
+    return not _YT_ID_RE.search(url) and bool(_YT_LIST_RE.search(url))
+
+
+# One http(s) URL with a dotted host (or localhost) and nothing else
+_FETCHABLE_URL_RE = re.compile(
+    r"https?://(?:(?:[\w-]+\.)+[\w-]+|localhost)(?::\d+)?(?:[/?#]\S*)?",
+    re.IGNORECASE,
+)
+_YT_HOST_RE = re.compile(r"^https?://(?:[\w-]+\.)*(?:youtube(?:-nocookie)?\.com|youtu\.be)[:/?#]", re.IGNORECASE)
+
+
+def _is_fetchable_url(text: str) -> bool:
+    """
+    Cheap, offline check that `text` is a complete URL worth fetching
+    speculatively.  YouTube links must already name a video or a playlist,
+    so a half-pasted watch?v=... is not sent off.
+    """
+    text = text.strip()
+    if not _FETCHABLE_URL_RE.fullmatch(text):
+        return False
+    if _YT_HOST_RE.match(text):
+        return bool(_YT_ID_RE.search(text) or _YT_LIST_RE.search(text))
+    return True
+
+
+def _video_key(url: str) -> str:
+    """
+    Stable cache key for a URL, computed without any network traffic.
+    YouTube URLs map to `youtube:<id>`, everything else to the stripped URL.
+    """
+    match = _YT_ID_RE.search(url)
+    if match:
+        return f"youtube:{match.group(1)}"
+    return f"url:{url.strip()}"
+
+
+# =============================================================================
+#  Quality presets
+# =============================================================================
+class QualityPreset:
+    """
+    A named quality policy that compiles to a format selector, so a job can
+    start from the bare URL: the download stage extracts the video once and
+    yt-dlp picks the format, with no format-list fetch beforehand.
+
+    `max_height` / `max_fps` are hard caps.  `prefer_hfr` (more than 30 fps)
+    and `vcodec` (codec prefix, e.g. "avc1") are preferences, dropped one at
+    a time -- the codec first -- when no stream satisfies them.
+    """
+
+    def __init__(
+        self,
+        name:       str,
+        label:      str = "",
+        max_height: Optional[int] = None,
+        max_fps:    Optional[int] = None,
+        prefer_hfr: bool = False,
+        vcodec:     Optional[str] = None,
+    ) -> None:
+        self.name       = name
+        self.label      = label or name
+        self.max_height = max_height
+        self.max_fps    = max_fps
+        self.prefer_hfr = prefer_hfr
+        self.vcodec     = vcodec
+
+    def video_selector(self) -> str:
+        """
+        "/"-joined bestvideo selectors, most preferred first, e.g.
+        bestvideo[height<=?1080][fps>30][vcodec^=avc1]/.../bestvideo[height<=?1080].
+        Caps use `<=?` so streams with no height / fps metadata still qualify.
+        """
+        caps = "".join([
+            f"[height<=?{self.max_height}]" if self.max_height else "",
+            f"[fps<=?{self.max_fps}]"       if self.max_fps    else "",
+        ])
+        wishes = [w for w in (
+            "[fps>30]"                 if self.prefer_hfr else "",
+            f"[vcodec^={self.vcodec}]" if self.vcodec     else "",
+        ) if w]
+        return "/".join(
+            "bestvideo" + caps + "".join(w for w, keep in zip(wishes, mask) if keep)
+            for mask in itertools.product((True, False), repeat=len(wishes))
+        )
+
+
+QUALITY_PRESETS: Dict[str, QualityPreset] = {p.name: p for p in (
+    QualityPreset("best",       "Best available"),
+    QualityPreset("2160p",      "Up to 4K, prefer 60 fps",           2160, prefer_hfr=True),
+    QualityPreset("1440p",      "Up to 1440p, prefer 60 fps",        1440, prefer_hfr=True),
+    QualityPreset("1080p60",    "Up to 1080p, prefer 60 fps",        1080, prefer_hfr=True),
+    QualityPreset("1080p-h264", "Up to 1080p, prefer 60 fps + H.264", 1080, prefer_hfr=True,
+                  vcodec="avc1"),
+    QualityPreset("1080p30",    "Up to 1080p at 30 fps",             1080, max_fps=30),
+    QualityPreset("720p",       "Up to 720p",                        720),
+    QualityPreset("480p",       "Up to 480p",                        480),
+    QualityPreset("360p",       "Up to 360p (data saver)",           360, max_fps=30),
+)}
+
+
+# =============================================================================
+#  Info-dict freshness
+# =============================================================================
+# Signed stream URLs carry their expiry as `expire=<unix ts>` (query string)
+# or `/expire/<unix ts>/` (HLS/DASH manifest paths).
+_EXPIRE_RE      = re.compile(r"[?&/]expire[=/](\d+)")
+_EXPIRY_MARGIN  = 5 * 60       # re-extract if URLs die within 5 minutes
+_INFO_MAX_AGE   = 4 * 60 * 60  # fallback TTL when URLs carry no expiry
+
+
+def _stream_expiry(info: dict) -> Optional[float]:
+    """Earliest expiry timestamp found in the info dict's format URLs, if any."""
+    earliest: Optional[float] = None
+    for fmt in info.get("formats") or []:
+        for key in ("url", "manifest_url", "fragment_base_url"):
+            match = _EXPIRE_RE.search(fmt.get(key) or "")
+            if match:
+                ts = float(match.group(1))
+                earliest = ts if earliest is None else min(earliest, ts)
+    return earliest
+
+
+def _info_is_fresh(info: Optional[dict]) -> bool:
+    """
+    True if an info dict from fetch_formats() can still be downloaded from
+    without re-extracting, i.e. its signed format URLs have not expired.
+    """
+    if not info or not info.get("formats"):
+        return False
+    now    = time.time()
+    expiry = _stream_expiry(info)
+    if expiry is not None:
+        return expiry - _EXPIRY_MARGIN > now
+    epoch = info.get("epoch")
+    return bool(epoch) and now - epoch < _INFO_MAX_AGE
+
+
+# =============================================================================
+#  Metadata / format cache
+# =============================================================================
+CACHE_MEMORY_ENTRIES = 64                  # in-memory LRU tier
+CACHE_DISK_ENTRIES   = 1000                # on-disk tier, oldest pruned first
+CACHE_TTL            = 7 * 24 * 60 * 60    # format list + title/duration/thumbnail
+
+
+class MetadataCache:
+    """
+    Two-tier cache for fetch_formats() results, keyed by _video_key().
+
+    Memory tier: LRU of the processed format list, a small metadata summary
+    (title, duration, thumbnail) and -- while its stream URLs are valid --
+    a slimmed info dict (_slim_info), so a download can still skip
+    re-extraction.  Queued jobs look it up when they start (fresh_info)
+    instead of each holding its own copy.
+    Disk tier:   one JSON file per video holding the format list and summary
+    only; signed stream URLs expire too quickly to be worth persisting.
+    """
+
+    SUMMARY_KEYS = ("id", "title", "duration", "thumbnail", "webpage_url")
+
+    def __init__(
+        self,
+        directory:  Optional[Path] = None,
+        capacity:   int = CACHE_MEMORY_ENTRIES,
+        disk_limit: int = CACHE_DISK_ENTRIES,
+        ttl:        float = CACHE_TTL,
+    ) -> None:
+        self._dir        = directory or (APP_DATA_DIR / "formats")
+        self._capacity   = max(1, capacity)
+        self._disk_limit = disk_limit
+        self._ttl        = ttl
+        self._mem: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock       = threading.Lock()
+        self._puts       = 0
+
+        self.hits        = 0
+        self.disk_hits   = 0
+        self.misses      = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits":      self.hits,
+            "disk_hits": self.disk_hits,
+            "misses":    self.misses,
+            "entries":   len(self._mem),
+        }
+
+    def get(self, url: str) -> Optional[tuple]:
+        """Return (formats, info) for a cached URL, or None on a miss / expired entry."""
+        key = _video_key(url)
+        now = time.time()
+
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None and now - entry["stored_at"] < self._ttl:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return self._unpack(entry)
+            if entry is not None:
+                del self._mem[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None or now - entry["stored_at"] >= self._ttl:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits      += 1
+            self.disk_hits += 1
+            return self._unpack(entry)
+
+    def fresh_info(self, url: str) -> Optional[dict]:
+        """The kept info dict for `url` while its stream URLs are valid (memory tier only)."""
+        with self._lock:
+            entry = self._mem.get(_video_key(url))
+            info  = entry.get("info") if entry is not None else None
+        return info if _info_is_fresh(info) else None
+
+    def put(self, url: str, formats: List[FormatRecord], info: dict) -> None:
+        key   = _video_key(url)
+        entry = {
+            "stored_at": time.time(),
+            "formats":   formats,
+            "summary":   self.summary(info),
+            "info":      _slim_info(info),
+        }
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def invalidate(self, url: str) -> None:
+        key = _video_key(url)
+        with self._lock:
+            self._mem.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    @classmethod
+    def summary(cls, info: dict) -> dict:
+        """The few info fields the UI shows (title, duration, thumbnail...)."""
+        return {k: info.get(k) for k in cls.SUMMARY_KEYS}
+
+    # -- internals -------------------------------------------------------------
+    def _remember(self, key: str, entry: dict) -> None:
+        self._mem[key] = entry
+        self._mem.move_to_end(key)
+        while len(self._mem) > self._capacity:
+            self._mem.popitem(last=False)
+
+    @staticmethod
+    def _unpack(entry: dict) -> tuple:
+        info = entry.get("info")
+        if not _info_is_fresh(info):
+            # Stream URLs expired: drop the heavy dict, keep the summary
+            entry["info"] = None
+            info = dict(entry["summary"])
+        return list(entry["formats"]), info
+
+    def _path(self, key: str) -> Path:
+        return self._dir / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            entry["formats"] = [FormatRecord.from_dict(f) for f in entry.get("formats") or ()]
+        except (OSError, ValueError, TypeError):
+            return None
+        entry["info"] = None
+        return entry
+
+    def _write_disk(self, key: str, entry: dict) -> None:
+        data = {k: entry[k] for k in ("stored_at", "summary")}
+        data["formats"] = [f.to_dict() for f in entry["formats"]]
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(data, fh)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return      # the cache is an optimisation; never fail a fetch over it
+
+        self._puts += 1
+        if self._puts % 50 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        """Drop the least recently written files beyond disk_limit."""
+        try:
+            files = sorted(self._dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for stale in files[:max(0, len(files) - self._disk_limit)]:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+# =============================================================================
+#  Download archive
+# =============================================================================
+ARCHIVE_COMPACT_RATIO = 2      # rewrite the log once it is 2x the live records
+
+
+class _JsonLog:
+    """
+    Records keyed by their `KEY` field, stored as an append-only JSON-lines
+    log (later lines win, a {KEY: ..., "removed": true} line drops a key)
+    and held in a dict for O(1) lookups.  The log is read on first use and
+    compacted once superseded lines pile up.  Writing is best effort: the
+    logs built on this are optimisations and never fail a download.
+
+    Subclasses extend _put_locked() / _drop_locked() to keep extra indexes
+    and _valid() to reject incomplete records.  Call the *_locked methods
+    with self._lock held.
+    """
+
+    KEY = "key"
+
+    def __init__(self, path: Path) -> None:
+        self._path    = path
+        self._lock    = threading.Lock()
+        self._records: Optional[Dict[str, dict]] = None    # loaded lazily
+
+    def _index(self) -> Dict[str, dict]:
+        with self._lock:
+            return self._index_locked()
+
+    def _index_locked(self) -> Dict[str, dict]:
+        if self._records is None:
+            self._records = {}
+            lines = 0
+            try:
+                with open(self._path, "r", encoding="utf-8") as fh:
+                    for line in fh:
+                        lines += 1
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue        # torn last line after a crash
+                        if record.get("removed"):
+                            self._drop_locked(record.get(self.KEY))
+                        elif self._valid(record):
+                            self._put_locked(record)
+            except OSError:
+                return self._records
+            if lines > ARCHIVE_COMPACT_RATIO * max(len(self._records), 16):
+                self._compact_locked()
+        return self._records
+
+    def _valid(self, record: dict) -> bool:
+        return bool(record.get(self.KEY))
+
+    def _put_locked(self, record: dict) -> None:
+        self._records[record[self.KEY]] = record
+
+    def _drop_locked(self, key: Optional[str]) -> None:
+        self._records.pop(key, None)
+
+    def _store_locked(self, record: dict) -> None:
+        """Index `record` and append it to the log."""
+        self._index_locked()
+        self._put_locked(record)
+        self._append_locked(record)
+
+    def _remove_locked(self, key: str) -> None:
+        """Drop `key` and log its removal (no-op if it is not indexed)."""
+        if key in self._index_locked():
+            self._drop_locked(key)
+            self._append_locked({self.KEY: key, "removed": True})
+
+    def _append_locked(self, record: dict) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(record) + "\n")
+        except OSError:
+            pass
+
+    def _compact_locked(self) -> None:
+        tmp = self._path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                for record in self._records.values():
+                    fh.write(json.dumps(record) + "\n")
+            os.replace(tmp, self._path)
+        except OSError:
+            pass
+
+
+class DownloadArchive(_JsonLog):
+    """
+    Persistent index of finished downloads, keyed by _video_key(), so a
+    URL can be checked without any extraction or network traffic.  One
+    archive is shared by every output folder.  Stored as a _JsonLog.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        super().__init__(path or (APP_DATA_DIR / "archive.jsonl"))
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __contains__(self, url: str) -> bool:
+        return _video_key(url) in self._index()
+
+    def get(self, url: str) -> Optional[dict]:
+        return self._index().get(_video_key(url))
+
+    def verified(self, url: str) -> Optional[dict]:
+        """
+        The record for `url` if its file is still on disk with the recorded
+        size.  A record whose file was moved, deleted or truncated is
+        dropped, so the video is downloaded again.
+        """
+        record = self.get(url)
+        if record is None:
+            return None
+        try:
+            if os.path.getsize(record["path"]) == record["size"]:
+                return record
+        except (OSError, KeyError, TypeError):
+            pass
+        self.forget(url)
+        return None
+
+    def add(self, job: "DownloadJob") -> None:
+        """Record a finished job (no-op if its output file is missing)."""
+        try:
+            size = os.path.getsize(job.final_path or "")
+        except OSError:
+            return
+        record = {
+            "key":       _video_key(job.url),
+            "url":       job.url,
+            "title":     job.title,
+            "format_id": job.format_id,
+            "height":    job.height,
+            "path":      job.final_path,
+            "size":      size,
+            "sha256":    job.sha256,
+            "added_at":  time.time(),
+        }
+        with self._lock:
+            self._store_locked(record)
+
+    def forget(self, url: str) -> None:
+        with self._lock:
+            self._remove_locked(_video_key(url))
+
+
+# =============================================================================
+#  Content hashes
+# =============================================================================
+MANIFEST_SUFFIX = ".manifest.json"     # sidecar next to every finished file
+_HASH_BLOCK     = 1024 * 1024
+
+
+def _hash_file(path: str) -> str:
+    """SHA-256 of a file read in one pass (for files not hashed as they were written)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _inline_hash(job: "DownloadJob", path: str) -> Optional[str]:
+    """The SHA-256 taken while `path` was written, if the file is unchanged since."""
+    entry = job.hashed.get(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if entry is None or entry[1:] != (st.st_size, st.st_mtime_ns):
+        return None             # e.g. rewritten by a yt-dlp fixup
+    return entry[0]
+
+
+def _write_manifest(path: str, manifest: dict) -> None:
+    """Write `manifest` to the file's sidecar (temp file + rename)."""
+    sidecar = path + MANIFEST_SUFFIX
+    temp    = sidecar + ".tmp"
+    try:
+        with open(temp, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, ensure_ascii=False, indent=1)
+        os.replace(temp, sidecar)
+    except OSError:
+        _remove_quietly(temp)
+
+
+class HashIndex(_JsonLog):
+    """
+    SHA-256 -> finished files, across every output folder, so a download
+    whose bytes already exist elsewhere (same video, other title or
+    folder) is hardlinked to them instead of stored twice.
+
+    Stored like DownloadArchive, as a _JsonLog keyed by path.  A file only
+    counts as a twin while its size and mtime still match what was indexed.
+    """
+
+    KEY = "path"
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        super().__init__(path or (APP_DATA_DIR / "hashes.jsonl"))
+        self._by_hash: Dict[str, set] = {}                 # sha256 -> paths
+
+    def add(self, sha256: str, path: str) -> None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        record = {
+            "path":     os.path.abspath(path),
+            "sha256":   sha256,
+            "size":     st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        with self._lock:
+            self._store_locked(record)
+
+    def twin(self, sha256: str, path: str) -> Optional[str]:
+        """
+        An unchanged indexed file with this hash on the same volume as
+        `path` and not already the same file, or None.
+        """
+        try:
+            mine = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            self._index_locked()
+            candidates = [self._records[p] for p in self._by_hash.get(sha256, ())]
+        for record in candidates:
+            try:
+                st = os.stat(record["path"])
+            except OSError:
+                self._forget(record["path"])
+                continue
+            if (st.st_size, st.st_mtime_ns) != (record["size"], record["mtime_ns"]):
+                self._forget(record["path"])        # edited since it was hashed
+                continue
+            if st.st_dev == mine.st_dev and st.st_ino != mine.st_ino and st.st_size == mine.st_size:
+                return record["path"]
+        return None
+
+    def link_duplicate(self, sha256: str, path: str) -> Optional[str]:
+        """
+        Replace `path` with a hardlink to its indexed twin.  Returns the
+        twin's path, or None when there is none or linking fails (e.g. on
+        a file system without hardlinks); `path` is left intact then.
+        """
+        twin = self.twin(sha256, path)
+        if twin is None:
+            return None
+        temp = path + ".link"
+        try:
+            _remove_quietly(temp)
+            os.link(twin, temp)
+            os.replace(temp, path)
+        except OSError:
+            _remove_quietly(temp)
+            return None
+        return twin
+
+    # -- internals -------------------------------------------------------------
+    def _forget(self, path: str) -> None:
+        with self._lock:
+            self._remove_locked(path)
+
+    def _valid(self, record: dict) -> bool:
+        return bool(record.get("path") and record.get("sha256"))
+
+    def _put_locked(self, record: dict) -> None:
+        self._drop_locked(record["path"])
+        super()._put_locked(record)
+        self._by_hash.setdefault(record["sha256"], set()).add(record["path"])
+
+    def _drop_locked(self, path: Optional[str]) -> None:
+        old = self._records.pop(path, None)
+        if old is not None:
+            paths = self._by_hash.get(old["sha256"], set())
+            paths.discard(path)
+            if not paths:
+                self._by_hash.pop(old["sha256"], None)
+
+
+# =============================================================================
+#  Thumbnail cache
+# =============================================================================
+THUMB_SIZE         = (220, 130)     # preview box in the GUI
+THUMB_WORKERS      = 2              # fixed fetch/decode pool
+THUMB_MEMORY       = 128            # decoded previews kept in memory
+THUMB_DISK_ENTRIES = 5000           # ~10 KB each on disk, oldest pruned first
+
+
+class ThumbnailCache:
+    """
+    Video previews, already resized to THUMB_SIZE, keyed by _video_key().
+
+    Lookups go memory -> disk (a small JPEG per video) -> network.  Network
+    fetches share one keep-alive requests.Session, and all fetching and
+    decoding runs on a fixed THUMB_WORKERS pool, so a long queue of previews
+    neither opens a connection per image nor spawns a thread per image.
+    Requires Pillow + requests (THUMBNAILS_AVAILABLE).
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self._dir      = directory or (APP_DATA_DIR / "thumbs")
+        self._mem:     "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._waiting: Dict[str, List[Callable]] = {}     # key -> callbacks of an in-flight load
+        self._lock     = threading.Lock()
+        self._pool     = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix="thumb")
+        self._session  = None      # created on the first network fetch
+        self._pool.submit(self._prune)
+
+    def load(
+        self, url: str, thumb_url: Optional[str], on_ready: Callable[["Image.Image"], None],
+    ) -> None:
+        """
+        Call on_ready(image) from a pool thread once the preview for the
+        video at `url` is available.  With thumb_url=None only the caches
+        are consulted; nothing is called on a miss or a failed download.
+        """
+        key = _video_key(url)
+        with self._lock:
+            image = self._mem.get(key)
+            if image is not None:
+                self._mem.move_to_end(key)
+            elif key in self._waiting:
+                self._waiting[key].append(on_ready)
+                return
+            else:
+                self._waiting[key] = [on_ready]
+        if image is not None:
+            on_ready(image)
+            return
+        self._pool.submit(self._load, key, thumb_url)
+
+    def _load(self, key: str, thumb_url: Optional[str]) -> None:
+        image = None
+        try:
+            image = self._read_disk(key)
+            if image is None and thumb_url:
+                image = self._fetch(thumb_url)
+                self._write_disk(key, image)
+        except Exception:
+            image = None    # previews are decorative; a bad image is just skipped
+        with self._lock:
+            callbacks = self._waiting.pop(key, [])
+            if image is not None:
+                self._mem[key] = image
+                while len(self._mem) > THUMB_MEMORY:
+                    self._mem.popitem(last=False)
+        if image is not None:
+            for callback in callbacks:
+                callback(image)
+
+    def _fetch(self, thumb_url: str) -> "Image.Image":
+        with self._lock:
+            if self._session is None:
+                self._session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=THUMB_WORKERS, pool_maxsize=THUMB_WORKERS,
+                )
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+        resp = self._session.get(thumb_url, timeout=10)
+        resp.raise_for_status()
+        image = Image.open(BytesIO(resp.content))
+        image.draft("RGB", THUMB_SIZE)      # JPEG: decode at a reduced scale directly
+        image = image.convert("RGB")
+        image.thumbnail(THUMB_SIZE, Image.LANCZOS)
+        return image
+
+    def _path(self, key: str) -> Path:
+        return self._dir / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+    def _read_disk(self, key: str) -> Optional["Image.Image"]:
+        try:
+            with Image.open(self._path(key)) as image:
+                image.load()
+                return image.copy()
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, image: "Image.Image") -> None:
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix(".tmp")
+            image.save(tmp, "JPEG", quality=88)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            pass
+
+    def _prune(self) -> None:
+        try:
+            files = sorted(self._dir.glob("*.jpg"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for path in files[:max(0, len(files) - THUMB_DISK_ENTRIES)]:
+            _remove_quietly(str(path))
+
+
+# =============================================================================
+#  Job journal
+# =============================================================================
+JOURNAL_FLUSH_INTERVAL = 2.0                # seconds between progress-only writes
+JOURNAL_KEEP_FINISHED  = 7 * 24 * 60 * 60   # drop finished entries after a week
+
+
+class JobJournal:
+    """
+    Persistent record of every download job, keyed by DownloadJob.uid.
+
+    Each entry holds the URL, chosen format, target path, the files the job
+    owns and its byte progress.  Entries still marked queued / running /
+    merging when the app starts belong to jobs that were interrupted and can
+    be resumed: yt-dlp continues from their .part files.
+    """
+
+    INTERRUPTED = ("queued", "running", "merging")
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self._path       = path or (APP_DATA_DIR / "journal.json")
+        self._lock       = threading.Lock()
+        self._entries:   Dict[str, dict] = self._load()
+        self._last_flush = 0.0
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self._path, "r", encoding="utf-8") as fh:
+                entries = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        cutoff = time.time() - JOURNAL_KEEP_FINISHED
+        return {
+            uid: e for uid, e in entries.items()
+            if e.get("state") in self.INTERRUPTED or e.get("updated_at", 0) > cutoff
+        }
+
+    def record(self, job: "DownloadJob", force: bool = True, **extra) -> None:
+        """
+        Store the job's current state.  Progress-only updates (force=False)
+        are written at most every JOURNAL_FLUSH_INTERVAL seconds.
+        """
+        with self._lock:
+            entry = self._entries.setdefault(job.uid, {"created_at": time.time()})
+            entry.update({
+                "url":        job.url,
+                "format_id":  job.format_id,
+                "height":     job.height,
+                "output_dir": job.output_dir,
+                "title":      job.title,
+                "priority":   job.priority,
+                "rate_limit": job.rate_limit,
+                "state":      job.state,
+                "final_path": job.final_path,
+                "files":      sorted(job.files),
+                "updated_at": time.time(),
+                **extra,
+            })
+            if not force and time.monotonic() - self._last_flush < JOURNAL_FLUSH_INTERVAL:
+                return
+            self._flush_locked()
+
+    def forget(self, uid: str) -> None:
+        with self._lock:
+            if self._entries.pop(uid, None) is not None:
+                self._flush_locked()
+
+    def interrupted(self) -> List[dict]:
+        """Entries of jobs that never finished (the app exited mid-way)."""
+        with self._lock:
+            return [
+                {"uid": uid, **e} for uid, e in self._entries.items()
+                if e.get("state") in self.INTERRUPTED
+            ]
+
+    def entry(self, uid: str) -> Optional[dict]:
+        with self._lock:
+            e = self._entries.get(uid)
+            return dict(e) if e is not None else None
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self._entries, fh)
+            os.replace(tmp, self._path)
+        except OSError:
+            pass    # the journal is best-effort; never fail a download over it
+
+
+def _owned_leftovers(files: set, temps_only: bool) -> List[str]:
+    """
+    Expand a job's recorded files to what yt-dlp may have left behind for
+    them: .part files, fragment pieces and .ytdl resume state, plus the
+    recorded files themselves unless temps_only is set.
+    """
+    found: set = set()
+    for path in files:
+        candidates = [
+            path + ".ytdl", path + ".part", path + ".part.ytdl",
+            path + ".ranged", path + ".ranged.json",
+        ]
+        if path.endswith((".part", ".temp.mp4")):      # yt-dlp / merge temps
+            candidates.append(path)
+        elif not temps_only:
+            candidates.append(path)
+        candidates += glob.glob(glob.escape(path) + "-Frag*")
+        candidates += glob.glob(glob.escape(path) + ".part-Frag*")
+        found.update(c for c in candidates if os.path.exists(c))
+    return sorted(found)
+
+
+# =============================================================================
+#  Retries and circuit breaker
+# =============================================================================
+RETRY_ATTEMPTS       = 3          # extra tries for a failed job, extraction or merge
+RETRY_BASE_DELAY     = 2.0        # seconds before the first retry; doubles per retry
+RETRY_MAX_DELAY      = 60.0
+BREAKER_THRESHOLD    = 3          # throttling errors from one host within the window...
+BREAKER_WINDOW       = 120.0      # ...open its circuit
+BREAKER_COOLDOWN     = 30.0       # first pause; doubles while the host keeps throttling
+BREAKER_MAX_COOLDOWN = 600.0
+
+RETRY_THROTTLED = "throttled"     # the upstream is rate limiting us
+RETRY_TRANSIENT = "transient"     # network hiccup, 5xx, killed process, locked file
+
+_THROTTLE_RE = re.compile(
+    r"HTTP Error 429|Too Many Requests|rate[- ]?limit|confirm you.re not a bot", re.IGNORECASE,
+)
+_TRANSIENT_RE = re.compile(
+    r"HTTP Error (?:403|408|5\d\d)|timed? ?out|Connection (?:reset|refused|aborted)"
+    r"|Remote ?end closed|RemoteDisconnected|IncompleteRead|Broken pipe|EOF occurred"
+    r"|Temporary failure in name resolution|Network is unreachable|getaddrinfo failed"
+    r"|Input/output error|Resource temporarily unavailable|Device or resource busy"
+    r"|ffmpeg exited with code -\d+",
+    re.IGNORECASE,
+)
+
+
+def _retry_reason(exc: BaseException) -> Optional[str]:
+    """
+    RETRY_THROTTLED / RETRY_TRANSIENT if `exc` is worth another try, else
+    None (cancelled, unavailable video, missing format, full disk...).
+    """
+    msg = str(exc)
+    if "Cancelled" in msg:
+        return None
+    if _THROTTLE_RE.search(msg):
+        return RETRY_THROTTLED
+    if isinstance(exc, (ConnectionError, TimeoutError)) or _TRANSIENT_RE.search(msg):
+        return RETRY_TRANSIENT
+    if isinstance(exc, OSError) and (
+        exc.errno in (errno.EAGAIN, errno.EBUSY)
+        or (os.name == "nt" and isinstance(exc, PermissionError))   # file held by a scanner
+    ):
+        return RETRY_TRANSIENT
+    return None
+
+
+def _short_error(exc: BaseException, limit: int = 80) -> str:
+    """The most specific line of an error message, for a one-line status."""
+    lines = [line.strip() for line in str(exc).splitlines() if line.strip()]
+    text  = lines[-1].replace("ERROR: ", "") if lines else type(exc).__name__
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _sleep_unless(cancelled: Callable[[], bool], seconds: float) -> bool:
+    """Sleep in short steps; True if `cancelled` turned true meanwhile."""
+    deadline = time.monotonic() + seconds
+    while not cancelled():
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return False
+        time.sleep(min(0.25, left))
+    return True
+
+
+class RetryPolicy:
+    """
+    How often and how patiently a failed operation is tried again:
+    exponential backoff with jitter, so workers that failed together do
+    not all come back at the same moment.
+    """
+
+    def __init__(
+        self,
+        attempts: int   = RETRY_ATTEMPTS,
+        base:     float = RETRY_BASE_DELAY,
+        cap:      float = RETRY_MAX_DELAY,
+    ) -> None:
+        self.attempts = attempts
+        self.base     = base
+        self.cap      = cap
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number `retry` (1-based)."""
+        ceiling = min(self.cap, self.base * 2 ** max(0, retry - 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def sleep_function(self, n: int) -> float:
+        """yt-dlp `retry_sleep_functions` entry (n counts retries from 0)."""
+        return self.delay(n + 1)
+
+
+# Retries yt-dlp and RangedDownload make inside one transfer (per fragment /
+# byte range): more of them, but shorter waits than whole-job retries.
+_TRANSFER_RETRY = RetryPolicy(attempts=5, base=1.0, cap=30.0)
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker for upstream throttling.  `threshold` throttling
+    errors within `window` seconds open the host's circuit: every job
+    headed there waits in wait() instead of retrying into the rate limit.
+    Once the cool-down has passed the next request goes through; another
+    throttling error before a success re-opens the circuit for twice as
+    long, and a success closes it for good.
+    """
+
+    def __init__(
+        self,
+        threshold:    int   = BREAKER_THRESHOLD,
+        window:       float = BREAKER_WINDOW,
+        cooldown:     float = BREAKER_COOLDOWN,
+        max_cooldown: float = BREAKER_MAX_COOLDOWN,
+    ) -> None:
+        self._threshold    = threshold
+        self._window       = window
+        self._cooldown     = cooldown
+        self._max_cooldown = max_cooldown
+        self._errors:     Dict[str, List[float]] = {}
+        self._open_until: Dict[str, float]       = {}
+        self._trips:      Dict[str, int]         = {}   # trips since the last success
+        self._lock         = threading.Lock()
+
+    def record_throttle(self, host: str) -> float:
+        """Count one throttling error; returns the pause if it opened the circuit, else 0."""
+        now = time.monotonic()
+        with self._lock:
+            if self._open_until.get(host, 0.0) > now:
+                return 0.0          # already open
+            errors = [t for t in self._errors.get(host, ()) if now - t < self._window] + [now]
+            # Half-open (tripped before, no success since): one error re-opens it
+            if len(errors) < self._threshold and not self._trips.get(host):
+                self._errors[host] = errors
+                return 0.0
+            trips = self._trips[host] = self._trips.get(host, 0) + 1
+            cooldown = min(self._max_cooldown, self._cooldown * 2 ** (trips - 1))
+            self._open_until[host] = now + cooldown
+            self._errors.pop(host, None)
+            return cooldown
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._trips.pop(host, None)
+            self._errors.pop(host, None)
+
+    def remaining(self, host: str) -> float:
+        with self._lock:
+            return max(0.0, self._open_until.get(host, 0.0) - time.monotonic())
+
+    def open_hosts(self) -> Dict[str, float]:
+        """Host -> seconds until its circuit closes, for every open circuit."""
+        now = time.monotonic()
+        with self._lock:
+            return {h: round(t - now, 1) for h, t in self._open_until.items() if t > now}
+
+    def wait(
+        self,
+        host:      str,
+        cancelled: Callable[[], bool],
+        on_wait:   Callable[[float], None],
+    ) -> bool:
+        """
+        Block while `host`'s circuit is open, calling on_wait(seconds left)
+        whenever a (new) pause starts.  Returns False if cancelled meanwhile.
+        """
+        announced = None
+        while True:
+            with self._lock:
+                until = self._open_until.get(host, 0.0)
+            left = until - time.monotonic()
+            if left <= 0:
+                return True
+            if until != announced:
+                announced = until
+                on_wait(left)
+            if _sleep_unless(cancelled, min(1.0, left)):
+                return False
+
+
+# =============================================================================
+#  Parallel transfers
+# =============================================================================
+# Servers tend to throttle each connection, so a large progressive file is
+# fetched as byte ranges over several connections.  DASH/HLS fragments use
+# yt-dlp's own concurrent fragment downloader instead.
+CONNECTIONS_AUTO     = 0                  # adapt to the measured throughput
+MAX_CONNECTIONS      = 16                 # upper bound offered in the UI
+FRAGMENT_CONNECTIONS = 4                  # fragment concurrency until a host is measured
+RANGED_MIN_SIZE      = 8 * 1024 * 1024    # smaller files are not worth splitting
+_RANGE_CHUNK_MIN     = 512 * 1024
+_RANGE_CHUNK_MAX     = 8 * 1024 * 1024
+_RANGE_READ          = 64 * 1024
+_RANGE_TIMEOUT       = 20                 # seconds per socket operation
+_ADAPT_INTERVAL      = 1.0                # seconds per throughput sample
+_ADAPT_MIN_GAIN      = 0.10               # an extra connection must add 10% to stay
+_HASH_HOLD_MAX       = 64 * 1024 * 1024   # out-of-order chunks kept for the running hash
+
+
+class _RangeError(Exception):
+    """A ranged transfer cannot be used or failed; fall back to one connection."""
+
+
+def _url_host(url: str) -> str:
+    return urllib.parse.urlsplit(url).hostname or ""
+
+
+class RangedDownload:
+    """
+    Fetch one file as byte ranges over several HTTP connections.
+
+    Data is written to "<path>.ranged" and the finished chunk indices to
+    "<path>.ranged.json", so an interrupted transfer resumes where it
+    stopped.  With CONNECTIONS_AUTO the transfer starts on two connections
+    and adds one per throughput sample while that still gains
+    _ADAPT_MIN_GAIN; the first connection that does not is retired again.
+    A failed chunk is fetched again under `retry` (RetryPolicy).
+
+    Finished chunks are fed to a SHA-256 in file order as they arrive;
+    chunks that finish ahead of their turn wait in memory, up to
+    _HASH_HOLD_MAX.  Past that, or for a resumed transfer, `sha256` stays
+    None and the file has to be hashed by reading it.
+    """
+
+    def __init__(
+        self,
+        url:         str,
+        path:        str,
+        headers:     Optional[Dict[str, str]] = None,
+        connections: int = CONNECTIONS_AUTO,
+        cancelled:   Callable[[], bool] = lambda: False,
+        report:      Optional[Callable] = None,
+        throttle:    Optional[Callable[[int], None]] = None,
+        retry:       Optional[RetryPolicy] = None,
+    ) -> None:
+        self.url          = url
+        self.path         = path
+        self.tmp          = path + ".ranged"
+        self._state_path  = path + ".ranged.json"
+        self._headers     = dict(headers or {})
+        self._auto        = connections == CONNECTIONS_AUTO
+        self._target      = 2 if self._auto else max(1, connections)
+        self._cancelled   = cancelled
+        self._report      = report or (lambda received, total, speed, connections: None)
+        self._throttle    = throttle or (lambda nbytes: None)     # e.g. BandwidthScheduler
+        self._retry       = retry or _TRANSFER_RETRY
+        self._lock        = threading.Lock()
+        self._pending:    queue.Queue = queue.Queue()
+        self._done:       set = set()
+        self._active      = 0
+        self._received    = 0
+        self._error:      Optional[str] = None
+        self.total        = 0
+        self.chunk        = 0
+        self.retries      = 0       # failed chunk attempts that were fetched again
+        self.resumed      = 0       # bytes already on disk from an earlier run
+        self.sha256:      Optional[str] = None    # set by run() when hashed inline
+        self._digest      = hashlib.sha256()
+        self._hash_next   = 0       # next chunk index the digest needs
+        self._held:       Dict[int, List[bytes]] = {}
+        self._held_bytes  = 0
+        self._hash_lock   = threading.Lock()
+
+    @property
+    def connections(self) -> int:
+        """Connection count the transfer settled on."""
+        return self._target
+
+    def _request(self, start: int, end: int):
+        headers = {**self._headers, "Range": f"bytes={start}-{end}"}
+        return urllib_request.urlopen(
+            urllib_request.Request(self.url, headers=headers), timeout=_RANGE_TIMEOUT,
+        )
+
+    def probe(self) -> int:
+        """Return the file size; raise _RangeError if ranges are not served."""
+        try:
+            with self._request(0, 0) as resp:
+                content_range = resp.headers.get("Content-Range") or ""
+                if resp.status != 206 or "/" not in content_range:
+                    raise _RangeError("server ignores Range requests")
+        except (OSError, ValueError, http_client.HTTPException) as exc:
+            raise _RangeError(str(exc)) from exc
+        total = content_range.rsplit("/", 1)[1].strip()
+        if not total.isdigit():
+            raise _RangeError("server did not report the file size")
+        return int(total)
+
+    def run(self, total: int) -> None:
+        """Download all chunks, then move the data file to `path`."""
+        self.total = total
+        self.chunk = min(_RANGE_CHUNK_MAX, max(_RANGE_CHUNK_MIN, total // (MAX_CONNECTIONS * 4)))
+        count      = -(-total // self.chunk)
+
+        self._load_state()
+        if not self._done or not os.path.exists(self.tmp):
+            self._done = set()
+            os.makedirs(os.path.dirname(self.tmp) or ".", exist_ok=True)
+            with open(self.tmp, "wb") as fh:
+                fh.truncate(total)
+        for index in range(count):
+            if index not in self._done:
+                self._pending.put(index)
+        self._received = self.resumed = sum(self._chunk_size(i) for i in self._done)
+        if self._done:
+            self._digest = None     # earlier chunks are only on disk
+
+        self._spawn(min(self._target, self._pending.qsize()))
+        self._control()
+
+        if self._cancelled():
+            raise _RangeError("cancelled")
+        if self._error or len(self._done) != count:
+            raise _RangeError(self._error or "transfer stopped early")
+        if self._digest is not None and self._hash_next == count:
+            self.sha256 = self._digest.hexdigest()
+        os.replace(self.tmp, self.path)
+        _remove_quietly(self._state_path)
+
+    def discard(self) -> None:
+        """Delete the partial data so another downloader can start clean."""
+        _remove_quietly(self.tmp)
+        _remove_quietly(self._state_path)
+
+    def _chunk_size(self, index: int) -> int:
+        return min(self.chunk, self.total - index * self.chunk)
+
+    def _spawn(self, count: int) -> None:
+        for _ in range(count):
+            with self._lock:
+                self._active += 1
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def _control(self) -> None:
+        """Report progress, grow or shrink the connection count, wait for workers."""
+        growing      = self._auto
+        baseline     = None
+        sample_t     = time.monotonic()
+        sample_bytes = self._received
+        speed        = 0.0
+        saved_t      = sample_t
+        while True:
+            time.sleep(0.25)
+            with self._lock:
+                active, received = self._active, self._received
+            if active == 0:
+                break
+
+            now = time.monotonic()
+            if now - sample_t >= _ADAPT_INTERVAL:
+                speed = (received - sample_bytes) / (now - sample_t)
+                sample_t, sample_bytes = now, received
+                if growing:
+                    if baseline is None or speed > baseline * (1 + _ADAPT_MIN_GAIN):
+                        baseline = speed
+                        if self._target < MAX_CONNECTIONS and not self._pending.empty():
+                            with self._lock:
+                                self._target += 1
+                            self._spawn(1)
+                        else:
+                            growing = False
+                    else:
+                        with self._lock:    # the newest connection did not pay off
+                            self._target = max(1, self._target - 1)
+                        growing = False
+            if now - saved_t >= _ADAPT_INTERVAL:
+                saved_t = now
+                self._save_state()
+            self._report(received, self.total, speed, active)
+        self._save_state()
+        self._report(self._received, self.total, speed, self._target)     # the final bytes
+
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                if self._active > self._target or self._error or self._cancelled():
+                    self._active -= 1
+                    return
+            try:
+                index = self._pending.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    self._active -= 1
+                return
+            try:
+                self._fetch_chunk(index)
+            except _RangeError as exc:
+                with self._lock:
+                    self._error   = self._error or str(exc)
+                    self._active -= 1
+                return
+
+    def _fetch_chunk(self, index: int) -> None:
+        start = index * self.chunk
+        size  = self._chunk_size(index)
+        last: object = "connection closed early"
+        for attempt in range(self._retry.attempts + 1):
+            if attempt and _sleep_unless(self._cancelled, self._retry.delay(attempt)):
+                return
+            got   = 0
+            parts = []
+            try:
+                with self._request(start, start + size - 1) as resp, open(self.tmp, "r+b") as fh:
+                    if resp.status != 206:
+                        raise _RangeError("server ignores Range requests")
+                    fh.seek(start)
+                    while got < size:
+                        if self._cancelled():
+                            return
+                        data = resp.read(min(_RANGE_READ, size - got))
+                        if not data:
+                            break
+                        fh.write(data)
+                        if self._digest is not None:
+                            parts.append(data)
+                        got += len(data)
+                        with self._lock:
+                            self._received += len(data)
+                        self._throttle(len(data))
+                if got == size:
+                    self._hash_chunk(index, parts)
+                    with self._lock:
+                        self._done.add(index)
+                    return
+            except (OSError, http_client.HTTPException) as exc:
+                last = exc
+            with self._lock:
+                self._received -= got       # the retry fetches the whole chunk again
+                self.retries   += 1
+        raise _RangeError(f"bytes {start}-{start + size - 1}: {last}")
+
+    def _hash_chunk(self, index: int, parts: List[bytes]) -> None:
+        """Feed a finished chunk to the digest, or hold it until its turn."""
+        with self._hash_lock:
+            if self._digest is None:
+                return
+            self._held[index] = parts
+            self._held_bytes += self._chunk_size(index)
+            while self._hash_next in self._held:
+                self._held_bytes -= self._chunk_size(self._hash_next)
+                for data in self._held.pop(self._hash_next):
+                    self._digest.update(data)
+                self._hash_next += 1
+            if self._held_bytes > _HASH_HOLD_MAX:
+                self._digest = None         # a stalled chunk: give up, hash from disk later
+                self._held.clear()
+
+    def _load_state(self) -> None:
+        try:
+            with open(self._state_path, "r", encoding="utf-8") as fh:
+                state = json.load(fh)
+            if state.get("total") == self.total and state.get("chunk") == self.chunk:
+                self._done = set(state.get("done") or ())
+        except (OSError, ValueError):
+            self._done = set()
+
+    def _save_state(self) -> None:
+        with self._lock:
+            state = {"total": self.total, "chunk": self.chunk, "done": sorted(self._done)}
+        try:
+            with open(self._state_path, "w", encoding="utf-8") as fh:
+                json.dump(state, fh)
+        except OSError:
+            pass
+
+
+# =============================================================================
+#  Bandwidth scheduling
+# =============================================================================
+PRIORITY_INTERACTIVE = "interactive"    # a video the user asked for right now
+PRIORITY_NORMAL      = "normal"
+PRIORITY_BACKGROUND  = "background"     # playlist / channel entries
+PRIORITY_WEIGHTS     = {PRIORITY_INTERACTIVE: 4, PRIORITY_NORMAL: 2, PRIORITY_BACKGROUND: 1}
+
+_BUCKET_BURST        = 0.25             # seconds of allocation a flow may bank
+_REBALANCE_INTERVAL  = 1.0              # seconds between demand re-estimates
+_MIN_DEMAND          = 32 * 1024        # bytes/s floor for an idle flow's estimate
+THROTTLE_BLOCK       = 128 * 1024       # yt-dlp read size while a limit applies
+
+
+class _Flow:
+    """Per-job token bucket state inside BandwidthScheduler."""
+
+    __slots__ = ("weight", "cap", "alloc", "tokens", "stamp", "used", "blocked", "window_at")
+
+    def __init__(self, weight: int, cap: float) -> None:
+        self.weight  = weight
+        self.cap     = cap          # per-job limit in bytes/s, 0 = none
+        self.alloc   = cap          # current allocation in bytes/s, 0 = unlimited
+        self.tokens  = 0.0
+        self.stamp   = time.monotonic()
+        self.used    = 0            # bytes consumed in the current demand window
+        self.blocked = False        # had to wait for tokens in this window
+        self.window_at = self.stamp
+
+
+class BandwidthScheduler:
+    """
+    One token bucket per downloading job, shared by every worker thread.
+
+    The global cap is split between the jobs that are downloading by
+    weighted max-min fairness: each job gets a share proportional to its
+    priority weight, never more than its own cap, and bandwidth a job
+    demonstrably does not use (slow server) is handed to the others.
+    Callers report bytes through consume(), which sleeps just long enough
+    to keep the job within its allocation.  Rates are in bytes/s; 0 or
+    None means unlimited.  Caps and priorities may change at any time.
+    """
+
+    def __init__(self, rate_limit: Optional[float] = 0) -> None:
+        self._lock       = threading.Lock()
+        self._rate       = max(0.0, float(rate_limit or 0))
+        self._flows:     Dict[int, _Flow] = {}
+        self._window_at  = time.monotonic()
+
+    @property
+    def rate_limit(self) -> float:
+        return self._rate
+
+    def set_rate_limit(self, rate: Optional[float]) -> None:
+        with self._lock:
+            self._rate = max(0.0, float(rate or 0))
+            self._rebalance_locked(time.monotonic(), reestimate=False)
+
+    def register(self, job: "DownloadJob") -> None:
+        with self._lock:
+            self._flows[job.id] = _Flow(PRIORITY_WEIGHTS.get(job.priority, 2), job.rate_limit)
+            self._rebalance_locked(time.monotonic(), reestimate=False)
+
+    def release(self, job: "DownloadJob") -> None:
+        with self._lock:
+            if self._flows.pop(job.id, None) is not None:
+                self._rebalance_locked(time.monotonic(), reestimate=False)
+
+    def update(self, job: "DownloadJob") -> None:
+        """Pick up a changed job.priority / job.rate_limit."""
+        with self._lock:
+            flow = self._flows.get(job.id)
+            if flow is not None:
+                flow.weight = PRIORITY_WEIGHTS.get(job.priority, 2)
+                flow.cap    = job.rate_limit
+                self._rebalance_locked(time.monotonic(), reestimate=False)
+
+    def allocation(self, job_id: int) -> float:
+        """Bytes/s currently granted to a job (0 = unlimited or not downloading)."""
+        with self._lock:
+            flow = self._flows.get(job_id)
+            return flow.alloc if flow is not None else 0.0
+
+    @property
+    def limited(self) -> bool:
+        with self._lock:
+            return bool(self._rate) or any(f.cap for f in self._flows.values())
+
+    def consume(self, job: "DownloadJob", nbytes: int) -> None:
+        """Account nbytes read for `job`; block while it is over its allocation."""
+        with self._lock:
+            now  = time.monotonic()
+            flow = self._flows.get(job.id)
+            if flow is None:
+                return
+            flow.used += nbytes
+            if now - self._window_at >= _REBALANCE_INTERVAL:
+                self._rebalance_locked(now, reestimate=True)
+            if not flow.alloc:
+                return
+            flow.tokens = min(
+                flow.tokens + (now - flow.stamp) * flow.alloc, flow.alloc * _BUCKET_BURST,
+            )
+            flow.stamp   = now
+            flow.tokens -= nbytes
+            wait = -flow.tokens / flow.alloc if flow.tokens < 0 else 0.0
+            if wait:
+                flow.blocked = True
+        if wait:
+            job._cancel.wait(wait)      # wakes up at once when the job is cancelled
+
+    def _rebalance_locked(self, now: float, reestimate: bool) -> None:
+        """Weighted water-filling of the global rate over the active flows."""
+        demand: Dict[int, float] = {}
+        for job_id, flow in self._flows.items():
+            want    = flow.cap or float("inf")
+            elapsed = now - flow.window_at
+            if reestimate and elapsed >= _REBALANCE_INTERVAL:
+                used = flow.used / elapsed
+                if flow.alloc and not flow.blocked and used < flow.alloc / 2:
+                    # Left most of its share unused without ever waiting: the source is slower
+                    want = min(want, max(used * 1.5, _MIN_DEMAND))
+                flow.used, flow.blocked, flow.window_at = 0, False, now
+            demand[job_id] = want
+        if reestimate:
+            self._window_at = now
+
+        if not self._rate:
+            for flow in self._flows.values():
+                flow.alloc = flow.cap
+            return
+
+        remaining = self._rate
+        pending   = dict(self._flows)
+        while pending:
+            share     = remaining / sum(f.weight for f in pending.values())
+            saturated = [i for i, f in pending.items() if demand[i] <= share * f.weight]
+            if not saturated:
+                for flow in pending.values():
+                    flow.alloc = share * flow.weight
+                break
+            for job_id in saturated:
+                flow        = pending.pop(job_id)
+                flow.alloc  = demand[job_id]
+                remaining  -= demand[job_id]
+
+
+# =============================================================================
+#  Disk space
+# =============================================================================
+DISK_HEADROOM  = 100 * 1024 ** 2    # bytes always left free on a volume
+_SPACE_RECHECK = 1.0                # seconds between checks while a job waits for space
+_MOVE_CHUNK    = 4 * 1024 ** 2      # read size when a move has to copy across volumes
+
+
+class DiskSpaceError(Exception):
+    """A job's projected files do not fit on their volume."""
+
+
+def _volume(path: str) -> Tuple[int, str]:
+    """(device id, nearest existing folder) for a path that may not exist yet."""
+    probe = os.path.abspath(path)
+    while not os.path.exists(probe) and os.path.dirname(probe) != probe:
+        probe = os.path.dirname(probe)
+    return os.stat(probe).st_dev, probe
+
+
+def _allocated_bytes(path: str) -> int:
+    """Disk space a file really occupies (sparse .ranged files count as written)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0
+    blocks = getattr(st, "st_blocks", None)     # POSIX only
+    return min(st.st_size, blocks * 512) if blocks is not None else st.st_size
+
+
+def _move_file(src: str, dest: str, cancelled: Callable[[], bool],
+               digest=None) -> bool:
+    """
+    Move a finished file into its destination folder.  On one volume this
+    is a rename; across volumes the file is streamed to '<dest>.part' and
+    renamed over `dest`, so the destination never shows a half-copied file
+    under its final name.  Polls `cancelled` between blocks.
+
+    A hashlib `digest`, if given, is fed every block of the copy; returns
+    True when that happened (False for a plain rename).
+    """
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    try:
+        os.replace(src, dest)
+        return False
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+
+    temp = dest + ".part"
+    try:
+        with open(src, "rb") as fin, open(temp, "wb") as fout:
+            while True:
+                if cancelled():
+                    raise yt_dlp.utils.DownloadError("Cancelled by user.")
+                block = fin.read(_MOVE_CHUNK)
+                if not block:
+                    break
+                fout.write(block)
+                if digest is not None:
+                    digest.update(block)
+        os.replace(temp, dest)
+    except BaseException:
+        _remove_quietly(temp)
+        raise
+    _remove_quietly(src)
+    return digest is not None
+
+
+def _claim_path(path: str) -> str:
+    """
+    `path`, or the first free 'name (1).ext', 'name (2).ext', ... when it
+    is taken (as yt-dlp numbers clashing output names).  The name is
+    claimed with an empty placeholder, so concurrent callers never pick
+    the same one; move the real file over it, or remove it on failure.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    stem, ext = os.path.splitext(path)
+    candidate, n = path, 0
+    while True:
+        try:
+            os.close(os.open(candidate, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return candidate
+        except FileExistsError:
+            n += 1
+            candidate = f"{stem} ({n}){ext}"
+
+
+class SpaceReservations:
+    """
+    Pre-flight disk checks shared by every job.  Before its first byte is
+    downloaded a job reserves what it will write on each volume, and holds
+    the reservation until it finishes, so parallel jobs cannot all pass the
+    check against the same free space.
+
+    A job that would not fit even if every other job finished is refused
+    (DiskSpaceError); one that only lacks space other jobs have reserved
+    waits for them.
+    """
+
+    def __init__(self, headroom: int = DISK_HEADROOM) -> None:
+        self._headroom = headroom
+        self._held: Dict[int, Dict[int, int]] = {}     # job id -> {device: bytes}
+        self._lock     = threading.Lock()
+
+    def reserve(
+        self,
+        job_id:    int,
+        needs:     Dict[str, int],
+        cancelled: Callable[[], bool],
+        on_wait:   Callable[[], None],
+    ) -> bool:
+        """
+        Reserve `needs` ({folder: bytes}).  Blocks while deferred, calling
+        on_wait() once; returns False if cancelled meanwhile.
+        """
+        volumes: Dict[int, List] = {}          # device -> [bytes, folder]
+        for folder, size in needs.items():
+            device, probe = _volume(folder)
+            volumes.setdefault(device, [0, probe])[0] += size
+
+        waiting = False
+        while True:
+            with self._lock:
+                fits = True
+                for device, (size, probe) in volumes.items():
+                    free = shutil.disk_usage(probe).free - self._headroom
+                    if size > free:
+                        raise DiskSpaceError(
+                            f"Not enough disk space in {probe}: this download needs "
+                            f"about {_filesize_str(size)}, {_filesize_str(max(0, free))} is free."
+                        )
+                    held = sum(h.get(device, 0) for j, h in self._held.items() if j != job_id)
+                    fits = fits and size <= free - held
+                if fits:
+                    self._held[job_id] = {device: size for device, (size, _) in volumes.items()}
+                    return True
+            if not waiting:
+                waiting = True
+                on_wait()
+            if cancelled():
+                return False
+            time.sleep(_SPACE_RECHECK)
+
+    def release(self, job_id: int) -> None:
+        with self._lock:
+            self._held.pop(job_id, None)
+
+
+# =============================================================================
+#  Job metrics
+# =============================================================================
+METRICS_DIR       = APP_DATA_DIR / "metrics"
+METRICS_MAX_BYTES = 5 * 1024 * 1024    # jobs.jsonl is rotated beyond this size
+METRICS_BACKUPS   = 3                  # rotated files kept: jobs.jsonl.1 .. .3
+_PEAK_WINDOW      = 1.0                # seconds of traffic per peak-throughput sample
+
+# Prometheus families written to the textfile: (name, type, help)
+_PROM_FAMILIES = (
+    ("ytdownload_jobs_total",              "counter", "Finished download jobs by outcome."),
+    ("ytdownload_downloaded_bytes_total",  "counter", "Bytes received by finished jobs."),
+    ("ytdownload_download_seconds_total",  "counter", "Seconds finished jobs spent transferring."),
+    ("ytdownload_fragment_retries_total",  "counter", "Fragment downloads retried by yt-dlp."),
+    ("ytdownload_http_retries_total",      "counter", "Whole-file and byte-range requests retried."),
+    ("ytdownload_job_retries_total",       "counter", "Jobs, extractions and merges started again after an error."),
+    ("ytdownload_backoff_seconds_total",   "counter", "Seconds spent backing off, circuit breaker pauses included."),
+    ("ytdownload_extract_seconds",         "summary", "Format extraction latency."),
+    ("ytdownload_ttfb_seconds",            "summary", "Time from starting a transfer to its first byte."),
+    ("ytdownload_merge_seconds",           "summary", "FFmpeg merge duration."),
+    ("ytdownload_file_bytes",              "summary", "Size of finished output files."),
+    ("ytdownload_last_throughput_bytes",   "gauge",   "Average and peak bytes/s of the last job per host."),
+    ("ytdownload_last_job_timestamp_seconds", "gauge", "Unix time the last job finished."),
+)
+
+
+def _ytdlp_version() -> str:
+    try:
+        return importlib.import_module("yt_dlp.version").__version__
+    except (ImportError, AttributeError):
+        return "unknown"
+
+
+def _host_label(url: str) -> str:
+    """
+    Low-cardinality host label: the last two DNS labels, so per-node CDN
+    names (rr3---sn-abc.googlevideo.com) collapse into one series.
+    """
+    host = _url_host(url)
+    if not host or host.replace(".", "").isdigit() or ":" in host:
+        return host or "unknown"
+    return ".".join(host.split(".")[-2:])
+
+
+class _RetryLogger:
+    """
+    yt-dlp `logger` that reports the downloader's retry notices as
+    on_retry(fragment, throttled).  Everything else is dropped: failures
+    still surface as DownloadError.
+    """
+
+    def __init__(self, on_retry: Callable[[bool, bool], None]) -> None:
+        self._on_retry = on_retry
+
+    def debug(self, msg: str) -> None:
+        # e.g. "[download] Got error: HTTP Error 429 ... Retrying fragment 3 (1/5)..."
+        if "Retrying" in msg:
+            self._on_retry("fragment" in msg, bool(_THROTTLE_RE.search(msg)))
+
+    def info(self, msg: str) -> None:
+        pass
+
+    warning = error = info
+
+
+class JobMetrics:
+    """
+    Timings and counters for one job, filled in while it runs and written
+    out by MetricsRecorder once it finishes.  Durations are seconds,
+    throughput is bytes/s.
+    """
+
+    def __init__(self) -> None:
+        self.queued_at:        float = time.time()
+        self.extractor:        Optional[str] = None
+        self.host:             Optional[str] = None     # first stream's host
+        self.extract_seconds:  Optional[float] = None
+        self.info_reused:      bool  = False            # format list came from a prior fetch
+        self.ttfb_seconds:     Optional[float] = None
+        self.download_seconds: Optional[float] = None
+        self.bytes:            int   = 0
+        self.peak_bps:         float = 0.0
+        self.fragment_retries: int   = 0
+        self.http_retries:     int   = 0
+        self.job_retries:      int   = 0                # whole stage / merge retries
+        self.backoff_seconds:  float = 0.0              # waited before retries and in pauses
+        self.connections:      int   = 1
+        self.final_size:       Optional[int] = None
+        self._started:         Optional[float] = None   # monotonic
+        self._window_at        = 0.0
+        self._window_bytes     = 0
+        self._lock             = threading.Lock()
+
+    def start_download(self) -> None:
+        self._started = self._window_at = time.monotonic()
+
+    def first_byte(self) -> None:
+        if self.ttfb_seconds is None and self._started is not None:
+            self.ttfb_seconds = time.monotonic() - self._started
+
+    def add_bytes(self, nbytes: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.bytes         += nbytes
+            self._window_bytes += nbytes
+            elapsed = now - self._window_at
+            if elapsed >= _PEAK_WINDOW:
+                self.peak_bps      = max(self.peak_bps, self._window_bytes / elapsed)
+                self._window_at    = now
+                self._window_bytes = 0
+
+    def end_download(self) -> None:
+        if self._started is not None and self.download_seconds is None:
+            self.download_seconds = time.monotonic() - self._started
+
+    def count_retry(self, fragment: bool, count: int = 1) -> None:
+        with self._lock:
+            if fragment:
+                self.fragment_retries += count
+            else:
+                self.http_retries     += count
+
+    def count_backoff(self, seconds: float, job_retry: bool = False) -> None:
+        with self._lock:
+            self.backoff_seconds += seconds
+            if job_retry:
+                self.job_retries += 1
+
+    @property
+    def total_retries(self) -> int:
+        return self.fragment_retries + self.http_retries + self.job_retries
+
+    @property
+    def avg_bps(self) -> Optional[float]:
+        if not self.download_seconds:
+            return None
+        return self.bytes / self.download_seconds
+
+
+class MetricsRecorder:
+    """
+    Writes one JSON line per finished job to `<directory>/jobs.jsonl`
+    (rotated by size, like logging.RotatingFileHandler) and keeps
+    `<directory>/ytdownload.prom` up to date for node_exporter's textfile
+    collector.  Prometheus series are labelled by extractor, stream host
+    and yt-dlp version, and count from the start of this process.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_bytes: int = METRICS_MAX_BYTES,
+        backups:   int = METRICS_BACKUPS,
+    ) -> None:
+        self.directory = Path(directory) if directory else METRICS_DIR
+        self.jsonl     = self.directory / "jobs.jsonl"
+        self.prom      = self.directory / "ytdownload.prom"
+        self._max      = max_bytes
+        self._backups  = max(1, backups)
+        self._lock     = threading.Lock()
+        self._version  = None
+        # family -> {(suffix, labels): value}
+        self._samples: Dict[str, Dict[tuple, float]] = {name: {} for name, _, _ in _PROM_FAMILIES}
+
+    @property
+    def ytdlp_version(self) -> str:
+        if self._version is None:
+            self._version = _ytdlp_version()
+        return self._version
+
+    def observe_extract(self, extractor: Optional[str], seconds: float) -> None:
+        """Record one format extraction (also those never downloaded)."""
+        labels = (("extractor", extractor or "unknown"), ("ytdlp_version", self.ytdlp_version))
+        with self._lock:
+            self._observe("ytdownload_extract_seconds", labels, seconds)
+            try:
+                self._write_prom()
+            except OSError:
+                pass    # metrics are best effort; never fail an extraction over them
+
+    def record(self, job: "DownloadJob") -> None:
+        """Append the job's row and fold it into the Prometheus totals."""
+        row = self.row(job)
+        base = (
+            ("extractor",     row["extractor"] or "unknown"),
+            ("host",          row["host"] or "unknown"),
+            ("ytdlp_version", row["ytdlp_version"]),
+        )
+        with self._lock:
+            self._add("ytdownload_jobs_total", base + (("state", row["state"]),), 1)
+            self._add("ytdownload_downloaded_bytes_total", base, row["bytes"])
+            self._add("ytdownload_download_seconds_total", base, row["download_seconds"] or 0)
+            self._add("ytdownload_fragment_retries_total", base, row["fragment_retries"])
+            self._add("ytdownload_http_retries_total", base, row["http_retries"])
+            self._add("ytdownload_job_retries_total", base, row["job_retries"])
+            self._add("ytdownload_backoff_seconds_total", base, row["backoff_seconds"])
+            if row["ttfb_seconds"] is not None:
+                self._observe("ytdownload_ttfb_seconds", base, row["ttfb_seconds"])
+            if row["merge_seconds"] is not None:
+                self._observe("ytdownload_merge_seconds", base, row["merge_seconds"])
+            if row["file_size"] is not None:
+                self._observe("ytdownload_file_bytes", base, row["file_size"])
+            if row["avg_bps"] is not None:
+                gauges = self._samples["ytdownload_last_throughput_bytes"]
+                gauges[("", base + (("kind", "avg"),))]  = row["avg_bps"]
+                gauges[("", base + (("kind", "peak"),))] = row["peak_bps"]
+            self._samples["ytdownload_last_job_timestamp_seconds"][("", ())] = row["ts"]
+            try:
+                self._append(json.dumps(row, ensure_ascii=False) + "\n")
+                self._write_prom()
+            except OSError:
+                pass    # metrics are best effort; never fail a download over them
+
+    def row(self, job: "DownloadJob") -> dict:
+        m = job.metrics
+        return {
+            "ts":               round(time.time(), 3),
+            "uid":              job.uid,
+            "url":              job.url,
+            "state":            job.state,
+            "extractor":        m.extractor,
+            "host":             m.host,
+            "ytdlp_version":    self.ytdlp_version,
+            "format_id":        job.format_id,
+            "height":           job.height,
+            "connections":      m.connections,
+            "extract_seconds":  _round(m.extract_seconds),
+            "info_reused":      m.info_reused,
+            "ttfb_seconds":     _round(m.ttfb_seconds),
+            "download_seconds": _round(m.download_seconds),
+            "bytes":            m.bytes,
+            "avg_bps":          _round(m.avg_bps, 1),
+            "peak_bps":         round(max(m.peak_bps, m.avg_bps or 0), 1),
+            "fragment_retries": m.fragment_retries,
+            "http_retries":     m.http_retries,
+            "job_retries":      m.job_retries,
+            "backoff_seconds":  round(m.backoff_seconds, 3),
+            "merge_mode":       job.merge_mode,
+            "merge_seconds":    _round(job.merge_seconds),
+            "file_size":        m.final_size,
+            "total_seconds":    round(time.time() - m.queued_at, 3),
+        }
+
+    # -- Internals (hold self._lock) --------------------------------------------
+    def _add(self, family: str, labels: tuple, value: float) -> None:
+        samples = self._samples[family]
+        samples[("", labels)] = samples.get(("", labels), 0) + value
+
+    def _observe(self, family: str, labels: tuple, value: float) -> None:
+        samples = self._samples[family]
+        samples[("_sum", labels)]   = samples.get(("_sum", labels), 0) + value
+        samples[("_count", labels)] = samples.get(("_count", labels), 0) + 1
+
+    def _append(self, line: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            size = self.jsonl.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(line) > self._max:
+            for index in range(self._backups - 1, 0, -1):
+                older = self.jsonl.with_name(f"{self.jsonl.name}.{index}")
+                if older.exists():
+                    os.replace(older, self.jsonl.with_name(f"{self.jsonl.name}.{index + 1}"))
+            os.replace(self.jsonl, self.jsonl.with_name(f"{self.jsonl.name}.1"))
+        with open(self.jsonl, "a", encoding="utf-8") as fh:
+            fh.write(line)
+
+    def _write_prom(self) -> None:
+        lines = []
+        for family, kind, help_text in _PROM_FAMILIES:
+            samples = self._samples[family]
+            if not samples:
+                continue
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            for (suffix, labels), value in sorted(samples.items()):
+                lines.append(f"{family}{suffix}{_prom_labels(labels)} {float(value)!r}")
+        # The collector may read at any moment: write aside, then rename
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.prom.with_suffix(".prom.tmp")
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp, self.prom)
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+def _prom_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="' + str(val).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, val in labels
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+# =============================================================================
+#  Download jobs
+# =============================================================================
+JOB_QUEUED    = "queued"
+JOB_RUNNING   = "running"
+JOB_MERGING   = "merging"      # streams downloaded, waiting for / in the merge pool
+JOB_DONE      = "done"
+JOB_FAILED    = "failed"
+JOB_CANCELLED = "cancelled"
+
+
+class FetchError(Exception):
+    """Format extraction finished but produced nothing usable."""
+
+
+DEFAULT_WORKERS = 3          # parallel downloads out of the box
+MAX_WORKERS     = 8          # upper bound offered in the UI
+_IDLE_TIMEOUT   = 2.0        # seconds an idle worker waits before exiting
+STOP_TIMEOUT    = 5.0        # seconds stop() waits for running jobs to let go
+_EXTRACT_TIMES_KEPT = 256    # extraction latencies remembered for later jobs
+
+
+class DownloadJob:
+    """
+    One queued download.
+    Every job owns its own ID, cancel token and state, so several jobs can
+    run side by side without resetting each other's cancel flag.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        url:         str,
+        format_id:   str,
+        height:      int,
+        output_dir:  str,
+        on_progress: Optional[Callable] = None,
+        on_status:   Optional[Callable] = None,
+        on_done:     Optional[Callable] = None,
+        on_error:    Optional[Callable] = None,
+        title:       str = "",
+        info:        Optional[dict] = None,
+        uid:         Optional[str] = None,
+        priority:    str = PRIORITY_NORMAL,
+        rate_limit:  float = 0,
+    ) -> None:
+        self.id          = next(DownloadJob._ids)
+        self.uid         = uid or uuid.uuid4().hex   # stable across restarts (journal key)
+        self.url         = url
+        self.format_id   = format_id
+        self.height      = height
+        self.output_dir  = output_dir
+        self.title       = title or url
+        self.info        = info      # extract_info() result to reuse, if any
+        self.priority    = priority  # PRIORITY_* class for the bandwidth scheduler
+        self.rate_limit  = rate_limit    # bytes/s cap for this job, 0 = none
+        # Callbacks may be (re)bound by the caller before the job is submitted
+        self.on_progress = on_progress or (lambda pct, label: None)
+        self.on_status   = on_status   or (lambda msg, color=ACCENT: None)
+        self.on_done     = on_done     or (lambda: None)
+        self.on_error    = on_error    or (lambda msg: None)
+
+        self.state   = JOB_QUEUED
+        self.percent = 0
+        self.label   = "Queued"
+
+        # Merge bookkeeping, filled in by the merge stage
+        self.merge_mode:    Optional[str]   = None    # MERGE_COPY / MERGE_TRANSCODE
+        self.merge_seconds: Optional[float] = None
+
+        # Files this job writes (streams and their .part / fragment temps)
+        self.work_dir:   Optional[str] = None     # output_dir, or its scratch folder
+        self.final_path: Optional[str] = None
+        self.files:      set           = set()
+        # What went into the finished file, for its sidecar manifest
+        self.streams:    List[dict]    = []       # one entry per downloaded stream
+        self.sha256:     Optional[str] = None
+        self.hashed:     Dict[str, tuple] = {}    # file -> (sha256, size, mtime_ns), hashed while written
+        self.metrics     = JobMetrics()
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """Signal this job (and only this job) to abort."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+# =============================================================================
+#  Progress channel
+# =============================================================================
+PROGRESS_FPS = 10            # UI progress refreshes per second
+
+
+class ProgressChannel:
+    """
+    Latest-value mailbox between download workers and the UI.
+
+    Workers publish() as often as yt-dlp reports a chunk; only the newest
+    (pct, label) per job is kept.  The consumer drain()s at its own fixed
+    rate, so UI work stays constant no matter how fast the downloads run.
+    """
+
+    def __init__(self) -> None:
+        self._latest: Dict[int, tuple] = {}
+        self._lock   = threading.Lock()
+
+    def publish(self, job_id: int, pct: int, label: str) -> None:
+        with self._lock:
+            self._latest[job_id] = (pct, label)
+
+    def discard(self, job_id: int) -> None:
+        """Forget a pending update (e.g. once the job has finished)."""
+        with self._lock:
+            self._latest.pop(job_id, None)
+
+    def drain(self) -> Dict[int, tuple]:
+        """Return and clear every pending update: {job_id: (pct, label)}."""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        return latest
+
+
+# =============================================================================
+#  Reusable YoutubeDL instances
+# =============================================================================
+# Options each profile's instances are built with.  Per-use options (format,
+# output template, hooks, logger, throttling) are passed to lease() instead;
+# anything yt-dlp only reads at construction (cookies, proxy, headers)
+# belongs in a profile.
+YDL_PROFILES: Dict[str, dict] = {
+    "extract": {
+        "quiet":         True,
+        "no_warnings":   True,
+        "skip_download": True,
+        "noplaylist":    True,   # watch?v=X&list=Y -> just video X
+        "retry_sleep_functions": {"extractor": _TRANSFER_RETRY.sleep_function},
+    },
+    "playlist": {
+        "quiet":         True,
+        "no_warnings":   True,
+        "skip_download": True,
+        "extract_flat":  "in_playlist",
+        "lazy_playlist": True,
+    },
+    "download": {
+        "quiet":               True,
+        "no_warnings":         True,
+        "noprogress":          True,    # hooks report progress; keep stdout clean
+        "merge_output_format": "mp4",   # merged file -> .mp4
+        # Back off between yt-dlp's own HTTP / fragment retries instead of
+        # retrying at once; a job that still fails is retried as a whole
+        "retries":             _TRANSFER_RETRY.attempts,
+        "fragment_retries":    _TRANSFER_RETRY.attempts,
+        "retry_sleep_functions": {
+            kind: _TRANSFER_RETRY.sleep_function for kind in ("http", "fragment", "file_access")
+        },
+    },
+}
+
+_YDL_KEEP         = MAX_WORKERS + 1   # idle instances kept per profile
+_YDL_IDLE_TIMEOUT = 300.0             # seconds a spare idle instance survives
+
+
+class _PooledYDL:
+    """A pooled YoutubeDL, its profile's options and the current lease's hooks."""
+
+    def __init__(self, profile: str) -> None:
+        self.profile    = profile
+        self.hooks: List[Callable[[dict], None]] = []
+        self.ydl        = yt_dlp.YoutubeDL(dict(YDL_PROFILES[profile]))
+        self.params     = self.ydl.params     # as normalised by YoutubeDL.__init__
+        self.idle_since = time.monotonic()
+        self.ydl.add_progress_hook(self._dispatch)
+
+    def _dispatch(self, d: dict) -> None:
+        for hook in self.hooks:
+            hook(d)
+
+    def close(self) -> None:
+        try:
+            self.ydl.close()
+        except Exception:
+            pass
+
+
+class YoutubeDLPool:
+    """
+    Long-lived YoutubeDL instances, kept per option profile (YDL_PROFILES)
+    and reused by fetches, playlist listings and downloads.  Reuse keeps
+    extractor instances, the cookie jar, HTTP handlers with their open
+    connections and yt-dlp's player / signature caches across calls.
+
+    An instance serves one lease at a time.  lease() lays the caller's
+    options over the profile's (rebuilding the format selector yt-dlp
+    compiles at construction) and routes progress hooks through a
+    per-lease list; both are reset when the lease ends.  An instance whose
+    lease raised is closed rather than reused, so a cancelled or failed
+    download cannot leak state into the next one.
+    """
+
+    def __init__(self, keep: int = _YDL_KEEP, idle_timeout: float = _YDL_IDLE_TIMEOUT) -> None:
+        self._keep         = keep
+        self._idle_timeout = idle_timeout
+        self._idle: Dict[str, List[_PooledYDL]] = {}
+        self._lock         = threading.Lock()
+
+    @contextlib.contextmanager
+    def lease(self, profile: str, opts: Optional[dict] = None) -> Iterator["yt_dlp.YoutubeDL"]:
+        """Borrow an instance of `profile` with `opts` applied on top."""
+        opts   = dict(opts or {})
+        pooled = self._acquire(profile)
+        pooled.hooks = list(opts.pop("progress_hooks", ()))
+        params = {**pooled.params, **opts}
+        if isinstance(opts.get("outtmpl"), str):
+            params["outtmpl"] = {**pooled.params["outtmpl"], "default": opts["outtmpl"]}
+        ydl = pooled.ydl
+        ydl.params = params
+        if "format" in opts:
+            ydl.format_selector = ydl.build_format_selector(opts["format"])
+        try:
+            yield ydl
+        except BaseException:
+            pooled.close()
+            raise
+        self._release(pooled)
+
+    def warm(self, profiles: Tuple[str, ...] = ("extract", "download")) -> None:
+        """
+        Build one instance per profile ahead of the first lease, with the
+        YouTube extractor set up.  Blocking; call from a background thread.
+        """
+        for profile in profiles:
+            with self._lock:
+                if self._idle.get(profile):
+                    continue
+            try:
+                pooled = _PooledYDL(profile)
+            except Exception:
+                continue    # the first lease builds one instead
+            try:
+                pooled.ydl.get_info_extractor("Youtube").initialize()
+                pooled.ydl.cookiejar
+            except Exception:
+                pass        # warming is best effort
+            self._release(pooled)
+
+    def _acquire(self, profile: str) -> _PooledYDL:
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle.setdefault(profile, [])
+            # Oldest first; the most recently used instance always survives
+            stale = [p for p in idle[:-1] if now - p.idle_since > self._idle_timeout]
+            idle[:] = [p for p in idle if p not in stale]
+            pooled = idle.pop() if idle else None
+        for old in stale:
+            old.close()
+        return pooled or _PooledYDL(profile)
+
+    def _release(self, pooled: _PooledYDL) -> None:
+        ydl = pooled.ydl
+        ydl.params          = pooled.params
+        ydl.format_selector = None
+        pooled.hooks        = []
+        pooled.idle_since   = time.monotonic()
+        with self._lock:
+            idle = self._idle.setdefault(pooled.profile, [])
+            if len(idle) < self._keep:
+                idle.append(pooled)
+                return
+        pooled.close()
+
+
+_ydl_pool = YoutubeDLPool()
+
+
+# =============================================================================
+#  Isolated worker processes
+# =============================================================================
+_PROCESS_IDLE_TIMEOUT = 60.0     # seconds an idle worker process is kept warm
+_KILL_GRACE           = 2.0      # seconds between SIGTERM and SIGKILL on cancel
+_RELAY_POLL           = 0.1      # how often a waiting task checks its cancel flag
+_TASK_CANCELLED       = "cancelled"
+
+# Progress-hook fields the download stage forwards (the rest, notably
+# info_dict, is large and cannot cross a pipe)
+_HOOK_KEYS = (
+    "status", "filename", "tmpfilename", "downloaded_bytes", "total_bytes",
+    "total_bytes_estimate", "speed", "eta", "ranged", "resumed_bytes", "connections",
+)
+
+
+class _WorkerError(Exception):
+    """A task failed in, or was cancelled out of, a worker process."""
+
+    def __init__(self, kind: str, message: str) -> None:
+        super().__init__(message)
+        self.kind    = kind        # JOB_FAILED / JOB_CANCELLED, or an extract error kind
+        self.message = message
+
+
+def _task_failure(task: str, exc: Exception) -> Tuple[str, str]:
+    """
+    (kind, message) for an exception raised by a "download" or "extract"
+    task.  Call from inside the except block (the traceback is included).
+    """
+    if isinstance(exc, FetchError):
+        return "fetch", str(exc)
+    # process_ie_result() raises ExtractorError directly (extract_info wraps it)
+    if isinstance(exc, (yt_dlp.utils.DownloadError, yt_dlp.utils.ExtractorError)):
+        msg = str(exc)
+        if task != "download":
+            return "ytdlp", msg
+        if "Cancelled" in msg:
+            return JOB_CANCELLED, msg
+        return JOB_FAILED, f"Download failed:\n{msg}"
+    detail = f"Unexpected error: {exc}\n\n{traceback.format_exc()}"
+    return (JOB_FAILED if task == "download" else "unexpected"), detail
+
+
+def _extract_formats(url: str) -> Tuple[List[FormatRecord], dict]:
+    """Extract one URL's info (no download) and its dropdown format list."""
+    with _ydl_pool.lease("extract") as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    # Guard: info is None for private / deleted / unavailable videos
+    if not info:
+        raise FetchError("Could not retrieve video info.\nThe video may be private or unavailable.")
+    return _collect_formats(info), info
+
+
+def _worker_process_main(conn) -> None:
+    """
+    Entry point of an isolated worker process: run ("extract", url) and
+    ("download", {"job": ..., "spec": ...}) tasks until the pipe closes.
+    Events are sent one at a time and wait for the parent's acknowledgement.
+    """
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()        # own process group, so a hard cancel also reaches ffmpeg
+    lock = threading.Lock()
+    # Warm this process's YoutubeDL instances while it waits for its first task
+    threading.Thread(target=_ydl_pool.warm, name="warm-ydl", daemon=True).start()
+
+    def emit(event: str, *args) -> None:
+        with lock:
+            conn.send(("event", event, args))
+            conn.recv()
+
+    while True:
+        try:
+            task, payload = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            if task == "extract":
+                formats, info = _extract_formats(payload)
+                result = (formats, yt_dlp.YoutubeDL.sanitize_info(_slim_info(info)))
+            else:
+                job = DownloadJob(
+                    **payload["job"],
+                    on_status=lambda msg, color=ACCENT: emit("status", msg, color),
+                )
+                result = DownloadManager._download_stage(job, payload["spec"], emit)
+            conn.send(("result", result))
+        except Exception as exc:
+            conn.send(("error", *_task_failure(task, exc)))
+
+
+class _WorkerProcess:
+    """One spawned worker process and the parent's end of its pipe."""
+
+    def __init__(self, ctx) -> None:
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_process_main, args=(child,), name="ytdl-worker", daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.idle_since = time.monotonic()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        """Stop the process and everything it started (ffmpeg) within ~2 x _KILL_GRACE."""
+        pid = self.process.pid
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        else:
+            for sig, grace in ((signal.SIGTERM, _KILL_GRACE), (signal.SIGKILL, 0)):
+                try:
+                    os.killpg(pid, sig)
+                except OSError:         # group not set up yet, or already gone
+                    if self.process.is_alive():
+                        os.kill(pid, sig)
+                self.process.join(grace)
+        self.process.join(_KILL_GRACE)
+        self.conn.close()
+
+
+class WorkerProcessPool:
+    """
+    Reusable worker processes for isolated mode.  yt-dlp runs outside the
+    caller's process, so it does not compete with the UI for the GIL, and a
+    task can be cancelled at any point -- mid-extraction too -- by killing
+    its process.  Idle processes stay warm for _PROCESS_IDLE_TIMEOUT, so the
+    yt-dlp import is paid once per process rather than once per task.
+    """
+
+    def __init__(self, keep: int = DEFAULT_WORKERS + 1) -> None:
+        import multiprocessing      # only needed once isolated mode is used
+        self._ctx   = multiprocessing.get_context("spawn")    # no fork() under Tk threads
+        self._keep  = keep
+        self._idle: List[_WorkerProcess] = []
+        self._busy: set = set()
+        self._lock  = threading.Lock()
+
+    def set_keep(self, keep: int) -> None:
+        """Number of idle processes kept warm; surplus ones are stopped."""
+        with self._lock:
+            self._keep = keep
+            surplus, self._idle = self._idle[keep:], self._idle[:keep]
+        for worker in surplus:
+            worker.kill()
+
+    def run(
+        self,
+        task:      tuple,
+        on_event:  Optional[Callable] = None,
+        cancelled: Callable[[], bool] = lambda: False,
+    ):
+        """
+        Run one task in a worker process and return its result.  Events are
+        passed to on_event(event, *args) on this thread.  Raises _WorkerError
+        when the task fails, is cancelled or its process dies.
+        """
+        worker = self._acquire()
+        try:
+            worker.conn.send(task)
+            while True:
+                if cancelled():
+                    raise _WorkerError(_TASK_CANCELLED, "Cancelled by user.")
+                if not worker.conn.poll(_RELAY_POLL):
+                    continue
+                message = worker.conn.recv()
+                if message[0] == "event":
+                    if on_event is not None:
+                        on_event(message[1], *message[2])
+                    worker.conn.send(("ack",))
+                    continue
+                self._release(worker)
+                worker = None
+                if message[0] == "result":
+                    return message[1]
+                raise _WorkerError(message[1], message[2])
+        except (EOFError, OSError):
+            code = worker.process.exitcode if worker else None
+            raise _WorkerError(JOB_FAILED, f"Worker process exited unexpectedly (code {code}).")
+        finally:
+            if worker is not None:      # cancelled, crashed, or the event handler raised
+                with self._lock:
+                    self._busy.discard(worker)
+                worker.kill()
+
+    def shutdown(self) -> None:
+        """Kill every worker process, busy or idle."""
+        with self._lock:
+            workers, self._idle, self._busy = self._idle + list(self._busy), [], set()
+        for worker in workers:
+            worker.kill()
+
+    def _acquire(self) -> _WorkerProcess:
+        stale = []
+        with self._lock:
+            now = time.monotonic()
+            keep = [w for w in self._idle if w.alive and now - w.idle_since < _PROCESS_IDLE_TIMEOUT]
+            stale, self._idle = [w for w in self._idle if w not in keep], keep
+            worker = self._idle.pop() if self._idle else None
+        for old in stale:
+            old.kill()
+        worker = worker or _WorkerProcess(self._ctx)
+        with self._lock:
+            self._busy.add(worker)
+        return worker
+
+    def _release(self, worker: _WorkerProcess) -> None:
+        worker.idle_since = time.monotonic()
+        with self._lock:
+            self._busy.discard(worker)
+            if len(self._idle) < self._keep:
+                self._idle.append(worker)
+                return
+        worker.kill()
+
+
+# =============================================================================
+#  DownloadManager
+# =============================================================================
+class DownloadManager:
+    """
+    All yt-dlp interactions live here.
+    Heavy work runs in daemon threads; results come back via callbacks
+    so the Tkinter main loop never blocks.
+
+    Downloads go through a FIFO job queue served by a bounded worker pool.
+    Workers are spawned on demand up to `max_workers` and exit again after
+    sitting idle for a couple of seconds.
+
+    Merging is a separate pipeline stage: a download worker hands the
+    finished streams to a CPU-sized merge pool and immediately picks up the
+    next job, so job N merges while job N+1 downloads.
+
+    Each stream may use several connections (`connections`, see
+    RangedDownload); in auto mode the count a host settled on is reused
+    as the fragment concurrency for DASH/HLS streams from that host.
+
+    With `isolated` set, extraction and the download stage run in
+    WorkerProcessPool processes instead of threads, so cancelling kills
+    yt-dlp outright rather than waiting for its next progress hook.
+
+    Transient failures of an extraction, a job's download stage or a merge
+    are retried under `retry` (RetryPolicy); throttling errors feed the
+    per-site `breaker` (CircuitBreaker), which holds every job for that
+    site while its circuit is open.
+
+    Every finished file gets a SHA-256 and a '<file>.manifest.json'
+    sidecar (formats, sizes, hash).  With `dedupe` on, a file whose hash
+    is already in `hashes` (HashIndex) on the same volume is replaced by a
+    hardlink to the existing copy.
+    """
+
+    def __init__(
+        self,
+        max_workers:   int = DEFAULT_WORKERS,
+        cache:         Optional[MetadataCache] = None,
+        merge_workers: int = MERGE_WORKERS,
+        journal:       Optional[JobJournal] = None,
+        connections:   int = CONNECTIONS_AUTO,
+        archive:       Optional[DownloadArchive] = None,
+        rate_limit:    float = 0,
+        metrics:       Optional[MetricsRecorder] = None,
+        isolated:      bool = False,
+        scratch_dir:   Optional[str] = None,
+        hashes:        Optional[HashIndex] = None,
+        dedupe:        bool = True,
+    ) -> None:
+        self.cache               = cache or MetadataCache()
+        self.journal             = journal or JobJournal()
+        self.archive             = archive if archive is not None else DownloadArchive()   # an empty one is falsy
+        self.bandwidth           = BandwidthScheduler(rate_limit)
+        self.metrics             = metrics or MetricsRecorder()
+        self.space               = SpaceReservations()
+        self.retry               = RetryPolicy()
+        self.breaker             = CircuitBreaker()
+        self.hashes              = hashes or HashIndex()
+        self.dedupe              = dedupe      # hardlink files already stored elsewhere
+        self._scratch_dir        = scratch_dir or None
+        self._merge_pool   = ThreadPoolExecutor(
+            max_workers=max(1, merge_workers), thread_name_prefix="merge",
+        )
+        self._ffmpeg_threads = _ffmpeg_thread_budget(merge_workers)
+        self._jobs:        Dict[int, DownloadJob] = {}
+        self._queue:       "queue.Queue[DownloadJob]" = queue.Queue()
+        self._lock         = threading.Lock()
+        self._max_workers  = max(1, min(max_workers, MAX_WORKERS))
+        self._workers      = 0
+        self._idle         = 0     # workers blocked on the queue, ready for a job
+        self._connections  = max(0, min(connections, MAX_CONNECTIONS))
+        self._host_connections: Dict[str, int] = {}    # learned by RangedDownload
+        self._extract_seconds:  "OrderedDict[str, float]" = OrderedDict()   # video key -> latency
+        self._isolated     = False
+        self._processes:   Optional[WorkerProcessPool] = None
+        self._stopping     = False     # set by stop(): unfinished jobs stay resumable
+        self._halted:      set = set()     # IDs of jobs stop() interrupted
+        if isolated:
+            self.set_isolated(True)
+
+    # -- Queue / pool management ----------------------------------------------
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def set_max_workers(self, count: int) -> None:
+        """
+        Resize the worker pool.  Growing takes effect immediately; surplus
+        workers finish their current job and then exit.
+        """
+        with self._lock:
+            self._max_workers = max(1, min(count, MAX_WORKERS))
+        if self._processes is not None and self._isolated:
+            self._processes.set_keep(self._max_workers + 1)
+        self._spawn_workers()
+
+    @property
+    def scratch_dir(self) -> Optional[str]:
+        return self._scratch_dir
+
+    def set_scratch_dir(self, path: Optional[str]) -> None:
+        """
+        Fast local folder for streams, fragments and merging (None: write in
+        the output folder).  Applies to jobs that start after the change.
+        """
+        self._scratch_dir = path or None
+
+    @property
+    def isolated(self) -> bool:
+        """Whether yt-dlp runs in worker processes (see WorkerProcessPool)."""
+        return self._isolated
+
+    def set_isolated(self, enabled: bool) -> None:
+        """
+        Applies to fetches and downloads that start after the call; tasks
+        already running in a worker process finish there.
+        """
+        with self._lock:
+            if enabled and self._processes is None:
+                self._processes = WorkerProcessPool(keep=self._max_workers + 1)
+            self._isolated = enabled
+        if self._processes is not None:
+            self._processes.set_keep(self._max_workers + 1 if enabled else 0)
+
+    def shutdown(self) -> None:
+        """Cancel every job and kill any worker processes (for a hard exit)."""
+        self.cancel()
+        if self._processes is not None:
+            self._processes.shutdown()
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> List[DownloadJob]:
+        """
+        Halt for a restart.  Unlike shutdown(), unfinished jobs are not
+        finished as cancelled: they keep their partial files and stay
+        interrupted in the journal, so resume_interrupted() continues them.
+        Waits up to `timeout` for running jobs to let go, then kills any
+        worker processes.  Returns the jobs left unfinished.
+        """
+        self._stopping = True
+        unfinished = self.active_jobs()
+        for job in unfinished:
+            job.cancel()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                busy = [
+                    job for job in unfinished
+                    if job.state in (JOB_RUNNING, JOB_MERGING) and job.id not in self._halted
+                ]
+            if not busy:
+                break
+            time.sleep(0.05)
+        if self._processes is not None:
+            self._processes.shutdown()
+        return unfinished
+
+    @property
+    def connections(self) -> int:
+        """Connections per stream; CONNECTIONS_AUTO (0) adapts to throughput."""
+        return self._connections
+
+    def set_connections(self, count: int) -> None:
+        """Applies to streams that start downloading after the call."""
+        self._connections = max(0, min(count, MAX_CONNECTIONS))
+
+    def set_rate_limit(self, rate: Optional[float]) -> None:
+        """Global bandwidth cap in bytes/s shared by all jobs (0 or None = unlimited)."""
+        self.bandwidth.set_rate_limit(rate)
+
+    def set_job_rate_limit(self, job_id: int, rate: float) -> None:
+        """Per-job cap in bytes/s (0 = none); applies immediately if it is downloading."""
+        job = self.get_job(job_id)
+        if job is not None:
+            job.rate_limit = max(0.0, float(rate))
+            self.bandwidth.update(job)
+
+    def set_job_priority(self, job_id: int, priority: str) -> None:
+        job = self.get_job(job_id)
+        if job is not None and priority in PRIORITY_WEIGHTS:
+            job.priority = priority
+            self.bandwidth.update(job)
+
+    def _fragment_connections(self, url: str) -> int:
+        if self._connections != CONNECTIONS_AUTO:
+            return self._connections
+        with self._lock:
+            return self._host_connections.get(_url_host(url), FRAGMENT_CONNECTIONS)
+
+    def jobs(self) -> List[DownloadJob]:
+        """Snapshot of every known job, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get_job(self, job_id: int) -> Optional[DownloadJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_jobs(self) -> List[DownloadJob]:
+        return [job for job in self.jobs() if not job.finished]
+
+    def clear_finished(self) -> None:
+        """Drop finished / failed / cancelled jobs from the registry."""
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished]:
+                del self._jobs[job_id]
+
+    def cancel(self, job_id: Optional[int] = None) -> None:
+        """Cancel one job by ID, or every unfinished job when job_id is None."""
+        if job_id is not None:
+            job = self.get_job(job_id)
+            if job is not None:
+                job.cancel()
+            return
+        for job in self.active_jobs():
+            job.cancel()
+
+    def _spawn_workers(self) -> None:
+        with self._lock:
+            # Busy workers do not count: only idle ones will pick up queued jobs
+            waiting = self._queue.qsize() - self._idle
+            missing = min(self._max_workers - self._workers, waiting)
+            for _ in range(max(0, missing)):
+                self._workers += 1
+                threading.Thread(target=self._worker_loop, daemon=True).start()
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._lock:
+                if self._workers > self._max_workers:   # pool was shrunk
+                    self._workers -= 1
+                    return
+            with self._lock:
+                self._idle += 1
+            try:
+                job = self._queue.get(timeout=_IDLE_TIMEOUT)
+            except queue.Empty:
+                with self._lock:
+                    self._idle -= 1
+                    # Re-check under the lock so a job queued right now is not stranded
+                    if self._queue.empty():
+                        self._workers -= 1
+                        return
+                continue
+            with self._lock:
+                self._idle -= 1
+            try:
+                self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    # -- Fetch available formats ----------------------------------------------
+    def fetch_formats(
+        self,
+        url:        str,
+        on_success: Callable,
+        on_error:   Callable,
+        use_cache:  bool = True,
+    ) -> threading.Event:
+        """
+        Extract format list without downloading anything.
+        Calls on_success(formats, info) or on_error(msg).
+
+        Results are served from / stored in self.cache unless use_cache is
+        False.  On a cache hit whose stream URLs have expired, `info` is only
+        the lightweight summary (title, duration, thumbnail).
+
+        Returns an Event; set it to cancel.  Neither callback runs after
+        that, and with isolated workers the extraction process is killed.
+        """
+        cancel = threading.Event()
+
+        def _worker() -> None:
+            try:
+                result = self.extract_formats(url, use_cache=use_cache, cancelled=cancel.is_set)
+            except FetchError as exc:
+                msg = str(exc)
+            except yt_dlp.utils.DownloadError as exc:
+                msg = f"yt-dlp error:\n{exc}"
+            except Exception as exc:
+                msg = f"Unexpected error: {exc}\n\n{traceback.format_exc()}"
+            else:
+                if not cancel.is_set():
+                    on_success(*result)
+                return
+            if not cancel.is_set():
+                on_error(msg)
+
+        threading.Thread(target=_worker, daemon=True).start()
+        return cancel
+
+    def extract_formats(
+        self,
+        url:       str,
+        use_cache: bool = True,
+        cancelled: Callable[[], bool] = lambda: False,
+    ) -> tuple:
+        """
+        Blocking core of fetch_formats(): return (formats, info).
+        Raises FetchError or yt_dlp.utils.DownloadError.  With isolated
+        workers, `cancelled` turning true kills the extraction (FetchError).
+
+        Transient failures are retried under self.retry; while the site's
+        circuit breaker is open the call waits before extracting.
+        """
+        if use_cache:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+
+        host    = _host_label(url)
+        retries = 0
+        while True:
+            if not self.breaker.wait(host, cancelled, lambda left: None):
+                raise FetchError("Cancelled by user.")
+            started = time.monotonic()
+            try:
+                formats, info = self._extract_once(url, cancelled)
+                break
+            except (FetchError, yt_dlp.utils.DownloadError) as exc:
+                reason = None if cancelled() else _retry_reason(exc)
+                if reason is None or retries >= self.retry.attempts:
+                    raise
+                retries += 1
+                if reason == RETRY_THROTTLED:
+                    self.breaker.record_throttle(host)
+                if _sleep_unless(cancelled, self.retry.delay(retries)):
+                    raise
+        self.breaker.record_success(host)
+        self._remember_extract(url, info, time.monotonic() - started)
+
+        if formats:
+            self.cache.put(url, formats, info)
+        return formats, info
+
+    def _extract_once(self, url: str, cancelled: Callable[[], bool]) -> Tuple[List[FormatRecord], dict]:
+        if not self._isolated:
+            return _extract_formats(url)
+        try:
+            return self._processes.run(("extract", url), cancelled=cancelled)
+        except _WorkerError as exc:
+            if exc.kind == "ytdlp":
+                raise yt_dlp.utils.DownloadError(exc.message) from None
+            raise FetchError(exc.message) from None
+
+    def _remember_extract(self, url: str, info: dict, seconds: float) -> None:
+        """Keep an extraction's latency for the job that later reuses its info."""
+        self.metrics.observe_extract(info.get("extractor_key"), seconds)
+        with self._lock:
+            self._extract_seconds[_video_key(url)] = seconds
+            while len(self._extract_seconds) > _EXTRACT_TIMES_KEPT:
+                self._extract_seconds.popitem(last=False)
+
+    # -- Playlists / channels -------------------------------------------------
+    def iter_playlist(self, url: str, _depth: int = 0) -> Iterator[Dict]:
+        """
+        Lazily yield the entries of a playlist or channel as small dicts
+        {url, title, index, playlist}.
+
+        Uses a flat listing (extract_flat) without processing, so entries are
+        produced page by page as the extractor fetches them; nothing is
+        resolved up front and nothing but the current page is held in memory.
+        A URL that turns out to be a single video yields just itself.
+        """
+        with _ydl_pool.lease("playlist") as ydl:
+            result = ydl.extract_info(url, download=False, process=False)
+
+            # Follow redirects (e.g. channel root -> its /videos tab)
+            hops = 0
+            while result and result.get("_type") in ("url", "url_transparent") and hops < 5:
+                result = ydl.extract_info(
+                    result["url"], download=False, process=False,
+                    ie_key=result.get("ie_key"),
+                )
+                hops += 1
+
+            if not result:
+                raise FetchError("Could not retrieve playlist info.\nIt may be private or unavailable.")
+
+            if result.get("_type") not in ("playlist", "multi_video"):
+                yield {"url": url, "title": result.get("title") or "", "index": 1, "playlist": ""}
+                return
+
+            playlist_title = result.get("title") or ""
+            for index, entry in enumerate(result.get("entries") or (), 1):
+                if not entry:
+                    continue
+                entry_url = entry.get("url") or entry.get("webpage_url")
+                if not entry_url:
+                    continue
+                # Channel roots list their tabs (Videos, Shorts, Live) as nested playlists
+                if entry.get("_type") == "playlist" or (
+                    _depth < 2 and _is_playlist_url(entry_url)
+                ):
+                    yield from self.iter_playlist(entry_url, _depth + 1)
+                    continue
+                yield {
+                    "url":      entry_url,
+                    "title":    entry.get("title") or "",
+                    "index":    index,
+                    "playlist": playlist_title,
+                }
+
+    def queue_playlist(
+        self,
+        url:           str,
+        output_dir:    str,
+        bind:          Callable[[DownloadJob], None],
+        on_error:      Callable,
+        max_height:    Optional[int] = None,
+        max_fps:       Optional[int] = None,
+        cancel:        Optional[threading.Event] = None,
+        use_cache:     bool = True,
+        skip_archived: bool = True,
+        on_skip:       Optional[Callable[[dict, dict], None]] = None,
+        priority:      str = PRIORITY_BACKGROUND,
+        preset:        Optional[QualityPreset] = None,
+    ) -> int:
+        """
+        Blocking: expand a playlist lazily and feed it into the job queue.
+
+        Each entry is resolved only when the queue has room for it (at most
+        `max_workers` jobs waiting), so the first video starts within seconds
+        and memory stays flat however long the playlist is.  `bind(job)` is
+        called before each submit so the caller can attach its callbacks;
+        per-entry extraction errors go to on_error(msg) and do not stop the
+        expansion.  Entries already in the download archive (file verified)
+        are skipped before extraction and reported to on_skip(entry, record).
+        Jobs get `priority`, background by default, so a video the user
+        queues by hand is served first.  With a `preset` (which replaces
+        max_height / max_fps) entries are queued without being extracted
+        first; each is extracted once, by its download.  Returns the number
+        of jobs queued.
+        """
+        stop   = cancel or threading.Event()
+        queued = 0
+        for entry in self.iter_playlist(url):
+            if skip_archived:
+                record = self.archive.verified(entry["url"])
+                if record is not None:
+                    if on_skip is not None:
+                        on_skip(entry, record)
+                    continue
+
+            # Back-pressure: wait until a worker is about to need more work
+            while self._queue.qsize() >= self._max_workers:
+                if stop.wait(0.25):
+                    return queued
+            if stop.is_set():
+                return queued
+
+            if preset is not None:
+                job = self._preset_job(
+                    entry["url"], preset, output_dir, priority, use_cache, title=entry["title"],
+                )
+            else:
+                try:
+                    formats, info = self.extract_formats(entry["url"], use_cache=use_cache)
+                except (FetchError, yt_dlp.utils.DownloadError) as exc:
+                    on_error(f"{entry['title'] or entry['url']}:\n{exc}")
+                    continue
+
+                format_id, height, _label = _choose_format(formats, max_height, max_fps)
+                job = DownloadJob(
+                    entry["url"], format_id, height, output_dir,
+                    title=info.get("title") or entry["title"], priority=priority,
+                )
+            bind(job)
+            self.submit(job)
+            queued += 1
+        return queued
+
+    def download_playlist(
+        self,
+        url:           str,
+        output_dir:    str,
+        bind:          Callable[[DownloadJob], None],
+        on_error:      Callable,
+        on_finished:   Callable,
+        max_height:    Optional[int] = None,
+        max_fps:       Optional[int] = None,
+        on_skip:       Optional[Callable[[dict, dict], None]] = None,
+        preset:        Optional[QualityPreset] = None,
+        skip_archived: bool = True,
+    ) -> threading.Event:
+        """
+        Threaded wrapper around queue_playlist().
+        Calls on_finished(count) when the listing is exhausted; returns an
+        Event that stops the expansion when set.
+        """
+        cancel = threading.Event()
+
+        def _worker() -> None:
+            try:
+                count = self.queue_playlist(
+                    url, output_dir, bind, on_error,
+                    max_height=max_height, max_fps=max_fps, cancel=cancel,
+                    on_skip=on_skip, preset=preset, skip_archived=skip_archived,
+                )
+                on_finished(count)
+            except FetchError as exc:
+                on_error(str(exc))
+            except yt_dlp.utils.DownloadError as exc:
+                on_error(f"yt-dlp error:\n{exc}")
+            except Exception as exc:
+                on_error(f"Unexpected error: {exc}\n\n{traceback.format_exc()}")
+
+        threading.Thread(target=_worker, daemon=True).start()
+        return cancel
+
+    # -- Download -------------------------------------------------------------
+    def download(
+        self,
+        url:         str,
+        format_id:   str,
+        height:      int,
+        output_dir:  str,
+        on_progress: Callable,
+        on_status:   Callable,
+        on_done:     Callable,
+        on_error:    Callable,
+        title:       str = "",
+        info:        Optional[dict] = None,
+    ) -> DownloadJob:
+        """
+        Queue a download and return its DownloadJob.
+        The job starts as soon as a worker from the pool is free.
+
+        A video fetched with fetch_formats() is not extracted again: the job
+        picks its info up from the format cache when it starts, as long as
+        the stream URLs are still valid.  An explicit `info` is reused the
+        same way but stays referenced while the job waits.
+        """
+        job = DownloadJob(
+            url, format_id, height, output_dir,
+            on_progress, on_status, on_done, on_error,
+            title=title, info=info,
+        )
+        return self.submit(job)
+
+    def download_preset(
+        self,
+        url:        str,
+        preset:     QualityPreset,
+        output_dir: str,
+        bind:       Optional[Callable[[DownloadJob], None]] = None,
+        priority:   str = PRIORITY_NORMAL,
+        use_cache:  bool = True,
+    ) -> DownloadJob:
+        """
+        Queue `url` under a QualityPreset, skipping fetch_formats(): the
+        job's selector is compiled from the preset and the download stage
+        extracts the video once.  A video whose info the format cache still
+        holds with fresh stream URLs is not extracted at all.  `bind(job)` runs before
+        the job is submitted.
+        """
+        job = self._preset_job(url, preset, output_dir, priority, use_cache)
+        if bind is not None:
+            bind(job)
+        return self.submit(job)
+
+    def _preset_job(
+        self,
+        url:        str,
+        preset:     QualityPreset,
+        output_dir: str,
+        priority:   str,
+        use_cache:  bool,
+        title:      str = "",
+    ) -> DownloadJob:
+        cached = self.cache.get(url) if use_cache else None
+        if cached is not None:
+            title = cached[1].get("title") or title
+        return DownloadJob(
+            url, preset.video_selector(), preset.max_height or 0, output_dir,
+            title=title, priority=priority,
+        )
+
+    def submit(self, job: DownloadJob) -> DownloadJob:
+        """Add an already-built job to the queue."""
+        with self._lock:
+            self._jobs[job.id] = job
+        self.journal.record(job)
+        self._queue.put(job)
+        self._spawn_workers()
+        return job
+
+    # -- Resume / retry -------------------------------------------------------
+    def resume_interrupted(
+        self, bind: Optional[Callable[[DownloadJob], None]] = None,
+    ) -> List[DownloadJob]:
+        """
+        Re-queue every job the journal shows as interrupted (the app exited
+        while it was queued, downloading or merging).  yt-dlp picks up their
+        .part files, so finished bytes are not downloaded again.
+        """
+        jobs = []
+        for entry in self.journal.interrupted():
+            job = self._job_from_entry(entry)
+            if bind is not None:
+                bind(job)
+            jobs.append(self.submit(job))
+        return jobs
+
+    def abandon_interrupted(self) -> int:
+        """Delete the partial files of every interrupted job and forget them."""
+        entries = self.journal.interrupted()
+        for entry in entries:
+            for path in _owned_leftovers(set(entry.get("files") or ()), temps_only=False):
+                _remove_quietly(path)
+            self.journal.forget(entry["uid"])
+        return len(entries)
+
+    def retry(
+        self, job_id: int, bind: Optional[Callable[[DownloadJob], None]] = None,
+    ) -> Optional[DownloadJob]:
+        """Queue a failed job again; it resumes from its partial files."""
+        old = self.get_job(job_id)
+        if old is None or old.state != JOB_FAILED:
+            return None
+        job = DownloadJob(
+            old.url, old.format_id, old.height, old.output_dir,
+            title=old.title, uid=old.uid, priority=old.priority, rate_limit=old.rate_limit,
+        )
+        job.files = set(old.files)
+        if bind is not None:
+            bind(job)
+        return self.submit(job)
+
+    @staticmethod
+    def _job_from_entry(entry: dict) -> DownloadJob:
+        job = DownloadJob(
+            entry["url"], entry["format_id"], entry.get("height") or 0,
+            entry["output_dir"], title=entry.get("title") or "", uid=entry["uid"],
+            priority=entry.get("priority") or PRIORITY_NORMAL,
+            rate_limit=entry.get("rate_limit") or 0,
+        )
+        job.files = set(entry.get("files") or ())
+        return job
+
+    def _run_job(self, job: DownloadJob) -> None:
+        """
+        Download stage: resolve the format, download the selected streams,
+        then hand them to the merge pool (see _merge_job).
+
+        Format selection uses the tiers of _build_format_selector.  When a
+        video + audio pair is selected, each stream is downloaded to its own
+        file and merged later; a single pre-muxed stream is finished here.
+
+        If the job carries a still-fresh info dict, or the format cache holds
+        one for its URL, it is resolved through process_ie_result(), so the
+        page, player JS and manifests are not extracted a second time.
+
+        With a scratch folder, streams are downloaded and merged in
+        <scratch>/<job uid>/ and the finished file is moved into output_dir
+        (_publish).  Once the formats are resolved, and before any bytes are
+        written, the projected size is reserved on every volume involved
+        (see SpaceReservations).
+
+        The yt-dlp work itself (_download_stage) runs on this thread, or in
+        an isolated worker process when `isolated` is on; either way it
+        reports back through _on_stage_event.
+        """
+        # Cancelled while still waiting in the queue
+        if job.cancelled:
+            self._finish_cancelled(job)
+            return
+
+        seen: Dict[str, int] = {}      # file -> downloaded_bytes at the previous report
+
+        try:
+            if job.info is None:
+                job.info = self.cache.fresh_info(job.url)
+            job.state = JOB_RUNNING
+            job.label = "Starting download..."
+            job.on_status(job.label, ACCENT)
+            self.journal.record(job)
+
+            # ffmpeg_location must be a DIRECTORY, not the exe itself
+            ffmpeg = ffmpeg_path()
+            with self._lock:
+                learned = dict(self._host_connections)
+            job.work_dir = (
+                os.path.join(self._scratch_dir, job.uid) if self._scratch_dir else job.output_dir
+            )
+            spec = {
+                "work_dir":    job.work_dir,
+                "ffmpeg_dir":  str(Path(ffmpeg).parent) if ffmpeg else None,
+                "throttled":   self.bandwidth.limited or bool(job.rate_limit),
+                "connections": self._connections,
+                "learned":     learned,
+            }
+
+            host    = _host_label(job.url)
+            retries = 0
+            while True:
+                if not self._await_host(job, host):
+                    raise yt_dlp.utils.DownloadError("Cancelled by user.")
+                try:
+                    result = self._run_stage(
+                        job, spec, lambda event, *args: self._on_stage_event(job, seen, event, *args),
+                    )
+                    break
+                except Exception as exc:
+                    cancelled = job.cancelled or (
+                        isinstance(exc, _WorkerError) and exc.kind in (JOB_CANCELLED, _TASK_CANCELLED)
+                    )
+                    reason = None if cancelled else _retry_reason(exc)
+                    if reason is None or retries >= self.retry.attempts:
+                        raise
+                    retries += 1
+                    if reason == RETRY_THROTTLED:
+                        self._note_throttle(job, host)
+                    if not self._backoff(job, exc, retries):
+                        raise yt_dlp.utils.DownloadError("Cancelled by user.") from None
+                    job.info = None     # stale stream URLs are a common cause: extract afresh
+            job.metrics.end_download()
+
+            if not result["inputs"]:
+                # Single stream: it keeps its own extension, not necessarily .mp4
+                job.sha256     = _inline_hash(job, result["final_path"])
+                job.final_path = self._publish(job, result["final_path"])
+                self._finish_done(job)
+                return
+
+            job.state = JOB_MERGING
+            job.label = "Waiting for a merge slot..."
+            job.on_status(job.label, WARNING)
+            self.journal.record(job)
+            self._merge_pool.submit(self._merge_job, job, result["inputs"], result["final_path"])
+
+        except _WorkerError as exc:
+            if exc.kind in (JOB_CANCELLED, _TASK_CANCELLED):
+                self._finish_cancelled(job)
+            else:
+                self._finish_failed(job, exc.message)
+        except DiskSpaceError as exc:
+            self._finish_failed(job, str(exc))
+        except Exception as exc:
+            kind, msg = _task_failure("download", exc)
+            if kind == JOB_CANCELLED:
+                self._finish_cancelled(job)
+            else:
+                self._finish_failed(job, msg)
+        finally:
+            self.bandwidth.release(job)
+            job.info = None     # the raw info dict is large; do not keep it around
+
+    def _run_stage(self, job: DownloadJob, spec: dict, emit: Callable) -> dict:
+        if not self._isolated:
+            return self._download_stage(job, spec, emit)
+        fields = {
+            "url":        job.url,
+            "format_id":  job.format_id,
+            "height":     job.height,
+            "output_dir": job.output_dir,
+            "title":      job.title,
+            "uid":        job.uid,
+            # Only plain data crosses the pipe
+            "info":       yt_dlp.YoutubeDL.sanitize_info(job.info) if job.info else None,
+        }
+        return self._processes.run(("download", {"job": fields, "spec": spec}), emit, lambda: job.cancelled)
+
+    def _on_stage_event(self, job: DownloadJob, seen: Dict[str, int], event: str, *args) -> None:
+        """
+        Apply one event from _download_stage to the job.  Runs on the download
+        thread, or on the relay thread while the worker process waits for the
+        acknowledgement -- so sleeping here (bandwidth) throttles either one.
+        """
+        if event == "progress":
+            self._on_progress(job, seen, args[0])
+        elif event == "consume":
+            self.bandwidth.consume(job, args[0])
+        elif event == "file":
+            job.files.add(args[0])
+        elif event == "status":
+            job.on_status(*args)
+        elif event == "retry":
+            fragment, count, throttled = args
+            job.metrics.count_retry(fragment, count)
+            if throttled:
+                # Hold this transfer (and every job queued for the host) while
+                # the host's circuit is open, instead of retrying into the limit
+                host = _host_label(job.url)
+                self._note_throttle(job, host)
+                self._await_host(job, host)
+        elif event == "resolved":
+            resolved = args[0]
+            if resolved["title"] and job.title == job.url:
+                job.title = resolved["title"]     # queued from a preset, before extraction
+            job.final_path            = resolved["final_path"]
+            job.metrics.extractor     = resolved["extractor"]
+            job.metrics.host          = resolved["host"]
+            job.metrics.connections   = resolved["connections"]
+            job.metrics.info_reused   = resolved["reused"]
+            job.streams               = resolved["streams"]
+            self.breaker.record_success(_host_label(job.url))
+            self._reserve_space(job, resolved["projected"], resolved["split"])
+            if resolved["reused"]:
+                with self._lock:
+                    job.metrics.extract_seconds = self._extract_seconds.get(_video_key(job.url))
+            else:
+                job.metrics.extract_seconds = resolved["extract_seconds"]
+                self.metrics.observe_extract(job.metrics.extractor, job.metrics.extract_seconds)
+            self.journal.record(job)
+            self.bandwidth.register(job)
+            job.metrics.start_download()
+        elif event == "hashed":
+            path, sha256 = args
+            with contextlib.suppress(OSError):
+                st = os.stat(path)
+                job.hashed[path] = (sha256, st.st_size, st.st_mtime_ns)
+        elif event == "ranged":
+            host, connections = args
+            job.metrics.connections = max(job.metrics.connections, connections)
+            if self._connections == CONNECTIONS_AUTO:
+                with self._lock:
+                    self._host_connections[host] = connections
+
+    def _await_host(self, job: DownloadJob, host: str) -> bool:
+        """Hold `job` while `host`'s circuit is open; False if it was cancelled."""
+        def _paused(left: float) -> None:
+            job.label = f"Paused: {host} is throttling, resuming in {left:.0f}s..."
+            job.on_status(job.label, WARNING)
+
+        started = time.monotonic()
+        try:
+            return self.breaker.wait(host, lambda: job.cancelled, _paused)
+        finally:
+            job.metrics.count_backoff(time.monotonic() - started)
+
+    def _note_throttle(self, job: DownloadJob, host: str) -> None:
+        pause = self.breaker.record_throttle(host)
+        if pause:
+            job.on_status(f"{host} is throttling requests; pausing its downloads for {pause:.0f}s.", WARNING)
+
+    def _backoff(self, job: DownloadJob, exc: BaseException, retry: int, what: str = "Retry") -> bool:
+        """Wait before retry number `retry` of `job`; False if it was cancelled meanwhile."""
+        delay = self.retry.delay(retry)
+        job.label = f"{what} {retry}/{self.retry.attempts} in {delay:.0f}s - {_short_error(exc)}"
+        job.on_status(job.label, WARNING)
+        job.metrics.count_backoff(delay, job_retry=True)
+        return not _sleep_unless(lambda: job.cancelled, delay)
+
+    def _reserve_space(self, job: DownloadJob, projected: Optional[int], split: bool) -> None:
+        """
+        Pre-flight check for the resolved formats.  Split streams need room
+        for the streams plus the merged copy; a scratch folder on another
+        volume also needs room for the final file.  Bytes a resumed job
+        already has on disk are credited.  Unknown sizes are not checked.
+        """
+        if not projected:
+            return
+        written = sum(
+            _allocated_bytes(path) for path in _owned_leftovers(job.files, temps_only=False)
+        )
+        needs = {job.work_dir: max(0, projected * (2 if split else 1) - written)}
+        if _volume(job.work_dir)[0] != _volume(job.output_dir)[0]:
+            needs[job.output_dir] = projected
+
+        def _waiting() -> None:
+            job.label = "Waiting for disk space (other downloads hold it)..."
+            job.on_status(job.label, WARNING)
+
+        if not self.space.reserve(job.id, needs, lambda: job.cancelled, _waiting):
+            raise yt_dlp.utils.DownloadError("Cancelled by user.")
+
+    def _publish(self, job: DownloadJob, path: str) -> str:
+        """
+        Move a finished file from the job's scratch folder into output_dir,
+        numbering its name if another file there already has it.
+        """
+        if job.work_dir == job.output_dir:
+            return path
+        job.label = "Moving to the save folder..."
+        job.on_status(job.label, WARNING)
+        dest   = _claim_path(os.path.join(job.output_dir, os.path.basename(path)))
+        digest = hashlib.sha256() if job.sha256 is None else None
+        try:
+            if _move_file(path, dest, lambda: job.cancelled, digest):
+                job.sha256 = digest.hexdigest()     # hashed while copying across volumes
+        except BaseException:
+            _remove_quietly(dest)       # the placeholder
+            raise
+        return dest
+
+    def _on_progress(self, job: DownloadJob, seen: Dict[str, int], d: dict) -> None:
+        # Remember every file this job writes, so cleanup never touches others'
+        for key in ("filename", "tmpfilename"):
+            if d.get(key) and d[key] not in job.files:
+                job.files.add(d[key])
+
+        if d.get("status") != "downloading":
+            return
+        total      = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+        downloaded = d.get("downloaded_bytes") or 0
+        speed      = d.get("speed") or 0
+        eta        = d.get("eta") or 0
+        job.metrics.first_byte()
+
+        # A resumed file's first report is a baseline, not new traffic;
+        # ranged transfers are throttled per read inside RangedDownload
+        name = d.get("tmpfilename") or d.get("filename") or ""
+        last, seen[name] = seen.get(name, d.get("resumed_bytes")), downloaded
+        if last is not None and downloaded > last:
+            job.metrics.add_bytes(downloaded - last)
+            if not d.get("ranged"):
+                self.bandwidth.consume(job, downloaded - last)
+
+        alloc    = self.bandwidth.allocation(job.id)
+        pct      = int(downloaded / total * 100) if total > 0 else 0
+        spd_str  = f"{_filesize_str(speed)}/s" if speed else "..."
+        eta_str  = f"  ETA {eta}s" if eta else ""
+        conn_str = f"  x{d['connections']}" if (d.get("connections") or 1) > 1 else ""
+        lim_str  = f"  [limit {_filesize_str(alloc)}/s]" if alloc else ""
+        retries  = job.metrics.total_retries
+        ret_str  = f"  retried {retries}x" if retries else ""
+        job.percent = pct
+        job.label   = f"Downloading {pct}%  {spd_str}{eta_str}{conn_str}{lim_str}{ret_str}"
+        job.on_progress(pct, job.label)
+        self.journal.record(
+            job, force=False, downloaded_bytes=downloaded, total_bytes=total,
+        )
+
+    # -- Download stage (yt-dlp only; runs in a thread or a worker process) -----
+    @staticmethod
+    def _download_stage(job: DownloadJob, spec: dict, emit: Callable) -> dict:
+        """
+        Resolve the job's format and download the selected streams.  Touches
+        only yt-dlp and the file system and reports through
+        emit(event, *args), so it behaves the same on a download thread and
+        inside an isolated worker process.
+
+        Returns {"final_path": ..., "inputs": [(format, path), ...]} where
+        `inputs` is empty for a single pre-muxed stream.
+        """
+        def _hook(d: dict) -> None:
+            if job.cancelled:
+                raise yt_dlp.utils.DownloadError("Cancelled by user.")
+            emit("progress", {key: d.get(key) for key in _HOOK_KEYS if key in d})
+
+        # Keep %(ext)s so each temp stream gets its natural extension.
+        # merge_output_format makes the resolved info report .mp4, which
+        # is the name the merge stage writes to.
+        outtmpl = os.path.join(spec["work_dir"], "%(title)s.%(ext)s")
+
+        # Laid over the pooled "download" profile for this job only
+        ydl_opts: dict = {
+            "format":         _build_format_selector(job.format_id, job.height),
+            "outtmpl":        outtmpl,
+            "progress_hooks": [_hook],
+            "logger":         _RetryLogger(lambda fragment, throttled: emit("retry", fragment, 1, throttled)),
+        }
+
+        if spec["ffmpeg_dir"]:
+            ydl_opts["ffmpeg_location"] = spec["ffmpeg_dir"]
+        if spec["throttled"]:
+            # Small fixed reads keep throttled transfers smooth instead of bursty
+            ydl_opts["buffersize"]     = THROTTLE_BLOCK
+            ydl_opts["noresizebuffer"] = True
+
+        started = time.monotonic()
+        with _ydl_pool.lease("download", ydl_opts) as ydl:
+            info, reused = DownloadManager._resolve_info(ydl, job)
+            requested    = info.get("requested_formats")
+            final_path   = os.path.splitext(ydl.prepare_filename(info))[0] + ".mp4"
+
+        if requested:
+            # Split streams: fetch each to "<title>.f<id>.<ext>", merge later
+            stream_opts = {
+                **ydl_opts,
+                "format":  ",".join(f["format_id"] for f in requested),
+                "outtmpl": os.path.join(spec["work_dir"], "%(title)s.f%(format_id)s.%(ext)s"),
+            }
+        else:
+            stream_opts = {**ydl_opts, "format": info["format_id"]}
+
+        streams   = requested or [info]
+        first_url = streams[0].get("url") or ""
+        fragments = spec["connections"]
+        if fragments == CONNECTIONS_AUTO:
+            fragments = spec["learned"].get(_url_host(first_url), FRAGMENT_CONNECTIONS)
+        stream_opts["concurrent_fragment_downloads"] = fragments
+        sizes = [f.get("filesize") or f.get("filesize_approx") for f in streams]
+
+        emit("resolved", {
+            "final_path":      final_path,
+            "title":           info.get("title"),
+            "extractor":       info.get("extractor_key"),
+            "reused":          reused,
+            "extract_seconds": None if reused else time.monotonic() - started,
+            "host":            _host_label(first_url),
+            "connections":     fragments,
+            "projected":       sum(sizes) if all(sizes) else None,
+            "split":           bool(requested),
+            "streams": [
+                {
+                    "format_id": f.get("format_id"),
+                    "ext":       f.get("ext"),
+                    "vcodec":    f.get("vcodec"),
+                    "acodec":    f.get("acodec"),
+                    "size":      f.get("filesize") or f.get("filesize_approx"),
+                }
+                for f in streams
+            ],
+        })
+        if spec["connections"] != 1:
+            DownloadManager._fetch_ranged(job, spec, stream_opts, info, streams, _hook, emit)
+
+        downloads = DownloadManager._download_streams(job, stream_opts, info, reused)
+        if not requested:
+            return {"final_path": downloads[0].get("filepath") or final_path, "inputs": []}
+
+        by_id  = {f["format_id"]: f for f in requested}
+        inputs = [
+            (_merge_fields(by_id.get(d.get("format_id"), fmt)), d["filepath"])
+            for d, fmt in zip(downloads, requested)
+        ]
+        return {"final_path": final_path, "inputs": inputs}
+
+    @staticmethod
+    def _resolve_info(ydl: "yt_dlp.YoutubeDL", job: DownloadJob) -> Tuple[dict, bool]:
+        """
+        Run format selection without downloading.  Returns (info, reused):
+        the job's cached info dict is reused while its stream URLs are fresh,
+        otherwise the URL is extracted again.
+        """
+        if _info_is_fresh(job.info):
+            # sanitize_info() returns a pruned deep copy, so the caller's dict
+            # is left untouched and can be reused for another format later.
+            info = yt_dlp.YoutubeDL.sanitize_info(job.info, remove_private_keys=True)
+            return ydl.process_ie_result(info, download=False), True
+        return ydl.extract_info(job.url, download=False), False
+
+    @staticmethod
+    def _fetch_ranged(
+        job:     DownloadJob,
+        spec:    dict,
+        opts:    dict,
+        info:    dict,
+        streams: List[dict],
+        hook:    Callable[[dict], None],
+        emit:    Callable,
+    ) -> None:
+        """
+        Pre-download large progressive streams over parallel byte ranges to
+        the exact file names yt-dlp would use, so yt-dlp finds them complete
+        and skips them.  Anything that cannot be ranged (fragmented streams,
+        servers ignoring Range, errors) is left to yt-dlp's own downloader.
+        """
+        with _ydl_pool.lease("download", opts) as ydl:
+            for fmt in streams:
+                if fmt.get("protocol") not in ("http", "https") or not fmt.get("url"):
+                    continue
+                path = ydl.prepare_filename({**info, **fmt})
+                if os.path.exists(path):
+                    continue
+
+                ranged = RangedDownload(
+                    fmt["url"], path, fmt.get("http_headers"), spec["connections"],
+                    cancelled=lambda: job.cancelled,
+                    throttle=lambda nbytes: emit("consume", nbytes),
+                    report=lambda got, total, speed, conns, p=path: hook({
+                        "status":           "downloading",
+                        "ranged":           True,
+                        "resumed_bytes":    ranged.resumed,
+                        "filename":         p,
+                        "downloaded_bytes": got,
+                        "total_bytes":      total,
+                        "speed":            speed,
+                        "eta":              int((total - got) / speed) if speed else None,
+                        "connections":      conns,
+                    }),
+                )
+                try:
+                    total = ranged.probe()
+                except _RangeError:
+                    continue
+                if total < RANGED_MIN_SIZE:
+                    continue
+                emit("file", path)
+                try:
+                    ranged.run(total)
+                except _RangeError as exc:
+                    if job.cancelled:
+                        raise yt_dlp.utils.DownloadError("Cancelled by user.")
+                    ranged.discard()
+                    job.on_status(f"Parallel download unavailable ({exc}); using one connection.", WARNING)
+                    continue
+                finally:
+                    if ranged.retries:
+                        emit("retry", False, ranged.retries, False)
+                emit("ranged", _url_host(fmt["url"]), ranged.connections)
+                if ranged.sha256:
+                    emit("hashed", path, ranged.sha256)
+
+    @staticmethod
+    def _download_streams(
+        job:    DownloadJob,
+        opts:   dict,
+        info:   dict,
+        reused: bool,
+    ) -> List[dict]:
+        """
+        Download the formats named in opts["format"] for a resolved info dict
+        and return yt-dlp's requested_downloads (one entry per file).
+        If reused signed URLs are rejected, extract afresh once and retry.
+        """
+        with _ydl_pool.lease("download", opts) as ydl:
+            try:
+                done = ydl.process_ie_result(
+                    yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True),
+                    download=True,
+                )
+            except yt_dlp.utils.DownloadError as exc:
+                if not reused or job.cancelled or "Cancelled" in str(exc):
+                    raise
+                # Signed URLs rejected early (e.g. HTTP 403) -- fall back to a fresh extraction
+                job.on_status("Cached stream URLs rejected, re-extracting...", WARNING)
+                done = ydl.extract_info(job.url, download=True)
+        return done.get("requested_downloads") or [done]
+
+    # -- Merge stage ----------------------------------------------------------
+    def _merge_job(self, job: DownloadJob, inputs: List[Tuple[dict, str]], output: str) -> None:
+        """
+        Merge stage (runs on the merge pool): mux the downloaded streams into
+        `output`, delete the stream files and finish the job.
+        """
+        try:
+            if job.cancelled:
+                raise yt_dlp.utils.DownloadError("Cancelled by user.")
+
+            job.merge_mode, codec_args = _merge_args([fmt for fmt, _ in inputs])
+            how = "copying audio" if job.merge_mode == MERGE_COPY else "re-encoding audio to AAC"
+            job.label = f"Merging video + audio ({how})..."
+            job.on_status(job.label, WARNING)
+            # Journal the temp output first, so a crash mid-merge cannot orphan it
+            job.files.add(_merge_temp_path(output))
+            self.journal.record(job)
+
+            retries = 0
+            started = time.monotonic()      # merge_seconds spans every attempt
+            while True:
+                digest  = hashlib.sha256()
+                try:
+                    if _run_ffmpeg_merge(job, inputs, output, codec_args, self._ffmpeg_threads, digest):
+                        job.sha256 = digest.hexdigest()
+                    break
+                except (yt_dlp.utils.DownloadError, OSError) as exc:
+                    reason = None if job.cancelled else _retry_reason(exc)
+                    if reason is None or retries >= self.retry.attempts:
+                        raise
+                    retries += 1
+                    if not self._backoff(job, exc, retries, what="Merge retry"):
+                        raise yt_dlp.utils.DownloadError("Cancelled by user.") from None
+            job.merge_seconds = time.monotonic() - started
+
+            for stream, (_, path) in zip(job.streams, inputs):
+                with contextlib.suppress(OSError):
+                    stream["size"] = os.path.getsize(path)
+            for _, path in inputs:      # keep_video=False equivalent
+                _remove_quietly(path)
+            job.final_path = self._publish(job, output)
+            self._finish_done(job)
+
+        except yt_dlp.utils.DownloadError as exc:
+            if "Cancelled" in str(exc):
+                self._finish_cancelled(job)
+            else:
+                self._finish_failed(job, f"Merge failed:\n{exc}")
+        except Exception as exc:
+            self._finish_failed(job, f"Unexpected error: {exc}\n\n{traceback.format_exc()}")
+
+    # -- Job completion ---------------------------------------------------------
+    # Cleanup only ever touches files recorded for *this* job: temp pieces
+    # once it is done, everything it wrote once it is abandoned.  Failed jobs
+    # keep their partial files so a retry can resume them.
+    def _finish_done(self, job: DownloadJob) -> None:
+        for path in _owned_leftovers(job.files, temps_only=True):
+            _remove_quietly(path)
+        self._drop_scratch(job)
+        twin = self._seal(job)
+        job.state   = JOB_DONE
+        job.percent = 100
+        job.label   = "Complete!"
+        if job.merge_mode and job.merge_seconds is not None:
+            how = "audio copied" if job.merge_mode == MERGE_COPY else "audio -> AAC"
+            job.label = f"Complete! ({how}, merge {job.merge_seconds:.1f}s)"
+        if twin:
+            job.label += f"  Hardlinked to existing copy: {twin}"
+        self.journal.record(job)
+        self.archive.add(job)
+        self._record_metrics(job)
+        job.on_done()
+
+    def _seal(self, job: DownloadJob) -> Optional[str]:
+        """
+        Hardlink the finished file to an identical file stored earlier,
+        write its sidecar manifest and index it.  Returns the twin it was
+        linked to, if any.  Best effort: a failure here never fails the
+        download.
+
+        The SHA-256 normally exists by now, taken as the bytes were written
+        (ranged transfer, merge, cross-volume move).  Files yt-dlp wrote
+        itself -- small progressive files, single fragmented streams,
+        resumed transfers -- are read once here instead.
+        """
+        path = job.final_path
+        if not path or not os.path.isfile(path):
+            return None
+        try:
+            if job.sha256 is None:
+                job.label = "Hashing..."
+                job.on_status(job.label, WARNING)
+                job.sha256 = _hash_file(path)
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+
+        twin = self.hashes.link_duplicate(job.sha256, path) if self.dedupe else None
+        if len(job.streams) == 1:
+            job.streams[0]["size"] = size         # the stream is the file
+        _write_manifest(path, {
+            "file":          os.path.basename(path),
+            "size":          size,
+            "sha256":        job.sha256,
+            "url":           job.url,
+            "title":         job.title,
+            "format_id":     job.format_id,
+            "height":        job.height,
+            "streams":       job.streams,
+            "merge_mode":    job.merge_mode,
+            "ytdlp_version": _ytdlp_version(),
+            "finished_at":   time.time(),
+            "hardlinked_to": twin,
+        })
+        self.hashes.add(job.sha256, path)
+        return twin
+
+    def _finish_cancelled(self, job: DownloadJob) -> None:
+        if self._stopping:
+            self._finish_interrupted(job)
+            return
+        for path in _owned_leftovers(job.files, temps_only=False):
+            _remove_quietly(path)
+        self._drop_scratch(job)
+        job.state = JOB_CANCELLED
+        job.label = "Cancelled"
+        self.journal.record(job)
+        self._record_metrics(job)
+        job.on_status("Download cancelled.", WARNING)
+
+    def _finish_interrupted(self, job: DownloadJob) -> None:
+        """
+        Stopped by stop(): keep every file and the scratch folder, and leave
+        the job queued / running / merging in the journal for a resume.
+        """
+        self.space.release(job.id)
+        job.label = "Interrupted"
+        self.journal.record(job)        # flush the latest files and progress
+        with self._lock:
+            self._halted.add(job.id)
+
+    def _finish_failed(self, job: DownloadJob, msg: str) -> None:
+        if self._stopping:
+            self._finish_interrupted(job)   # torn down by stop(), not a real failure
+            return
+        if job.metrics.job_retries:
+            msg = f"{msg}\n\n(Gave up after {job.metrics.job_retries} retries.)"
+        job.state = JOB_FAILED
+        job.label = "Failed"
+        self.journal.record(job)
+        self._record_metrics(job)
+        job.on_error(msg)
+
+    def _drop_scratch(self, job: DownloadJob) -> None:
+        """Remove the job's own scratch folder (failed jobs keep it for a retry)."""
+        if job.work_dir and job.work_dir != job.output_dir:
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    def _record_metrics(self, job: DownloadJob) -> None:
+        self.space.release(job.id)      # every finish path passes through here
+        job.metrics.end_download()
+        if job.state == JOB_DONE and job.final_path:
+            try:
+                job.metrics.final_size = os.path.getsize(job.final_path)
+            except OSError:
+                pass
+        self.metrics.record(job)
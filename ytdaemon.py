@@ -0,0 +1,611 @@
+"""
+YT-DLP Downloader  —  daemon mode (local HTTP API + watch folder)
+==================================================================
+Keeps one DownloadManager running so other tools on the machine can push
+work into it without the GUI: over a JSON API on localhost, or by dropping
+batch files into a watch folder.
+
+Usage:
+    python ytdaemon.py [-o DIR] [--port 8780] [--watch DIR] [-p PRESET] [-j N]
+    python ytdaemon.py --watch ~/Downloads/inbox --isolated --resume
+
+API (JSON in and out, 127.0.0.1 only):
+    GET    /health          queue counters and hosts paused for throttling
+    GET    /presets         preset name -> description
+    GET    /jobs            every job with state and live progress, plus playlist listings
+    GET    /jobs/<id>       one job
+    POST   /jobs            queue {"url": ...} or {"urls": [...]} under a format policy:
+                            "preset": NAME, or "max_height" / "max_fps" caps
+                            (default: --preset); optional "output_dir", "force"
+    DELETE /jobs/<id>       cancel a job  (POST /jobs/<id>/cancel does the same)
+    DELETE /jobs            forget finished, failed and cancelled jobs
+
+e.g.
+    curl -H 'Content-Type: application/json' -d '{"url": "...", "preset": "720p"}' \\
+         http://127.0.0.1:8780/jobs
+
+Every video is queued straight from its URL under a QualityPreset (a
+max_height / max_fps policy becomes one), so a POST answers with job IDs
+at once and each video is extracted only by its download.  Requests are
+served by a single asyncio event loop, not a thread per connection; many
+clients polling /jobs cost one cached snapshot every SNAPSHOT_TTL seconds
+and never hold up the download workers.  POSTs must carry
+'Content-Type: application/json' and every request a localhost Host
+header, so web pages in a browser on the same machine cannot drive the API.
+
+Watch folder: .txt files hold one URL per line in batch-file syntax ('URL
+[PRESET]', '#' / ';' comments); .url files are Internet Shortcuts.  A file
+is ingested once its size and mtime have stayed the same for one scan,
+then moved to processed/ (or failed/ when it cannot be parsed).
+
+Events are printed as JSON lines on stdout, like ytcli.py: listening,
+queued, skipped, ingested, done, error, interrupted.
+"""
+
+# == Standard library =========================================================
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# == Local ====================================================================
+from ytcore import (
+    CONNECTIONS_AUTO, DEFAULT_WORKERS, MAX_CONNECTIONS, MAX_WORKERS, QUALITY_PRESETS,
+    DownloadJob, DownloadManager, MetricsRecorder, QualityPreset,
+    _is_playlist_url, warm_imports,
+)
+from ytcli import (
+    EXIT_INTERRUPTED, EXIT_OK,
+    _Emitter, _parse_rate, _read_batch, _split_presets,
+)
+
+
+DEFAULT_PORT      = 8780
+SNAPSHOT_TTL      = 0.25          # seconds a serialised /jobs listing is shared
+KEEPALIVE_TIMEOUT = 30.0          # idle keep-alive connections are closed after this
+MAX_HEADER_BYTES  = 16 * 1024
+MAX_BODY_BYTES    = 1024 * 1024
+WATCH_INTERVAL    = 2.0           # seconds between watch folder scans
+WATCH_SUFFIXES    = (".txt", ".url")
+
+_LOCAL_HOSTS = {"localhost", "127.0.0.1", "[::1]"}
+_JOB_PATH_RE = re.compile(r"^/jobs/(\d+)(/cancel)?$")
+
+
+class ApiError(Exception):
+    """A request the API rejects; carries the HTTP status to answer with."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+# =============================================================================
+#  Daemon
+# =============================================================================
+class Daemon:
+    """
+    Owns the DownloadManager and everything the API and the watch folder
+    do with it.  All methods are thread-safe; the blocking ones (enqueue,
+    ingest) are run off the event loop.
+    """
+
+    def __init__(self, args: argparse.Namespace, emitter: _Emitter) -> None:
+        self._args    = args
+        self._emit    = emitter.emit
+        self._manager = DownloadManager(
+            max_workers=args.concurrency, connections=args.connections,
+            rate_limit=args.limit_rate,
+            metrics=MetricsRecorder(Path(args.metrics_dir)) if args.metrics_dir else None,
+            isolated=args.isolated, scratch_dir=args.scratch_dir,
+            dedupe=not args.no_hardlinks,
+        )
+        self._policies:  Dict[int, str] = {}        # job ID -> preset / policy name
+        self._errors:    Dict[int, str] = {}        # job ID -> last error message
+        self._playlists: List[dict]     = []        # playlist / channel listings
+        self._lock       = threading.Lock()
+        self._snapshot:  Optional[bytes] = None
+        self._snapshot_at = 0.0
+
+    @property
+    def manager(self) -> DownloadManager:
+        return self._manager
+
+    # -- Queueing -------------------------------------------------------------
+    def policy(self, body: dict) -> QualityPreset:
+        """The QualityPreset a request asks for: a preset name, caps, or the default."""
+        name = body.get("preset")
+        if name is not None:
+            if name not in QUALITY_PRESETS:
+                raise ApiError(400, f"unknown preset {name!r} (see GET /presets)")
+            return QUALITY_PRESETS[name]
+        max_height, max_fps = body.get("max_height"), body.get("max_fps")
+        for value in (max_height, max_fps):
+            if value is not None and (not isinstance(value, int) or value <= 0):
+                raise ApiError(400, "max_height / max_fps must be positive integers")
+        if max_height is None and max_fps is None:
+            return QUALITY_PRESETS[self._args.preset]
+        parts = ([f"{max_height}p"] if max_height else []) + ([f"{max_fps}fps"] if max_fps else [])
+        return QualityPreset("-".join(parts), max_height=max_height, max_fps=max_fps)
+
+    def enqueue(
+        self,
+        url:        str,
+        preset:     QualityPreset,
+        output_dir: Optional[str] = None,
+        force:      bool = False,
+        source:     str = "api",
+    ) -> dict:
+        """Queue one URL (a playlist is listed in the background); return what happened."""
+        output_dir = output_dir or self._args.output_dir
+        if _is_playlist_url(url):
+            return self._enqueue_playlist(url, preset, output_dir, force, source)
+
+        record = None if force else self._manager.archive.verified(url)
+        if record is not None:
+            self._emit("skipped", url=url, path=record.get("path"), reason="already downloaded")
+            return {"url": url, "skipped": record.get("path")}
+
+        job = self._manager.download_preset(
+            url, preset, output_dir,
+            bind=lambda job: self._bind_job(job, preset.name, source),
+            use_cache=not self._args.no_cache,
+        )
+        return {"url": url, "job": job.id}
+
+    def _enqueue_playlist(
+        self, url: str, preset: QualityPreset, output_dir: str, force: bool, source: str,
+    ) -> dict:
+        listing = {"url": url, "state": "listing", "queued": 0, "error": None}
+        with self._lock:
+            self._playlists.append(listing)
+
+        def _finished(count: int) -> None:
+            listing.update(state="done", queued=count)
+
+        def _error(msg: str) -> None:
+            listing["error"] = msg.strip().splitlines()[0] if msg.strip() else "error"
+            self._emit("error", url=url, message=msg)
+
+        def _bind(job: DownloadJob) -> None:
+            listing["queued"] += 1
+            self._bind_job(job, preset.name, source)
+
+        self._manager.download_playlist(
+            url, output_dir, bind=_bind, on_error=_error, on_finished=_finished,
+            preset=preset, skip_archived=not force,
+            on_skip=lambda entry, record: self._emit(
+                "skipped", url=entry["url"], path=record.get("path"), reason="already downloaded",
+            ),
+        )
+        return {"url": url, "playlist": True}
+
+    def _bind_job(self, job: DownloadJob, policy: Optional[str], source: str) -> None:
+        jid, url = job.id, job.url
+        job.on_done    = lambda: self._emit("done", job=jid, url=url, path=job.final_path)
+        job.on_error   = lambda m: self._on_error(jid, url, m)
+        job.rate_limit = self._args.job_limit_rate
+        if policy is not None:
+            with self._lock:
+                self._policies[jid] = policy
+        self._emit("queued", job=jid, url=url, title=job.title, format=policy or job.format_id, source=source)
+
+    def _on_error(self, job_id: int, url: str, message: str) -> None:
+        with self._lock:
+            self._errors[job_id] = message
+        self._emit("error", job=job_id, url=url, message=message)
+
+    def resume(self) -> None:
+        self._manager.resume_interrupted(
+            bind=lambda job: self._bind_job(job, None, "resume"),
+        )
+
+    # -- Reporting ------------------------------------------------------------
+    def job_view(self, job: DownloadJob) -> dict:
+        with self._lock:
+            policy = self._policies.get(job.id)
+            error  = self._errors.get(job.id)
+        return {
+            "id":         job.id,
+            "uid":        job.uid,
+            "url":        job.url,
+            "title":      job.title,
+            "state":      job.state,
+            "percent":    job.percent,
+            "label":      job.label,
+            "format":     policy or job.format_id,
+            "output_dir": job.output_dir,
+            "path":       job.final_path,
+            "sha256":     job.sha256,
+            "retries":    job.metrics.total_retries,
+            "backoff_seconds": round(job.metrics.backoff_seconds, 1),
+            "error":      error,
+        }
+
+    def snapshot(self) -> bytes:
+        """The serialised /jobs listing, rebuilt at most every SNAPSHOT_TTL seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._snapshot is not None and now - self._snapshot_at < SNAPSHOT_TTL:
+                return self._snapshot
+            playlists = [dict(p) for p in self._playlists]
+        body = _json_bytes({
+            "jobs":      [self.job_view(job) for job in self._manager.jobs()],
+            "playlists": playlists,
+        })
+        with self._lock:
+            self._snapshot, self._snapshot_at = body, now
+        return body
+
+    def health(self) -> dict:
+        jobs = self._manager.jobs()
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return {
+            "ok": True, "jobs": len(jobs), "states": counts,
+            "throttled_hosts": self._manager.breaker.open_hosts(),
+        }
+
+    def cancel(self, job_id: int) -> dict:
+        job = self._manager.get_job(job_id)
+        if job is None:
+            raise ApiError(404, f"no job {job_id}")
+        self._manager.cancel(job_id)
+        return self.job_view(job)
+
+    def clear_finished(self) -> dict:
+        self._manager.clear_finished()
+        known = {job.id for job in self._manager.jobs()}
+        with self._lock:
+            for table in (self._policies, self._errors):
+                for job_id in [j for j in table if j not in known]:
+                    del table[job_id]
+            self._playlists = [p for p in self._playlists if p["state"] == "listing"]
+            self._snapshot  = None
+        return {"jobs": len(known)}
+
+    # -- Watch folder ---------------------------------------------------------
+    def watch(self, folder: Path, interval: float, stop: threading.Event) -> None:
+        """
+        Poll `folder` for batch files; ingest each one once it has stopped
+        changing between two scans.  Runs until `stop` is set.
+        """
+        sizes: Dict[str, Tuple[int, float]] = {}
+        while not stop.wait(interval):
+            try:
+                entries = [e for e in os.scandir(folder)
+                           if e.is_file() and e.name.lower().endswith(WATCH_SUFFIXES)]
+            except OSError as exc:
+                self._emit("error", path=str(folder), message=f"cannot scan watch folder: {exc}")
+                continue
+            current = {}
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                current[entry.path] = (st.st_size, st.st_mtime)
+                if sizes.get(entry.path) == current[entry.path]:
+                    self.ingest(Path(entry.path))
+                    current.pop(entry.path)
+            sizes = current
+
+    def ingest(self, path: Path) -> int:
+        """Queue every URL in a dropped batch file, then move it out of the way."""
+        try:
+            pairs = _split_presets(_read_watch_file(path), self._args.preset)
+        except (OSError, UnicodeDecodeError, ValueError) as exc:
+            self._emit("error", path=str(path), message=f"cannot ingest: {exc}")
+            _move_aside(path, "failed")
+            return 0
+        _move_aside(path, "processed")
+        for url, preset in pairs:
+            self.enqueue(url, preset, source=path.name)
+        self._emit("ingested", path=str(path), urls=len(pairs))
+        return len(pairs)
+
+
+def _read_watch_file(path: Path) -> List[str]:
+    """Lines of a batch .txt file, or the target of a .url Internet Shortcut."""
+    if path.suffix.lower() != ".url":
+        return _read_batch(str(path))
+    with open(path, "r", encoding="utf-8", errors="replace") as fh:
+        lines = fh.read().splitlines()
+    return [line.split("=", 1)[1].strip() for line in lines
+            if line.strip().upper().startswith("URL=")][:1]
+
+
+def _move_aside(path: Path, subfolder: str) -> None:
+    """Move a watch folder file into `subfolder`, never overwriting an older one."""
+    dest_dir = path.parent / subfolder
+    try:
+        dest_dir.mkdir(exist_ok=True)
+        dest = dest_dir / path.name
+        if dest.exists():
+            dest = dest_dir / f"{path.stem}.{int(time.time() * 1000)}{path.suffix}"
+        os.replace(path, dest)
+    except OSError:
+        pass
+
+
+# =============================================================================
+#  HTTP API
+# =============================================================================
+def _json_bytes(payload) -> bytes:
+    return json.dumps(payload).encode("utf-8")
+
+
+class ApiServer:
+    """
+    Minimal HTTP/1.1 + JSON server on asyncio streams.  Every connection is
+    a coroutine on one event loop (keep-alive supported); blocking work is
+    handed to the loop's default executor.
+    """
+
+    _REASONS = {
+        200: "OK", 202: "Accepted", 400: "Bad Request", 403: "Forbidden",
+        404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+        415: "Unsupported Media Type", 500: "Internal Server Error",
+    }
+
+    def __init__(self, daemon: Daemon) -> None:
+        self._daemon = daemon
+
+    async def serve(self, host: str, port: int, on_ready) -> None:
+        server = await asyncio.start_server(self._connection, host, port, limit=MAX_HEADER_BYTES)
+        on_ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 413, {"error": "request header too large"}, False)
+                    return
+                keep_alive = await self._request(head, reader, writer)
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _request(self, head: bytes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Answer one request; returns whether the connection stays open."""
+        try:
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+        except ValueError:
+            await self._send(writer, 400, {"error": "malformed request line"}, False)
+            return False
+        headers = {}
+        for line in header_lines:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            await self._send(writer, 413, {"error": "bad or too large Content-Length"}, False)
+            return False
+        try:
+            body = await reader.readexactly(length) if length else b""
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return False
+
+        try:
+            status, payload = await self._route(method, target.split("?", 1)[0], headers, body)
+        except ApiError as exc:
+            status, payload = exc.status, {"error": str(exc)}
+        except Exception as exc:            # keep serving; report the bug to the client
+            status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+        await self._send(writer, status, payload, keep_alive)
+        return keep_alive
+
+    async def _route(self, method: str, path: str, headers: Dict[str, str], body: bytes):
+        host = headers.get("host", "")
+        if host.rsplit(":", 1)[0] not in _LOCAL_HOSTS and host not in _LOCAL_HOSTS:
+            raise ApiError(403, "only localhost requests are served")
+        daemon = self._daemon
+        loop   = asyncio.get_running_loop()
+
+        if path == "/health" and method == "GET":
+            return 200, daemon.health()
+        if path == "/presets" and method == "GET":
+            return 200, {p.name: p.label for p in QUALITY_PRESETS.values()}
+        if path == "/jobs":
+            if method == "GET":
+                return 200, daemon.snapshot()
+            if method == "DELETE":
+                return 200, daemon.clear_finished()
+            if method == "POST":
+                request = self._json_body(headers, body)
+                results = await loop.run_in_executor(None, self._enqueue, request)
+                return 202, {"results": results}
+            raise ApiError(405, f"{method} not allowed on /jobs")
+
+        match = _JOB_PATH_RE.match(path)
+        if match is None:
+            raise ApiError(404, f"no such endpoint: {path}")
+        job_id = int(match.group(1))
+        if match.group(2):                              # /jobs/<id>/cancel
+            if method != "POST":
+                raise ApiError(405, "use POST to cancel")
+            return 200, daemon.cancel(job_id)
+        if method == "GET":
+            job = daemon.manager.get_job(job_id)
+            if job is None:
+                raise ApiError(404, f"no job {job_id}")
+            return 200, daemon.job_view(job)
+        if method == "DELETE":
+            return 200, daemon.cancel(job_id)
+        raise ApiError(405, f"{method} not allowed on /jobs/<id>")
+
+    @staticmethod
+    def _json_body(headers: Dict[str, str], body: bytes) -> dict:
+        # A JSON content type cannot be sent cross-origin without a CORS preflight
+        if headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+            raise ApiError(415, "send the request body as Content-Type: application/json")
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError as exc:
+            raise ApiError(400, f"invalid JSON: {exc}") from None
+        if not isinstance(request, dict):
+            raise ApiError(400, "the request body must be a JSON object")
+        return request
+
+    def _enqueue(self, request: dict) -> List[dict]:
+        """POST /jobs, run in the executor (archive and cache lookups touch disk)."""
+        urls = request.get("urls") or ([request["url"]] if request.get("url") else [])
+        if not urls or not all(isinstance(u, str) and u.strip() for u in urls):
+            raise ApiError(400, 'give "url" or a non-empty "urls" list')
+        output_dir = request.get("output_dir")
+        if output_dir is not None and not isinstance(output_dir, str):
+            raise ApiError(400, '"output_dir" must be a string')
+        preset = self._daemon.policy(request)
+        return [
+            self._daemon.enqueue(url.strip(), preset, output_dir, bool(request.get("force")))
+            for url in urls
+        ]
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool) -> None:
+        body = payload if isinstance(payload, bytes) else _json_bytes(payload)
+        head = (
+            f"HTTP/1.1 {status} {self._REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+# =============================================================================
+#  Entry point
+# =============================================================================
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ytdaemon",
+        description="Download daemon with a localhost JSON API and a watch folder.",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default=str(Path.home() / "Downloads"),
+        help="default destination folder (default: ~/Downloads)",
+    )
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT,
+        help=f"API port on 127.0.0.1 (default: {DEFAULT_PORT}; 0 picks a free one)",
+    )
+    parser.add_argument("--watch", metavar="DIR", help="ingest .txt / .url batch files dropped here")
+    parser.add_argument(
+        "--watch-interval", type=float, default=WATCH_INTERVAL, metavar="SECONDS",
+        help=f"seconds between watch folder scans (default: {WATCH_INTERVAL:g})",
+    )
+    parser.add_argument(
+        "-p", "--preset", choices=list(QUALITY_PRESETS), default="best", metavar="NAME",
+        help="format policy for URLs that name none (default: best)",
+    )
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=DEFAULT_WORKERS,
+        help=f"parallel downloads, 1-{MAX_WORKERS} (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "-c", "--connections", type=int, default=CONNECTIONS_AUTO, metavar="N",
+        help=f"connections per download, 1-{MAX_CONNECTIONS}; 0 adapts to throughput (default: 0)",
+    )
+    parser.add_argument(
+        "-r", "--limit-rate", type=_parse_rate, default=0, metavar="RATE",
+        help="total bandwidth cap shared by all downloads, e.g. 5M or 800K bytes/s",
+    )
+    parser.add_argument(
+        "--job-limit-rate", type=_parse_rate, default=0, metavar="RATE",
+        help="bandwidth cap for each single download, e.g. 2M",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="ignore the format cache")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="re-queue downloads left unfinished by an earlier run on start",
+    )
+    parser.add_argument(
+        "--scratch-dir", metavar="DIR",
+        help="download and merge on this (fast, local) folder, then move into the output folder",
+    )
+    parser.add_argument(
+        "--no-hardlinks", action="store_true",
+        help="store duplicate files again instead of hardlinking them to an existing copy",
+    )
+    parser.add_argument(
+        "--isolated", action="store_true",
+        help="run yt-dlp in worker processes (hard cancellation, no GIL contention)",
+    )
+    parser.add_argument(
+        "--metrics-dir", metavar="DIR",
+        help="write jobs.jsonl and ytdownload.prom here (default: the app data folder)",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = _build_parser()
+    args   = parser.parse_args(argv)
+    if not 1 <= args.concurrency <= MAX_WORKERS:
+        parser.error(f"--concurrency must be between 1 and {MAX_WORKERS}")
+    if not 0 <= args.connections <= MAX_CONNECTIONS:
+        parser.error(f"--connections must be between 0 and {MAX_CONNECTIONS}")
+    if args.watch and not Path(args.watch).is_dir():
+        parser.error(f"--watch folder does not exist: {args.watch}")
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+
+    emitter = _Emitter(sys.stdout)
+    daemon  = Daemon(args, emitter)
+    warm_imports()
+    if args.resume:
+        daemon.resume()
+
+    stop = threading.Event()
+    if args.watch:
+        threading.Thread(
+            target=daemon.watch, args=(Path(args.watch), args.watch_interval, stop),
+            name="watch-folder", daemon=True,
+        ).start()
+
+    def _ready(port: int) -> None:
+        emitter.emit("listening", url=f"http://127.0.0.1:{port}", watch=args.watch)
+
+    try:
+        asyncio.run(ApiServer(daemon).serve("127.0.0.1", args.port, _ready))
+    except KeyboardInterrupt:
+        stop.set()
+        daemon.manager.stop()           # unfinished jobs stay journaled for --resume
+        emitter.emit("interrupted")
+        return EXIT_INTERRUPTED
+    except OSError as exc:
+        print(f"ytdaemon: cannot listen on port {args.port}: {exc}", file=sys.stderr)
+        return 1
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    # --isolated workers are spawned processes; a frozen build must route them here
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    sys.exit(main())
@@ -25,32 +25,38 @@ QA fixes applied in this version:
   - Fixed status bar layout order (pack bottom BEFORE content)
   - Added import traceback for detailed error reporting
   - Bind Enter key on URL entry to trigger fetch
+
+Run with --startup-report to print startup milestones (ms) as JSON and exit.
 """
 
 # == Standard library =========================================================
-import glob
-import os
+import time
+_STARTED = time.perf_counter()     # origin for the startup timing report
+
+import json
 import sys
 import threading
-import traceback
 import tkinter as tk
-from io import BytesIO
 from pathlib import Path
 from tkinter import filedialog, messagebox
 from typing import Callable, Dict, List, Optional
 
 # == Third-party ==============================================================
 import customtkinter as ctk
-import shutil
-import yt_dlp
 
-# Pillow + requests are optional (thumbnail preview only)
-try:
-    from PIL import Image
-    import requests
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+# == Local ====================================================================
+from ytcore import (
+    ACCENT, ERROR, SUCCESS, WARNING,
+    APP_DATA_DIR, CONNECTIONS_AUTO, JOB_CANCELLED, MAX_CONNECTIONS, MAX_WORKERS,
+    PRIORITY_INTERACTIVE, PROGRESS_FPS, QUALITY_PRESETS,
+    THUMBNAILS_AVAILABLE,
+    DownloadJob, DownloadManager, FormatRecord, MetadataCache, ProgressChannel, QualityPreset,
+    StartupTimer, ThumbnailCache,
+    _is_fetchable_url, _is_playlist_url, _video_key, detect_ffmpeg, ffmpeg_path, ffmpeg_ready, warm_imports,
+)
+
+_TIMER = StartupTimer(_STARTED)
+_TIMER.mark("imports")
 
 
 # =============================================================================
@@ -61,270 +67,143 @@ ctk.set_default_color_theme("blue")
 
 APP_TITLE  = "Youtube Downloader by Haekal"
 APP_WIDTH  = 880
-APP_HEIGHT = 660
-ACCENT     = "#3B82F6"
-SUCCESS    = "#22C55E"
-ERROR      = "#EF4444"
-WARNING    = "#F59E0B"
+APP_HEIGHT = 700
 BG_CARD    = "#1E1E2E"
 
+# Quality caps offered instead of a format list when a playlist / channel
+# URL is fetched (formats differ per entry, so only a cap makes sense).
+PLAYLIST_QUALITIES: Dict[str, Optional[int]] = {
+    "Playlist: best available": None,
+    "Playlist: up to 2160p":    2160,
+    "Playlist: up to 1440p":    1440,
+    "Playlist: up to 1080p":    1080,
+    "Playlist: up to 720p":     720,
+    "Playlist: up to 480p":     480,
+    "Playlist: up to 360p":     360,
+}
+
+# Scratch row text while downloads go straight to the save folder
+SCRATCH_OFF = "(off - write straight to the save folder)"
+
+# Quick-download presets: with one selected, Enter / Download queues the
+# URL at once and the format list is never fetched.
+PRESET_OFF = "Off - fetch formats first"
+PRESET_CHOICES: Dict[str, Optional[QualityPreset]] = {
+    PRESET_OFF: None,
+    **{preset.label: preset for preset in QUALITY_PRESETS.values()},
+}
+
+# Quiet time after the last edit of the URL field before its formats are
+# fetched speculatively, and whether a YouTube video link on the clipboard
+# is prefetched (into the format cache only) when the window gains focus.
+PREFETCH_DELAY_MS  = 400
+PREFETCH_CLIPBOARD = True
+
+# "Auto" lets the engine add connections while throughput still improves
+CONNECTION_CHOICES = ["Auto"] + [str(n) for n in (1, 2, 4, 8, MAX_CONNECTIONS)]
+
+# Global bandwidth cap shared by all downloads (bytes/s, 0 = unlimited)
+BANDWIDTH_LIMITS: Dict[str, int] = {
+    "Unlimited": 0,
+    "1 MB/s":    1_000_000,
+    "2 MB/s":    2_000_000,
+    "5 MB/s":    5_000_000,
+    "10 MB/s":   10_000_000,
+    "20 MB/s":   20_000_000,
+    "50 MB/s":   50_000_000,
+}
+
 
 # =============================================================================
-#  FFmpeg detection
+#  Queue panel row
 # =============================================================================
-_FFMPEG_CANDIDATES: List[str] = [
-    str(Path(sys.executable).parent / "ffmpeg.exe"),  # next to python.exe
-    str(Path(__file__).parent       / "ffmpeg.exe"),  # next to this script (easiest)
-    r"C:\ffmpeg\bin\ffmpeg.exe",
-    r"C:\Program Files\ffmpeg\bin\ffmpeg.exe",
-    r"C:\Program Files (x86)\ffmpeg\bin\ffmpeg.exe",
-    str(Path.home() / "ffmpeg"           / "bin" / "ffmpeg.exe"),
-    str(Path.home() / "Downloads/ffmpeg" / "bin" / "ffmpeg.exe"),
-]
-
-
-def _find_ffmpeg() -> Optional[str]:
-    """
-    Return the absolute path to ffmpeg, or None if not found.
-    Search order: system PATH first, then common Windows directories.
-    """
-    found = shutil.which("ffmpeg")   # returns full path or None
-    if found:
-        return found
-    for candidate in _FFMPEG_CANDIDATES:
-        if Path(candidate).exists():
-            return candidate
-    return None
-
-
-FFMPEG_PATH: Optional[str] = _find_ffmpeg()   # resolved once at startup
+class JobRow(ctk.CTkFrame):
+    """One line in the queue panel: title, state text, progress bar, cancel/retry."""
 
+    def __init__(
+        self, parent, job: DownloadJob, on_cancel: Callable, on_retry: Callable,
+    ) -> None:
+        super().__init__(parent, fg_color="#252535", corner_radius=8)
+        self._job_id   = job.id
+        self._on_retry = on_retry
 
-# =============================================================================
-#  Format helpers
-# =============================================================================
-def _filesize_str(size_bytes: Optional[float]) -> str:
-    """Convert bytes to a human-readable string."""
-    if size_bytes is None:
-        return "~"
-    for unit in ("B", "KB", "MB", "GB"):
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} TB"
-
-
-def _build_format_label(fmt: dict) -> Optional[str]:
-    """
-    Return a display label for one yt-dlp format entry.
-    Returns None for audio-only streams (they are skipped in the dropdown).
-    """
-    vcodec = fmt.get("vcodec") or "none"
-    if vcodec == "none":
-        return None                          # skip audio-only streams
-
-    res     = fmt.get("resolution") or f"{fmt.get('width','?')}x{fmt.get('height','?')}"
-    ext     = fmt.get("ext", "?")
-    fps     = fmt.get("fps") or ""
-    size    = _filesize_str(fmt.get("filesize") or fmt.get("filesize_approx"))
-    fps_str = f"  {fps}fps" if fps else ""
-
-    return f"{res}{fps_str}  |  {ext.upper()}  |  {vcodec}  |  ~{size}"
+        top = ctk.CTkFrame(self, fg_color="transparent")
+        top.pack(fill="x", padx=8, pady=(6, 2))
 
+        self._title     = ""
+        self._title_lbl = ctk.CTkLabel(
+            top, text="", font=ctk.CTkFont(size=11), text_color="#CCCCDD", anchor="w",
+        )
+        self._title_lbl.pack(side="left", fill="x", expand=True)
+        self.set_title(job.title)
 
-# =============================================================================
-#  DownloadManager
-# =============================================================================
-class DownloadManager:
-    """
-    All yt-dlp interactions live here.
-    Heavy work runs in daemon threads; results come back via callbacks
-    so the Tkinter main loop never blocks.
-    """
-
-    def __init__(self) -> None:
-        self._cancel_flag = False
-
-    def cancel(self) -> None:
-        """Signal the active operation to abort."""
-        self._cancel_flag = True
-
-    # -- Fetch available formats ----------------------------------------------
-    def fetch_formats(
-        self,
-        url:        str,
-        on_success: Callable,
-        on_error:   Callable,
-    ) -> None:
-        """
-        Extract format list without downloading anything.
-        Calls on_success(formats, info) or on_error(msg).
-        """
-        def _worker() -> None:
-            try:
-                ydl_opts = {
-                    "quiet":         True,
-                    "no_warnings":   True,
-                    "skip_download": True,
-                }
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-
-                # Guard: info is None for private / deleted / unavailable videos
-                if not info:
-                    on_error("Could not retrieve video info.\nThe video may be private or unavailable.")
-                    return
-
-                formats: List[Dict] = []
-                seen: set = set()
-
-                for fmt in info.get("formats", []):
-                    label = _build_format_label(fmt)
-                    if label is None:
-                        continue
-                    # Deduplicate by (height, fps)
-                    key = (fmt.get("height"), fmt.get("fps"))
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    formats.append({
-                        "label":     label,
-                        "format_id": fmt["format_id"],
-                        "height":    fmt.get("height") or 0,
-                        "fps":       fmt.get("fps")    or 0,
-                        "ext":       fmt.get("ext", ""),
-                        "vcodec":    fmt.get("vcodec", ""),
-                    })
-
-                formats.sort(key=lambda f: (f["height"], f["fps"]), reverse=True)
-                on_success(formats, info)
-
-            except yt_dlp.utils.DownloadError as exc:
-                on_error(f"yt-dlp error:\n{exc}")
-            except Exception as exc:
-                on_error(f"Unexpected error: {exc}\n\n{traceback.format_exc()}")
-
-        self._cancel_flag = False
-        threading.Thread(target=_worker, daemon=True).start()
-
-    # -- Download -------------------------------------------------------------
-    def download(
-        self,
-        url:         str,
-        format_id:   str,
-        height:      int,
-        output_dir:  str,
-        on_progress: Callable,
-        on_status:   Callable,
-        on_done:     Callable,
-        on_error:    Callable,
-    ) -> None:
-        """
-        Download chosen video stream + best audio, merge to MP4.
+        self._cancel_btn = ctk.CTkButton(
+            top, text="x", width=24, height=20,
+            fg_color="#444444", hover_color="#555555",
+            command=lambda: on_cancel(job.id),
+        )
+        self._cancel_btn.pack(side="right")
 
-        Format selector tiers (first match wins):
-          1. <id>+bestaudio[ext=m4a]   -- video + AAC audio  (ideal for MP4)
-          2. <id>+bestaudio[ext=webm]  -- video + Opus audio
-          3. <id>+bestaudio            -- video + any best audio
-          4. best[height<=N][ext=mp4]  -- fallback: pre-muxed MP4
-          5. best[height<=N]           -- last resort: any muxed stream
+        self._bar = ctk.CTkProgressBar(self, height=8, progress_color=ACCENT)
+        self._bar.pack(fill="x", padx=8, pady=(0, 2))
+        self._bar.set(0)
 
-        Audio is always re-encoded to AAC 192k to ensure MP4 compatibility.
-        Video is stream-copied (fast, no quality loss).
-        """
-        def _progress_hook(d: dict) -> None:
-            if self._cancel_flag:
-                raise yt_dlp.utils.DownloadError("Cancelled by user.")
-
-            status = d.get("status")
-            if status == "downloading":
-                total      = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
-                downloaded = d.get("downloaded_bytes") or 0
-                speed      = d.get("speed") or 0
-                eta        = d.get("eta") or 0
-
-                pct     = int(downloaded / total * 100) if total > 0 else 0
-                spd_str = f"{_filesize_str(speed)}/s" if speed else "..."
-                eta_str = f"  ETA {eta}s" if eta else ""
-                on_progress(pct, f"Downloading {pct}%  {spd_str}{eta_str}")
-
-            elif status == "finished":
-                on_status("Merging video + audio...", WARNING)
-
-        def _worker() -> None:
-            try:
-                on_status("Starting download...", ACCENT)
-
-                h = height or 9999
-                fmt_selector = (
-                    f"{format_id}+bestaudio[ext=m4a]/"
-                    f"{format_id}+bestaudio[ext=webm]/"
-                    f"{format_id}+bestaudio/"
-                    f"best[height<={h}][ext=mp4]/"
-                    f"best[height<={h}]"
-                )
-
-                # ffmpeg_location must be a DIRECTORY, not the exe itself
-                ffmpeg_dir = str(Path(FFMPEG_PATH).parent) if FFMPEG_PATH else None
-
-                # Keep %(ext)s so each temp stream gets its natural extension.
-                # yt-dlp renames the merged result to .mp4 automatically via
-                # merge_output_format.
-                outtmpl = os.path.join(output_dir, "%(title)s.%(ext)s")
-
-                ydl_opts: dict = {
-                    "format":              fmt_selector,
-                    "outtmpl":             outtmpl,
-                    "merge_output_format": "mp4",   # merged file -> .mp4
-                    "keep_video":          False,    # delete temp streams after merge
-                    "progress_hooks":      [_progress_hook],
-                    "quiet":               True,
-                    "no_warnings":         True,
-                    # Target the merger step: copy video, re-encode audio -> AAC
-                    # "FFmpegMergerPP" is the internal key yt-dlp uses for merging
-                    "postprocessor_args": {
-                        "FFmpegMergerPP": [
-                            "-c:v", "copy",
-                            "-c:a", "aac",
-                            "-b:a", "192k",
-                        ]
-                    },
-                }
-
-                if ffmpeg_dir:
-                    ydl_opts["ffmpeg_location"] = ffmpeg_dir
-
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    ydl.download([url])
-
-                # Safety sweep: remove stray .part files
-                for leftover in glob.glob(os.path.join(output_dir, "*.part")):
-                    try:
-                        os.remove(leftover)
-                    except OSError:
-                        pass
-
-                on_done()
-
-            except yt_dlp.utils.DownloadError as exc:
-                msg = str(exc)
-                if "Cancelled" in msg:
-                    on_status("Download cancelled.", WARNING)
-                else:
-                    on_error(f"Download failed:\n{msg}")
-            except Exception as exc:
-                on_error(f"Unexpected error: {exc}\n\n{traceback.format_exc()}")
-
-        self._cancel_flag = False
-        threading.Thread(target=_worker, daemon=True).start()
+        self._lbl = ctk.CTkLabel(
+            self, text="Queued",
+            font=ctk.CTkFont(family="Consolas", size=10),
+            text_color="#8888AA", anchor="w",
+        )
+        self._lbl.pack(fill="x", padx=8, pady=(0, 4))
+
+    def set_title(self, title: str) -> None:
+        """Show the job's title (preset jobs learn it only once extracted)."""
+        if title == self._title:
+            return
+        self._title = title
+        short = title if len(title) <= 48 else title[:45] + "..."
+        self._title_lbl.configure(text=f"#{self._job_id}  {short}")
+
+    def update_progress(self, pct: int, label: str, color: str = "#8888AA") -> None:
+        self._bar.set(pct / 100)
+        self._lbl.configure(text=label, text_color=color)
+
+    def mark_finished(self, label: str, color: str) -> None:
+        self._lbl.configure(text=label, text_color=color)
+        self._cancel_btn.configure(state="disabled")
+        if color == SUCCESS:
+            self._bar.set(1)
+
+    def offer_retry(self) -> None:
+        """Turn the cancel button into a retry button (failed jobs resume)."""
+        self._cancel_btn.configure(
+            text="Retry", width=48, state="normal", fg_color=ACCENT,
+            command=lambda: self._on_retry(self._job_id),
+        )
 
 
 # =============================================================================
 #  Main Application
 # =============================================================================
 class App(ctk.CTk):
-    def __init__(self) -> None:
+    # Milestones that complete the startup report
+    STARTUP_MILESTONES = ("imports", "window_built", "first_paint", "ffmpeg_detected", "yt_dlp_ready")
+
+    def __init__(
+        self,
+        progress_fps:   int = PROGRESS_FPS,
+        timer:          Optional[StartupTimer] = None,
+        report_startup: bool = False,
+    ) -> None:
+        # FFmpeg detection and the yt-dlp import run while the window is built
+        timer = timer or StartupTimer()
+        detect_ffmpeg()
+        warm_imports(
+            on_done=lambda: timer.mark("yt_dlp_ready"),
+            on_warm=lambda: timer.mark("yt_dlp_warm"),
+        )
+
         super().__init__()
+        self._timer = timer
 
         self.title(APP_TITLE)
         self.geometry(f"{APP_WIDTH}x{APP_HEIGHT}")
@@ -332,15 +211,52 @@ class App(ctk.CTk):
         self.minsize(700, 560)
 
         self._manager:    DownloadManager = DownloadManager()
-        self._formats:    List[Dict]      = []
-        self._info:       Dict            = {}
+        # Dropdown label -> format, plus the title / duration / thumbnail of
+        # the fetched video; the raw info dict is not kept (the format cache
+        # holds a slimmed copy for the download to reuse).
+        self._formats:    Dict[str, FormatRecord] = {}
+        self._summary:    Dict                    = {}
         self._output_dir: str             = str(Path.home() / "Downloads")
         self._thumb_ref                   = None   # holds CTkImage to prevent GC
+        self._thumb_key:  Optional[str]   = None   # video whose preview should be shown
+        self._thumbs = ThumbnailCache() if THUMBNAILS_AVAILABLE else None
+        self._job_rows:   Dict[int, JobRow] = {}
+        self._focus_job:  Optional[int]     = None  # job shown in the main progress bar
+        self._progress    = ProgressChannel()
+        self._playlist_url: Optional[str]         = None   # set while in playlist mode
+        self._expansions:   List[threading.Event] = []     # running playlist listings
+        self._fetching:     Optional[threading.Event] = None   # cancels the running fetch
+        # Every fetch gets a new generation; results of older ones are dropped
+        self._fetch_gen:    int           = 0
+        self._fetch_url:    Optional[str] = None   # URL of the running / last fetch
+        self._fetch_shown:  bool          = False  # False for a clipboard prefetch
+        self._prefetch_after: Optional[str] = None  # pending debounce timer
+        self._clip_seen:    Optional[str] = None   # last clipboard link prefetched
+        self._progress_ms = max(1, 1000 // max(1, progress_fps))
 
         self._build_ui()
-
+        self._timer.mark("window_built")
+        # Idle callbacks run after Tk has drawn the initial layout
+        self.after_idle(lambda: self._timer.mark("first_paint"))
+        self.after(self._progress_ms, self._pump_progress)
+        self.after(50, self._poll_ffmpeg)
+        if not report_startup:
+            self.after(200, self._offer_resume)
+        self.after(100, self._poll_startup_report, report_startup)
+
+    def _poll_ffmpeg(self) -> None:
+        """Update the header once background FFmpeg detection has finished."""
+        if not ffmpeg_ready():
+            self.after(50, self._poll_ffmpeg)
+            return
+        self._timer.mark("ffmpeg_detected")
+        path = ffmpeg_path()
+        self._ffmpeg_lbl.configure(
+            text=f"ffmpeg: {Path(path).name}" if path else "ffmpeg: NOT FOUND",
+            text_color=SUCCESS if path else ERROR,
+        )
         # Show ffmpeg warning AFTER window is fully built
-        if not FFMPEG_PATH:
+        if not path:
             self._set_status("WARNING: FFmpeg not detected - merging will fail!", WARNING)
             messagebox.showwarning(
                 "FFmpeg Not Found",
@@ -353,6 +269,26 @@ class App(ctk.CTk):
                 "Restart the app after installing."
             )
 
+    def _poll_startup_report(self, print_and_exit: bool) -> None:
+        """
+        Once every startup milestone is in, save the report to the app data
+        folder (and with --startup-report print it and close the window).
+        """
+        if not self._timer.has(*self.STARTUP_MILESTONES):
+            self.after(100, self._poll_startup_report, print_and_exit)
+            return
+        report = self._timer.report()
+        try:
+            APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+            with open(APP_DATA_DIR / "startup.json", "w", encoding="utf-8") as fh:
+                json.dump(report, fh)
+        except OSError:
+            pass
+        if print_and_exit:
+            if sys.stdout is not None:      # windowed builds have no console
+                print(json.dumps(report), flush=True)
+            self.destroy()
+
     # -- UI layout ------------------------------------------------------------
     def _build_ui(self) -> None:
         # IMPORTANT: pack bottom widgets BEFORE fill/expand widgets.
@@ -376,6 +312,7 @@ class App(ctk.CTk):
         right.pack_propagate(False)
 
         self._build_thumbnail_panel(right)
+        self._build_settings_panel(right)
         self._build_controls(left)
 
     def _build_header(self) -> None:
@@ -390,15 +327,14 @@ class App(ctk.CTk):
             text_color=ACCENT,
         ).pack(side="left", padx=18)
 
-        ffmpeg_status = (
-            f"ffmpeg: {Path(FFMPEG_PATH).name}" if FFMPEG_PATH else "ffmpeg: NOT FOUND"
-        )
-        ctk.CTkLabel(
+        # Filled in by _poll_ffmpeg once background detection finishes
+        self._ffmpeg_lbl = ctk.CTkLabel(
             header,
-            text=ffmpeg_status,
+            text="ffmpeg: detecting...",
             font=ctk.CTkFont(family="Consolas", size=10),
-            text_color=SUCCESS if FFMPEG_PATH else ERROR,
-        ).pack(side="right", padx=18)
+            text_color="#8888AA",
+        )
+        self._ffmpeg_lbl.pack(side="right", padx=18)
 
     def _build_status_bar(self) -> None:
         bar = ctk.CTkFrame(self, fg_color=BG_CARD, corner_radius=0, height=30)
@@ -437,6 +373,98 @@ class App(ctk.CTk):
         )
         self._dur_lbl.pack()
 
+    def _build_settings_panel(self, parent: ctk.CTkFrame) -> None:
+        # Tuning options scroll under the preview, so the window stays short
+        # enough for 768 px screens; each label sits above its control.
+        ctk.CTkLabel(
+            parent, text="Settings",
+            font=ctk.CTkFont(size=11), text_color="#555577",
+        ).pack(pady=(14, 0))
+
+        panel = ctk.CTkScrollableFrame(parent, fg_color="transparent")
+        panel.pack(fill="both", expand=True, padx=4, pady=(0, 8))
+
+        def _label(text: str) -> None:
+            ctk.CTkLabel(
+                panel, text=text,
+                font=ctk.CTkFont(size=12, weight="bold"), text_color="#AAAACC",
+            ).pack(anchor="w", padx=6, pady=(8, 2))
+
+        # Scratch folder: streams and merging on fast local disk, then moved
+        _label("Scratch folder")
+        self._scratch_lbl = ctk.CTkLabel(
+            panel, text=SCRATCH_OFF,
+            font=ctk.CTkFont(family="Consolas", size=11),
+            text_color="#8888AA", anchor="w", justify="left", wraplength=190,
+        )
+        self._scratch_lbl.pack(fill="x", padx=6)
+
+        scratch_row = ctk.CTkFrame(panel, fg_color="transparent")
+        scratch_row.pack(fill="x", padx=6, pady=(2, 0))
+
+        ctk.CTkButton(
+            scratch_row, text="Browse", width=80, height=28,
+            fg_color="#333355", hover_color="#444466",
+            command=self._on_browse_scratch,
+        ).pack(side="left")
+
+        ctk.CTkButton(
+            scratch_row, text="x", width=30, height=28,
+            fg_color="#333355", hover_color="#444466",
+            command=lambda: self._set_scratch(None),
+        ).pack(side="left", padx=(6, 0))
+
+        # Parallel downloads (worker pool size)
+        _label("Parallel downloads")
+        self._workers_var = tk.StringVar(value=str(self._manager.max_workers))
+        ctk.CTkOptionMenu(
+            panel,
+            variable=self._workers_var,
+            values=[str(n) for n in range(1, MAX_WORKERS + 1)],
+            width=70, height=28,
+            fg_color="#252535",
+            button_color=ACCENT,
+            button_hover_color="#2563EB",
+            command=self._on_workers_changed,
+        ).pack(anchor="w", padx=6)
+
+        # Connections per stream (parallel ranges / fragments)
+        _label("Connections per download")
+        self._conn_var = tk.StringVar(value=CONNECTION_CHOICES[0])
+        ctk.CTkOptionMenu(
+            panel,
+            variable=self._conn_var,
+            values=CONNECTION_CHOICES,
+            width=70, height=28,
+            fg_color="#252535",
+            button_color=ACCENT,
+            button_hover_color="#2563EB",
+            command=self._on_connections_changed,
+        ).pack(anchor="w", padx=6)
+
+        # Global bandwidth cap (videos queued by hand get the larger share)
+        _label("Bandwidth limit")
+        self._bw_var = tk.StringVar(value="Unlimited")
+        ctk.CTkOptionMenu(
+            panel,
+            variable=self._bw_var,
+            values=list(BANDWIDTH_LIMITS),
+            width=110, height=28,
+            fg_color="#252535",
+            button_color=ACCENT,
+            button_hover_color="#2563EB",
+            command=self._on_bandwidth_changed,
+        ).pack(anchor="w", padx=6)
+
+        # Run yt-dlp in worker processes (UI stays smooth; cancel is immediate)
+        _label("Isolated worker processes")
+        self._iso_var = tk.BooleanVar(value=self._manager.isolated)
+        ctk.CTkSwitch(
+            panel, text="", variable=self._iso_var,
+            width=46, progress_color=ACCENT,
+            command=self._on_isolation_changed,
+        ).pack(anchor="w", padx=6, pady=(0, 8))
+
     def _build_controls(self, parent: ctk.CTkFrame) -> None:
         # URL row
         ctk.CTkLabel(
@@ -454,7 +482,12 @@ class App(ctk.CTk):
             height=38,
         )
         self._url_entry.pack(side="left", fill="x", expand=True, padx=(0, 8))
-        self._url_entry.bind("<Return>", lambda _e: self._on_fetch())  # Enter key support
+        self._url_entry.bind("<Return>", lambda _e: self._on_url_enter())  # Enter key support
+        # Typing and pasting (keyboard or context menu) start a debounced prefetch
+        for sequence in ("<KeyRelease>", "<<Paste>>", "<<Cut>>"):
+            self._url_entry.bind(sequence, self._on_url_edited)
+        if PREFETCH_CLIPBOARD:
+            self.bind("<FocusIn>", self._on_focus_in)
 
         self._fetch_btn = ctk.CTkButton(
             url_row, text="Fetch Formats", width=130, height=38,
@@ -484,6 +517,27 @@ class App(ctk.CTk):
         )
         self._format_menu.pack(fill="x", padx=18, pady=(0, 10))
 
+        # Quick-download preset (skips the format fetch)
+        preset_row = ctk.CTkFrame(parent, fg_color="transparent")
+        preset_row.pack(fill="x", padx=18, pady=(0, 10))
+
+        ctk.CTkLabel(
+            preset_row, text="Quick preset",
+            font=ctk.CTkFont(size=12, weight="bold"), text_color="#AAAACC",
+        ).pack(side="left")
+
+        self._preset_var = tk.StringVar(value=PRESET_OFF)
+        ctk.CTkOptionMenu(
+            preset_row,
+            variable=self._preset_var,
+            values=list(PRESET_CHOICES),
+            width=290, height=28,
+            fg_color="#252535",
+            button_color=ACCENT,
+            button_hover_color="#2563EB",
+            command=self._on_preset_changed,
+        ).pack(side="right")
+
         # Output folder
         ctk.CTkLabel(
             parent, text="Save To",
@@ -491,7 +545,7 @@ class App(ctk.CTk):
         ).pack(anchor="w", padx=18, pady=(4, 2))
 
         folder_row = ctk.CTkFrame(parent, fg_color="transparent")
-        folder_row.pack(fill="x", padx=18, pady=(0, 16))
+        folder_row.pack(fill="x", padx=18, pady=(0, 10))
 
         self._folder_lbl = ctk.CTkLabel(
             folder_row, text=self._output_dir,
@@ -539,7 +593,7 @@ class App(ctk.CTk):
         self._dl_btn.pack(side="left", fill="x", expand=True, padx=(0, 8))
 
         self._cancel_btn = ctk.CTkButton(
-            btn_row, text="Cancel", height=42, width=100,
+            btn_row, text="Cancel All", height=42, width=100,
             fg_color="#444444", hover_color="#555555",
             font=ctk.CTkFont(size=13),
             state="disabled",
@@ -547,6 +601,24 @@ class App(ctk.CTk):
         )
         self._cancel_btn.pack(side="right")
 
+        # Queue panel
+        queue_hdr = ctk.CTkFrame(parent, fg_color="transparent")
+        queue_hdr.pack(fill="x", padx=18, pady=(4, 2))
+
+        ctk.CTkLabel(
+            queue_hdr, text="Queue",
+            font=ctk.CTkFont(size=12, weight="bold"), text_color="#AAAACC",
+        ).pack(side="left")
+
+        ctk.CTkButton(
+            queue_hdr, text="Clear finished", width=100, height=24,
+            fg_color="#333355", hover_color="#444466",
+            command=self._on_clear_finished,
+        ).pack(side="right")
+
+        self._queue_frame = ctk.CTkScrollableFrame(parent, fg_color="#181826", height=150)
+        self._queue_frame.pack(fill="both", expand=True, padx=18, pady=(0, 14))
+
     # -- Event handlers -------------------------------------------------------
     def _on_browse(self) -> None:
         folder = filedialog.askdirectory(
@@ -556,12 +628,131 @@ class App(ctk.CTk):
             self._output_dir = folder
             self._folder_lbl.configure(text=folder)
 
+    def _on_browse_scratch(self) -> None:
+        folder = filedialog.askdirectory(
+            initialdir=self._manager.scratch_dir or self._output_dir,
+            title="Choose a scratch folder on fast local disk",
+        )
+        if folder:
+            self._set_scratch(folder)
+
+    def _set_scratch(self, folder: Optional[str]) -> None:
+        self._manager.set_scratch_dir(folder)
+        self._scratch_lbl.configure(text=folder or SCRATCH_OFF)
+        self._set_status(
+            f"New downloads are staged in {folder} and then moved." if folder
+            else "New downloads are written straight to the save folder.", "#8888AA",
+        )
+
+    def _selected_preset(self) -> Optional[QualityPreset]:
+        return PRESET_CHOICES.get(self._preset_var.get())
+
+    def _on_url_enter(self) -> None:
+        """Enter in the URL field: download at once with a preset, else fetch formats."""
+        if self._selected_preset() is None:
+            self._on_fetch()
+            return
+        url = self._url_entry.get().strip()
+        if not url:
+            self._set_status("Please paste a YouTube URL.", ERROR)
+        elif _is_playlist_url(url):
+            self._start_playlist(url)
+        else:
+            self._download_preset(url)
+
+    def _on_preset_changed(self, label: str) -> None:
+        if PRESET_CHOICES.get(label) is None:
+            if not self._formats and self._playlist_url is None:
+                self._dl_btn.configure(state="disabled")
+            self._set_status("Preset off: fetch formats, then pick one.", "#8888AA")
+            return
+        self._dl_btn.configure(state="normal")
+        self._set_status(f"Preset '{label}': press Enter or Download to start at once.", ACCENT)
+
     def _on_fetch(self) -> None:
         url = self._url_entry.get().strip()
         if not url:
             self._set_status("Please paste a YouTube URL.", ERROR)
             return
 
+        if _is_playlist_url(url):
+            self._enter_playlist_mode(url)
+            return
+
+        if url == self._fetch_url and self._fetching is not None:
+            if not self._fetch_shown:       # adopt the clipboard prefetch
+                self._fetch_shown = True
+                self._show_fetching(url)
+            return
+        self._start_fetch(url)
+
+    def _on_url_edited(self, _event=None) -> None:
+        """Restart the prefetch countdown on every edit of the URL field."""
+        if self._prefetch_after is not None:
+            self.after_cancel(self._prefetch_after)
+        self._prefetch_after = self.after(PREFETCH_DELAY_MS, self._prefetch_entry)
+
+    def _prefetch_entry(self) -> None:
+        """The URL field has settled: fetch its formats unless already under way."""
+        self._prefetch_after = None
+        url = self._url_entry.get().strip()
+        if url == self._playlist_url or not _is_fetchable_url(url):
+            return
+        if self._selected_preset() is not None and not _is_playlist_url(url):
+            # Enter downloads at once; just warm the cache for that download
+            if url != self._fetch_url:
+                self._start_fetch(url, shown=False)
+            return
+        if url == self._fetch_url and self._fetch_shown:
+            return                          # already fetched / being fetched
+        self._on_fetch()                    # adopts a matching clipboard prefetch
+
+    def _on_focus_in(self, event=None) -> None:
+        """Prefetch a YouTube video link found on the clipboard into the format cache."""
+        # Bound on the root, so Tk also delivers every child widget's FocusIn:
+        # only the window itself gaining focus counts as "activated"
+        if event is not None and event.widget is not self:
+            return
+        if self._url_entry.get().strip() or self._fetching is not None:
+            return
+        try:
+            text = self.clipboard_get().strip()
+        except tk.TclError:                 # empty clipboard or not text
+            return
+        # Only links naming a single YouTube video (video key "youtube:<id>")
+        is_video = _is_fetchable_url(text) and _video_key(text).startswith("youtube:")
+        if text == self._clip_seen or not is_video:
+            return
+        self._clip_seen = text
+        self._start_fetch(text, shown=False)
+
+    def _supersede_fetch(self) -> int:
+        """Cancel the running fetch, if any, and return a new generation token."""
+        if self._fetching is not None:
+            self._fetching.set()
+            self._fetching = None
+        self._fetch_gen += 1
+        return self._fetch_gen
+
+    def _start_fetch(self, url: str, shown: bool = True) -> None:
+        """
+        Fetch `url`'s formats, superseding any earlier fetch.  A fetch that
+        is not shown only warms the format cache; pasting its URL later
+        either adopts it or is answered from the cache.
+        """
+        gen = self._supersede_fetch()
+        self._fetch_url   = url
+        self._fetch_shown = shown
+        if shown:
+            self._show_fetching(url)
+        self._fetching = self._manager.fetch_formats(
+            url,
+            on_success=lambda formats, info, g=gen: self._cb_formats_ready(g, formats, info),
+            on_error=lambda msg, g=gen: self._cb_fetch_error(g, msg),
+        )
+
+    def _show_fetching(self, url: str) -> None:
+        self._playlist_url = None
         self._set_status("Fetching formats...", ACCENT)
         self._fetch_btn.configure(state="disabled")
         self._dl_btn.configure(state="disabled")
@@ -569,58 +760,221 @@ class App(ctk.CTk):
         self._format_var.set("Fetching...")
         self._progress_bar.set(0)
         self._progress_lbl.configure(text="")
-        self._formats = []
+        self._formats = {}
+        self._show_thumbnail(url, None)     # instant if this video was seen before
+        self._cancel_btn.configure(state="normal")
 
-        self._manager.fetch_formats(
-            url,
-            on_success=self._cb_formats_ready,
-            on_error=self._cb_fetch_error,
+    def _enter_playlist_mode(self, url: str) -> None:
+        """Playlist / channel URL: offer quality caps instead of a format list."""
+        self._playlist_url = url
+        self._formats      = {}
+        self._summary      = {}
+        labels = list(PLAYLIST_QUALITIES)
+        self._format_menu.configure(state="normal", values=labels)
+        self._format_var.set(labels[0])
+        self._dl_btn.configure(state="normal")
+        self._title_lbl.configure(text="Playlist / channel")
+        self._dur_lbl.configure(text="")
+        self._set_status(
+            "Playlist detected. Pick a quality cap and click Download "
+            "(videos are queued as they are listed).", SUCCESS
+        )
+
+    def _start_playlist(self, url: str) -> None:
+        max_height = PLAYLIST_QUALITIES.get(self._format_var.get())
+        self._cancel_btn.configure(state="normal")
+        self._set_status("Listing playlist...", ACCENT)
+        cancel = self._manager.download_playlist(
+            url, self._output_dir,
+            bind        = self._bind_job,
+            on_error    = self._cb_playlist_error,
+            on_finished = self._cb_playlist_done,
+            max_height  = max_height,
+            on_skip     = self._cb_playlist_skip,
+            preset      = self._selected_preset(),   # overrides the cap when set
         )
+        self._expansions.append(cancel)
 
     def _on_download(self) -> None:
         url = self._url_entry.get().strip()
+        if url and (url == self._playlist_url
+                    or (_is_playlist_url(url) and self._selected_preset() is not None)):
+            self._start_playlist(url)
+            return
+        if url and not self._formats and self._selected_preset() is not None:
+            self._download_preset(url)
+            return
         if not url or not self._formats:
             return
 
-        selected = self._format_var.get()
-        fmt = next((f for f in self._formats if f["label"] == selected), None)
+        fmt = self._formats.get(self._format_var.get())
         if fmt is None:
             self._set_status("Please select a valid format.", ERROR)
             return
 
-        self._dl_btn.configure(state="disabled")
-        self._fetch_btn.configure(state="disabled")
+        if not self._confirm_redownload(url):
+            return
+
         self._cancel_btn.configure(state="normal")
         self._progress_bar.set(0)
         self._progress_lbl.configure(text="")
 
-        # Use default arg to capture color value at call time (fixes closure bug)
-        def _status_cb(msg: str, color: str = ACCENT) -> None:
-            self.after(0, lambda m=msg, c=color: self._set_status(m, c))
-
-        self._manager.download(
-            url         = url,
-            format_id   = fmt["format_id"],
-            height      = fmt["height"],
-            output_dir  = self._output_dir,
-            on_progress = self._cb_progress,
-            on_status   = _status_cb,
-            on_done     = self._cb_done,
-            on_error    = self._cb_error,
+        job = DownloadJob(
+            url        = url,
+            format_id  = fmt.format_id,
+            height     = fmt.height,
+            output_dir = self._output_dir,
+            title      = self._summary.get("title") or "",
+            priority   = PRIORITY_INTERACTIVE,    # ahead of playlist entries
+        )
+        # Bind UI callbacks BEFORE submitting so no early event is lost
+        self._bind_job(job)
+        self._manager.submit(job)
+        self._set_status(f"Queued #{job.id}: {job.title}", ACCENT)
+
+    def _confirm_redownload(self, url: str) -> bool:
+        """False if `url` is in the archive and the user declines to download it again."""
+        record = self._manager.archive.verified(url)
+        if record is not None and not messagebox.askyesno(
+            "Already Downloaded",
+            f"This video was downloaded before:\n\n{record['path']}\n\n"
+            "Download it again?",
+        ):
+            self._set_status(f"Skipped, already downloaded: {record['path']}", WARNING)
+            return False
+        return True
+
+    def _download_preset(self, url: str) -> None:
+        """Queue `url` under the selected preset without fetching its formats."""
+        preset = self._selected_preset()
+        if not self._confirm_redownload(url):
+            return
+
+        self._cancel_btn.configure(state="normal")
+        job = self._manager.download_preset(
+            url, preset, self._output_dir,
+            bind=self._bind_job, priority=PRIORITY_INTERACTIVE,
+        )
+        self._url_entry.delete(0, "end")    # ready for the next URL
+        self._set_status(f"Queued #{job.id} ({preset.name}): {job.title}", ACCENT)
+
+    def _bind_job(self, job: DownloadJob) -> None:
+        """
+        Route a job's callbacks to the UI and add its queue row.
+        Safe to call from the playlist expansion thread.
+        """
+        # Use default args to capture values at call time (fixes closure bug)
+        job.on_progress = lambda p, l, j=job.id: self._progress.publish(j, p, l)
+        job.on_status   = lambda m, c=ACCENT, j=job.id: self._cb_status(j, m, c)
+        job.on_done     = lambda j=job.id: self._cb_done(j)
+        job.on_error    = lambda m, j=job.id: self._cb_error(j, m)
+
+        if threading.current_thread() is threading.main_thread():
+            self._add_job_row(job)
+        else:
+            self.after(0, lambda j=job: self._add_job_row(j))
+
+    def _add_job_row(self, job: DownloadJob) -> None:
+        row = JobRow(
+            self._queue_frame, job,
+            on_cancel=self._on_cancel_job, on_retry=self._on_retry_job,
         )
+        row.pack(fill="x", padx=4, pady=3)
+        self._job_rows[job.id] = row
+        self._focus_job = job.id
 
     def _on_cancel(self) -> None:
+        if self._fetching is not None:
+            shown = self._fetch_shown
+            self._supersede_fetch()
+            if shown:
+                self._fetch_btn.configure(state="normal")
+                self._format_menu.configure(values=["-- cancelled --"])
+                self._format_var.set("-- cancelled --")
+        for expansion in self._expansions:
+            expansion.set()
+        self._expansions.clear()
         self._manager.cancel()
         self._cancel_btn.configure(state="disabled")
         self._set_status("Cancelling...", WARNING)
 
-    # -- Callbacks (called from worker threads) --------------------------------
-    def _cb_formats_ready(self, formats: List[Dict], info: Dict) -> None:
-        self.after(0, lambda: self._apply_formats(formats, info))
+    def _on_cancel_job(self, job_id: int) -> None:
+        self._manager.cancel(job_id)
+        self._set_status(f"Cancelling #{job_id}...", WARNING)
+
+    def _on_retry_job(self, job_id: int) -> None:
+        job = self._manager.retry(job_id, bind=self._bind_job)
+        if job is None:
+            return
+        old = self._job_rows.pop(job_id, None)
+        if old is not None:
+            old.destroy()
+        self._set_status(f"Retrying as #{job.id}: {job.title}", ACCENT)
+        self._cancel_btn.configure(state="normal")
+
+    def _offer_resume(self) -> None:
+        """Ask once at startup whether to resume downloads a previous run left unfinished."""
+        pending = self._manager.journal.interrupted()
+        if not pending:
+            return
+        if messagebox.askyesno(
+            "Resume Downloads",
+            f"{len(pending)} download(s) did not finish last time.\n\n"
+            "Resume them now? Already-downloaded data is kept.\n"
+            "Choosing No deletes their partial files.",
+        ):
+            jobs = self._manager.resume_interrupted(bind=self._bind_job)
+            self._set_status(f"Resumed {len(jobs)} interrupted download(s).", ACCENT)
+            self._cancel_btn.configure(state="normal")
+        else:
+            self._manager.abandon_interrupted()
+
+    def _on_clear_finished(self) -> None:
+        for job in self._manager.jobs():
+            if job.finished and job.id in self._job_rows:
+                self._job_rows.pop(job.id).destroy()
+        self._manager.clear_finished()
+
+    def _on_workers_changed(self, value: str) -> None:
+        self._manager.set_max_workers(int(value))
+        self._set_status(f"Parallel downloads set to {value}.", ACCENT)
+
+    def _on_bandwidth_changed(self, value: str) -> None:
+        self._manager.set_rate_limit(BANDWIDTH_LIMITS[value])
+        self._set_status(f"Bandwidth limit set to {value}.", ACCENT)
+
+    def _on_isolation_changed(self) -> None:
+        enabled = self._iso_var.get()
+        self._manager.set_isolated(enabled)
+        self._set_status(
+            "yt-dlp now runs in separate worker processes." if enabled
+            else "yt-dlp now runs inside the app process.", ACCENT,
+        )
 
-    def _apply_formats(self, formats: List[Dict], info: Dict) -> None:
-        self._formats = formats
-        self._info    = info
+    def _on_connections_changed(self, value: str) -> None:
+        self._manager.set_connections(CONNECTIONS_AUTO if value == "Auto" else int(value))
+        self._set_status(f"Connections per download set to {value}.", ACCENT)
+
+    # -- Callbacks (called from worker threads) --------------------------------
+    def _cb_formats_ready(self, gen: int, formats: List[FormatRecord], info: Dict) -> None:
+        summary = MetadataCache.summary(info)   # the full info is not needed past this point
+        self.after(0, lambda: self._apply_formats(gen, formats, summary))
+
+    def _end_fetch(self) -> None:
+        self._fetching = None
+        if not self._manager.active_jobs() and not self._expansions:
+            self._cancel_btn.configure(state="disabled")
+
+    def _apply_formats(self, gen: int, formats: List[FormatRecord], summary: Dict) -> None:
+        if gen != self._fetch_gen:
+            return                          # superseded by a newer fetch
+        self._end_fetch()
+        if not self._fetch_shown:
+            return                          # clipboard prefetch: the cache has it now
+        self._formats = {}
+        for fmt in formats:
+            self._formats.setdefault(fmt.label, fmt)
+        self._summary = summary
         self._fetch_btn.configure(state="normal")
 
         if not formats:
@@ -629,7 +983,7 @@ class App(ctk.CTk):
             self._format_var.set("-- none found --")
             return
 
-        labels = [f["label"] for f in formats]
+        labels = list(self._formats)
         self._format_menu.configure(state="normal", values=labels)
         self._format_var.set(labels[0])
         self._dl_btn.configure(state="normal")
@@ -637,8 +991,8 @@ class App(ctk.CTk):
             f"Found {len(formats)} format(s). Select quality and click Download.", SUCCESS
         )
 
-        self._title_lbl.configure(text=info.get("title", ""))
-        duration = info.get("duration")
+        self._title_lbl.configure(text=summary.get("title") or "")
+        duration = summary.get("duration")
         if duration:
             m, s = divmod(int(duration), 60)
             h, m = divmod(m, 60)
@@ -646,63 +1000,123 @@ class App(ctk.CTk):
                 text=f"Duration: {h}:{m:02d}:{s:02d}" if h else f"Duration: {m}:{s:02d}"
             )
 
-        if PIL_AVAILABLE:
-            thumb_url = info.get("thumbnail") or ""
-            if thumb_url:
-                threading.Thread(
-                    target=self._load_thumbnail, args=(thumb_url,), daemon=True
-                ).start()
+        thumb_url = summary.get("thumbnail")
+        if thumb_url:
+            self._show_thumbnail(summary.get("webpage_url") or self._url_entry.get().strip(), thumb_url)
 
-    def _cb_fetch_error(self, msg: str) -> None:
-        self.after(0, lambda m=msg: self._handle_fetch_error(m))
+    def _cb_playlist_error(self, msg: str) -> None:
+        # One bad entry must not stop the playlist -- report it in the status bar only
+        first_line = msg.strip().splitlines()[0] if msg.strip() else "error"
+        self.after(0, lambda m=first_line: self._set_status(f"Skipped: {m}", ERROR))
 
-    def _handle_fetch_error(self, msg: str) -> None:
-        self._set_status(msg, ERROR)
-        self._fetch_btn.configure(state="normal")
-        self._format_menu.configure(values=["-- error --"])
-        self._format_var.set("-- error --")
+    def _cb_playlist_skip(self, entry: Dict, record: Dict) -> None:
+        title = entry.get("title") or record.get("title") or entry["url"]
+        self.after(0, lambda t=title: self._set_status(f"Already downloaded, skipped: {t}", WARNING))
 
-    def _cb_progress(self, pct: int, label: str) -> None:
-        # Use default args to capture values at call time (avoids closure bug)
-        self.after(0, lambda p=pct, l=label: self._update_progress(p, l))
+    def _cb_playlist_done(self, count: int) -> None:
+        self.after(0, lambda n=count: self._set_status(
+            f"Playlist listed: {n} video(s) queued.", SUCCESS
+        ))
 
-    def _update_progress(self, pct: int, label: str) -> None:
-        self._progress_bar.set(pct / 100)
-        self._progress_lbl.configure(text=label)
+    def _cb_fetch_error(self, gen: int, msg: str) -> None:
+        self.after(0, lambda m=msg: self._handle_fetch_error(gen, m))
 
-    def _cb_done(self) -> None:
-        self.after(0, self._handle_done)
-
-    def _handle_done(self) -> None:
-        self._progress_bar.set(1)
-        self._progress_lbl.configure(text="Complete!")
-        self._set_status(f"Saved to: {self._output_dir}", SUCCESS)
-        self._dl_btn.configure(state="normal")
+    def _handle_fetch_error(self, gen: int, msg: str) -> None:
+        if gen != self._fetch_gen:
+            return
+        self._end_fetch()
+        if not self._fetch_shown:
+            return
+        self._set_status(msg, ERROR)
         self._fetch_btn.configure(state="normal")
-        self._cancel_btn.configure(state="disabled")
-
-    def _cb_error(self, msg: str) -> None:
-        self.after(0, lambda m=msg: self._handle_error(m))
+        self._format_menu.configure(values=["-- error --"])
+        self._format_var.set("-- error --")
 
-    def _handle_error(self, msg: str) -> None:
-        self._set_status("Download failed. See error dialog.", ERROR)
-        self._dl_btn.configure(state="normal")
-        self._fetch_btn.configure(state="normal")
-        self._cancel_btn.configure(state="disabled")
-        messagebox.showerror("Download Error", msg)
+    def _pump_progress(self) -> None:
+        """Apply the latest progress of every job, then re-arm (fixed frame rate)."""
+        for job_id, (pct, label) in self._progress.drain().items():
+            self._update_progress(job_id, pct, label)
+        self.after(self._progress_ms, self._pump_progress)
+
+    def _update_progress(self, job_id: int, pct: int, label: str) -> None:
+        job = self._manager.get_job(job_id)
+        if job is not None and job.finished:
+            return      # stale update drained after the job ended
+        row = self._job_rows.get(job_id)
+        if row is not None:
+            if job is not None:
+                row.set_title(job.title)
+            row.update_progress(pct, label)
+        if job_id == self._focus_job:
+            self._progress_bar.set(pct / 100)
+            self._progress_lbl.configure(text=f"#{job_id}  {label}")
+
+    def _cb_status(self, job_id: int, msg: str, color: str = ACCENT) -> None:
+        self.after(0, lambda j=job_id, m=msg, c=color: self._handle_status(j, m, c))
+
+    def _handle_status(self, job_id: int, msg: str, color: str) -> None:
+        job = self._manager.get_job(job_id)
+        row = self._job_rows.get(job_id)
+        if row is not None:
+            if job is not None:
+                row.set_title(job.title)
+            if job is not None and job.state == JOB_CANCELLED:
+                row.mark_finished(msg, color)
+            else:
+                row.update_progress(job.percent if job else 0, msg, color)
+        self._set_status(f"#{job_id}  {msg}", color)
+        self._refresh_cancel_btn()
+
+    def _cb_done(self, job_id: int) -> None:
+        self.after(0, lambda j=job_id: self._handle_done(j))
+
+    def _handle_done(self, job_id: int) -> None:
+        self._progress.discard(job_id)
+        job    = self._manager.get_job(job_id)
+        label  = job.label if job else "Complete!"
+        folder = job.output_dir if job else self._output_dir
+        row = self._job_rows.get(job_id)
+        if row is not None:
+            row.mark_finished(label, SUCCESS)
+        if job_id == self._focus_job:
+            self._progress_bar.set(1)
+            self._progress_lbl.configure(text=f"#{job_id}  {label}")
+        self._set_status(f"#{job_id} saved to: {folder}", SUCCESS)
+        self._refresh_cancel_btn()
+
+    def _cb_error(self, job_id: int, msg: str) -> None:
+        self.after(0, lambda j=job_id, m=msg: self._handle_error(j, m))
+
+    def _handle_error(self, job_id: int, msg: str) -> None:
+        self._progress.discard(job_id)
+        row = self._job_rows.get(job_id)
+        if row is not None:
+            row.mark_finished("Failed", ERROR)
+            row.offer_retry()
+        self._set_status(f"#{job_id} download failed. See error dialog.", ERROR)
+        self._refresh_cancel_btn()
+        messagebox.showerror("Download Error", f"Job #{job_id}\n\n{msg}")
+
+    def _refresh_cancel_btn(self) -> None:
+        state = "normal" if self._manager.active_jobs() else "disabled"
+        self._cancel_btn.configure(state=state)
+
+    def _show_thumbnail(self, url: str, thumb_url: Optional[str]) -> None:
+        """Show the preview for `url` from the thumbnail cache (or fetch thumb_url)."""
+        if self._thumbs is None:
+            return
+        key = self._thumb_key = _video_key(url)
+        self._thumbs.load(
+            url, thumb_url,
+            lambda img, k=key: self.after(0, lambda: self._set_thumbnail(k, img)),
+        )
 
-    def _load_thumbnail(self, url: str) -> None:
-        """Fetch and display the video thumbnail (runs in background thread)."""
-        try:
-            resp = requests.get(url, timeout=10)
-            resp.raise_for_status()
-            img     = Image.open(BytesIO(resp.content))
-            img.thumbnail((220, 130), Image.LANCZOS)
-            ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=img.size)
-            self._thumb_ref = ctk_img    # hold reference so GC doesn't collect it
-            self.after(0, lambda i=ctk_img: self._thumb_lbl.configure(image=i, text=""))
-        except Exception:
-            pass   # thumbnail is decorative; never crash the app for this
+    def _set_thumbnail(self, key: str, img) -> None:
+        if key != self._thumb_key:
+            return      # a newer fetch has replaced this video
+        ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=img.size)
+        self._thumb_ref = ctk_img    # hold reference so GC doesn't collect it
+        self._thumb_lbl.configure(image=ctk_img, text="")
 
     # -- Helper ---------------------------------------------------------------
     def _set_status(self, msg: str, color: str = "#8888AA") -> None:
@@ -713,5 +1127,9 @@ class App(ctk.CTk):
 #  Entry point
 # =============================================================================
 if __name__ == "__main__":
-    app = App()
+    # Isolated workers are spawned processes; a frozen .exe must route them here
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    app = App(timer=_TIMER, report_startup="--startup-report" in sys.argv[1:])
     app.mainloop()
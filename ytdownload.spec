@@ -6,7 +6,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # ytcore imports these lazily by name, which PyInstaller cannot see
+    hiddenimports=['yt_dlp', 'PIL.Image', 'requests', 'http.client', 'urllib.request'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -26,7 +27,9 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # UPX-packed binaries are unpacked again on every onefile launch,
+    # which costs more startup time than the smaller download saves
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,